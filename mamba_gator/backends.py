@@ -0,0 +1,349 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+import abc
+import asyncio
+import collections
+import copy
+import importlib.util
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .condaworker import CondaWorker, CondaWorkerError
+from .log import get_logger
+
+if TYPE_CHECKING:
+    from .envmanager import EnvManager
+
+# conda configuration files search path (see conda.base.constants.SEARCH_PATH)
+if sys.platform == "win32":
+    CONDARC_SEARCH_PATH = (
+        "C:/ProgramData/conda/.condarc",
+        "C:/ProgramData/conda/condarc",
+        "C:/ProgramData/conda/condarc.d",
+    )
+else:
+    CONDARC_SEARCH_PATH = (
+        "/etc/conda/.condarc",
+        "/etc/conda/condarc",
+        "/etc/conda/condarc.d",
+        "/var/lib/conda/.condarc",
+        "/var/lib/conda/condarc",
+        "/var/lib/conda/condarc.d",
+    )
+CONDARC_SEARCH_PATH += (
+    "$CONDA_ROOT/.condarc",
+    "$CONDA_ROOT/condarc",
+    "$CONDA_ROOT/condarc.d",
+    "$XDG_CONFIG_HOME/conda/.condarc",
+    "$XDG_CONFIG_HOME/conda/condarc",
+    "$XDG_CONFIG_HOME/conda/condarc.d",
+    "~/.config/conda/.condarc",
+    "~/.config/conda/condarc",
+    "~/.config/conda/condarc.d",
+    "~/.conda/.condarc",
+    "~/.conda/condarc",
+    "~/.conda/condarc.d",
+    "~/.condarc",
+    "$CONDA_PREFIX/.condarc",
+    "$CONDA_PREFIX/condarc",
+    "$CONDA_PREFIX/condarc.d",
+    "$CONDARC",
+)
+
+# List of the environments known by conda
+ENVIRONMENTS_TXT = "~/.conda/environments.txt"
+
+
+class QueryBackend(abc.ABC):
+    """Backend answering the read-only conda queries.
+
+    Each query returns the parsed JSON output of the equivalent conda command.
+    Errors are returned as a dictionary with an "error" key.
+    """
+
+    name: str = ""
+
+    @property
+    def log(self) -> logging.Logger:
+        """logging.Logger : Extension logger"""
+        return get_logger()
+
+    @abc.abstractmethod
+    async def info(self) -> Dict[str, Any]:
+        """Equivalent of `conda info --json`."""
+
+    @abc.abstractmethod
+    async def config(self) -> Dict[str, Any]:
+        """Equivalent of `conda config --show --json`."""
+
+    @abc.abstractmethod
+    async def packages(self, env: str) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        """Equivalent of `conda list --json -n <env>`.
+
+        Args:
+            env (str): Environment name
+        """
+
+
+class CliQueryBackend(QueryBackend):
+    """Answer queries by executing the package manager command line."""
+
+    name = "cli"
+
+    def __init__(self, manager: "EnvManager"):
+        """
+        Args:
+            manager (EnvManager): Environment manager executing the commands
+        """
+        self._manager = manager
+
+    async def info(self) -> Dict[str, Any]:
+        rcode, output = await self._manager._execute(
+            self._manager.manager, "info", "--json"
+        )
+
+        if rcode != 0:
+            error_data = self._manager._clean_conda_json(output)
+            if isinstance(error_data, dict) and "message" in error_data:
+                return {"error": True, "message": error_data["message"]}
+            return {"error": True, "message": output}
+
+        return self._manager._clean_conda_json(output)
+
+    async def config(self) -> Dict[str, Any]:
+        from .envmanager import CONDA_EXE
+
+        _, output = await self._manager._execute(CONDA_EXE, "config", "--show", "--json")
+        return self._manager._clean_conda_json(output)
+
+    async def packages(self, env: str) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        _, output = await self._manager._execute(
+            self._manager.manager, "list", "--json", "-n", env
+        )
+        return self._manager._clean_conda_json(output)
+
+
+class CondaApiQueryBackend(QueryBackend):
+    """Answer queries by calling the conda Python API.
+
+    The API is called in a dedicated thread if conda is importable by the
+    server or in the conda worker process otherwise. If the call fails,
+    the query is forwarded to the fallback backend.
+    """
+
+    name = "api"
+
+    def __init__(
+        self, call: Callable[..., Awaitable[Any]], fallback: QueryBackend
+    ):
+        """
+        Args:
+            call (Callable): Coroutine function calling a conda API function by its name
+            fallback (QueryBackend): Backend used if the API call fails
+        """
+        self._call = call
+        self._fallback = fallback
+
+    @classmethod
+    def create(
+        cls, fallback: QueryBackend, worker: Optional[CondaWorker] = None
+    ) -> Optional["CondaApiQueryBackend"]:
+        """Create a backend using conda in-process or the conda worker.
+
+        Args:
+            fallback (QueryBackend): Backend used if an API call fails
+            worker (CondaWorker or None): Conda worker to use if conda is not importable
+
+        Returns:
+            CondaApiQueryBackend or None: None if conda is not reachable
+        """
+        if importlib.util.find_spec("conda") is not None:
+            from . import condaworker_server
+
+            # conda API is not thread-safe => a single thread is used
+            executor = ThreadPoolExecutor(1, thread_name_prefix="conda-api")
+
+            async def call(name: str, *args) -> Any:
+                current_loop = asyncio.get_running_loop()
+                return await current_loop.run_in_executor(
+                    executor, partial(condaworker_server.call_api, name, args)
+                )
+
+            return cls(call, fallback)
+        elif worker is not None:
+            return cls(worker.call, fallback)
+        else:
+            return None
+
+    async def _call_api(self, name: str, *args) -> Any:
+        """Call a conda API function; returns None if the call failed."""
+        try:
+            return await self._call(name, *args)
+        except CondaWorkerError as err:
+            self.log.warning(
+                "conda API call '{}' failed, falling back to the CLI: {!s}".format(
+                    name, err
+                )
+            )
+            return None
+
+    async def info(self) -> Dict[str, Any]:
+        info = await self._call_api("info")
+        if info is None:
+            return await self._fallback.info()
+        if "error" in info:
+            return {"error": True, "message": info.get("message", info["error"])}
+        return info
+
+    async def config(self) -> Dict[str, Any]:
+        config = await self._call_api("config")
+        if config is None:
+            return await self._fallback.config()
+        return config
+
+    async def packages(self, env: str) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        packages = await self._call_api("list", env)
+        if packages is None:
+            return await self._fallback.packages(env)
+        return packages
+
+
+def _path_signature(path: str) -> Tuple:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (path, None)
+    signature = (path, st.st_mtime_ns, st.st_ino, st.st_size)
+    if path.endswith("condarc.d"):
+        # Files modified in place do not change the folder modification time
+        try:
+            entries = sorted(os.listdir(path))
+        except OSError:
+            entries = []
+        signature += tuple(_path_signature(os.path.join(path, e)) for e in entries)
+    return signature
+
+
+class CachedQueryBackend(QueryBackend):
+    """Cache the information and configuration queries of another backend.
+
+    A cached result is valid as long as the conda configuration files, the
+    environments list and the environments folders are not modified (same
+    modification time, inode and size). Errors are not cached and concurrent
+    queries share the same backend call.
+
+    The environments packages are not cached.
+    """
+
+    def __init__(self, backend: QueryBackend):
+        """
+        Args:
+            backend (QueryBackend): Backend executing the queries
+        """
+        self._backend = backend
+        self._cache: Dict[str, Tuple[Any, Tuple]] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._watched_paths = self._get_watched_paths()
+        self.hits = collections.Counter()  # type: collections.Counter
+        self.misses = collections.Counter()  # type: collections.Counter
+
+    @property
+    def name(self) -> str:
+        """str: Backend name"""
+        return self._backend.name
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Dict: Cache hits and misses per query."""
+        return {
+            query: {"hits": self.hits[query], "misses": self.misses[query]}
+            for query in ("info", "config")
+        }
+
+    def invalidate(self):
+        """Drop the cached results."""
+        self._cache.clear()
+
+    @staticmethod
+    def _get_watched_paths(info: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Paths whose modification invalidates the cache.
+
+        Args:
+            info (Dict or None): conda information to get the root prefix,
+                the configuration files and the environments folders from
+        """
+        variables = dict(os.environ)
+        if info is not None and "root_prefix" in info:
+            variables["CONDA_ROOT"] = info["root_prefix"]
+
+        paths = []
+        for path in CONDARC_SEARCH_PATH + (ENVIRONMENTS_TXT,):
+            name = path.split("/", 1)[0]
+            if name.startswith("$") and not variables.get(name[1:]):
+                continue
+            path = os.path.expanduser(path)
+            if name.startswith("$"):
+                path = variables[name[1:]] + path[len(name):]
+            paths.append(os.path.normpath(path))
+
+        if info is not None:
+            paths.extend(info.get("config_files", []))
+            paths.extend(info.get("envs_dirs", []))
+
+        return sorted(set(paths))
+
+    @staticmethod
+    def _signature(paths: Iterable[str]) -> Tuple:
+        return tuple(_path_signature(path) for path in paths)
+
+    async def _query(self, query: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        signature = self._signature(self._watched_paths)
+        cached = self._cache.get(query)
+        if cached is not None and cached[1] == signature:
+            self.hits[query] += 1
+            self.log.debug("Query '{}' served from the cache.".format(query))
+            return copy.deepcopy(cached[0])
+
+        self.misses[query] += 1
+        task = self._pending.get(query)
+        if task is None:
+            task = asyncio.ensure_future(fetch())
+            self._pending[query] = task
+            task.add_done_callback(lambda _: self._pending.pop(query, None))
+        # Another caller may be waiting for the same result
+        result = await asyncio.shield(task)
+
+        if isinstance(result, dict) and "error" not in result:
+            if query == "info":
+                watched_paths = self._get_watched_paths(result)
+                if watched_paths != self._watched_paths:
+                    self._watched_paths = watched_paths
+                    self._cache.clear()
+                    signature = self._signature(watched_paths)
+            self._cache[query] = (result, signature)
+
+        return copy.deepcopy(result)
+
+    async def info(self) -> Dict[str, Any]:
+        return await self._query("info", self._backend.info)
+
+    async def config(self) -> Dict[str, Any]:
+        return await self._query("config", self._backend.config)
+
+    async def packages(self, env: str) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        return await self._backend.packages(env)
@@ -0,0 +1,397 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""Build the available packages catalog from the package manager search output."""
+import asyncio
+import collections
+import itertools
+import multiprocessing
+import operator
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .log import get_logger
+from .versions import VersionKey, normalize_version, version_key
+
+# Number of processes formatting the catalog; 0 to format it in a thread
+CATALOG_WORKERS = max(0, int(os.environ.get("GATOR_CATALOG_WORKERS", "0")))  # type: int
+
+# Number of chunks per worker process to balance the load
+CHUNKS_PER_WORKER = 4  # type: int
+
+# Version assigned to the builds with an invalid version
+_INVALID_VERSION = "0.0.0"
+
+# Record fields read by `format_packages` besides those of the first record
+_BUILD_FIELDS = ("build", "build_number", "build_string", "name", "version")
+
+# Entry fields listing the builds
+_BUILD_LISTS = ("version", "build_number", "build_string")
+
+# Entry fields hashed with the builds in the package digest
+_DIGEST_FIELDS = ("name", "channel", "platform", "summary", "home", "keywords", "tags")
+
+# (version, build number, build string) of a `CatalogBuilder` build
+_build_tuple = operator.itemgetter(1, 2, 3)
+
+
+def normalize_pkg_info(s: Dict[str, Any]) -> Dict[str, Union[str, List[str]]]:
+    """Normalize package information.
+
+    Args:
+        s (dict): Raw package information
+
+    Returns:
+        dict: Normalized package information
+    """
+    return {
+        "build_number": s.get("build_number"),
+        "build_string": s.get("build_string", s.get("build")),
+        "channel": s.get("channel"),
+        "name": s.get("name"),
+        "platform": s.get("platform"),
+        "version": s.get("version"),
+        "summary": s.get("summary", ""),
+        "home": s.get("home", ""),
+        "keywords": s.get("keywords", []),
+        "tags": s.get("tags", []),
+    }
+
+
+def group_repoquery_output(data: Dict) -> Dict[str, List[Dict[str, Any]]]:
+    """Make a dictionary with keys as packages name and values
+    containing the list of available packages to match the json output
+    of "conda search --json".
+
+    Args:
+        data (Dict): `mamba repoquery search --json` output
+
+    Returns:
+        Dict[str, List[Dict]]: Package records per package name
+    """
+    data_ = collections.defaultdict(list)
+    for entry in data["result"]["pkgs"]:
+        name = entry.get("name")
+        if name is not None:
+            data_[name].append(entry)
+
+    return data_
+
+
+def _digest(entry: Dict[str, Any], builds: Iterable[Tuple]) -> int:
+    fields = tuple(
+        repr(value) if isinstance(value, (list, dict)) else value
+        for value in map(entry.get, _DIGEST_FIELDS)
+    )
+    # The builds are hashed as a set: their order does not matter
+    return hash((fields, frozenset(builds)))
+
+
+def entry_digest(entry: Dict[str, Any]) -> int:
+    """Content hash of a formatted catalog entry.
+
+    It is equal to the digest of the package in the `CatalogBuilder` that
+    formatted it. The digests are only comparable within a process.
+
+    Args:
+        entry (Dict): Entry as returned by `format_packages`
+
+    Returns:
+        int: The digest
+    """
+    return _digest(entry, zip(*(entry[k] for k in _BUILD_LISTS)))
+
+
+def format_packages(data: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Merge the records of each package in a single entry.
+
+    The entry is the first record of the package with the lists of
+    available versions (descending order), and the highest build number
+    and its build string for each version.
+
+    Args:
+        data (Dict[str, List[Dict]]): Package records per package name
+
+    Returns:
+        List[Dict]: One entry per package
+    """
+    # Data structure
+    #  Dictionary with package name key and value is a list of dictionary. Example:
+    #  {
+    #   "arch": "x86_64",
+    #   "build": "np17py33_0",
+    #   "build_number": 0,
+    #   "channel": "https://repo.anaconda.com/pkgs/free/win-64",
+    #   "constrains": [],
+    #   "date": "2013-02-20",
+    #   "depends": [
+    #     "numpy 1.7*",
+    #     "python 3.3*"
+    #   ],
+    #   "fn": "astropy-0.2-np17py33_0.tar.bz2",
+    #   "license": "BSD",
+    #   "md5": "3522090a8922faebac78558fbde9b492",
+    #   "name": "astropy",
+    #   "platform": "win32",
+    #   "size": 3352442,
+    #   "subdir": "win-64",
+    #   "url": "https://repo.anaconda.com/pkgs/free/win-64/astropy-0.2-np17py33_0.tar.bz2",
+    #   "version": "0.2"
+    # }
+
+    catalog = CatalogBuilder()
+    for name, entries in data.items():
+        for entry in entries:
+            catalog.add(entry, name)
+    return catalog.packages()
+
+
+class CatalogBuilder:
+    """Merge the package records in catalog entries one record at a time.
+
+    This is the incremental version of `format_packages`: the records can be
+    added while the package manager output is parsed, without holding them.
+    Only the first record of each package and one build per version are kept.
+    """
+
+    def __init__(self):
+        # {package name: [normalized first record, {version key: [version key, version, max build number, its build string]}]}
+        self._packages = {}  # type: Dict[str, List]
+        self._digests = None  # type: Optional[Dict[str, int]]
+
+    def __len__(self) -> int:
+        return len(self._packages)
+
+    def add(self, entry: Dict[str, Any], name: Optional[str] = None):
+        """Add a package record.
+
+        Args:
+            entry (Dict): Package record
+            name (str or None): Package name; default to the record name
+        """
+        if name is None:
+            name = entry.get("name")
+            if name is None:
+                return
+
+        self._digests = None
+        package = self._packages.get(name)
+        if package is None:
+            package = self._packages[name] = [normalize_pkg_info(entry), {}]
+        builds: Dict[VersionKey, List] = package[1]
+
+        original_version = entry.get("version") or ""
+        key = version_key(original_version)
+
+        if key is None:
+            get_logger().warning(
+                f"Unable to parse version '{original_version}' of '{entry.get('name')}'"
+            )
+            original_version = _INVALID_VERSION
+            key = version_key(_INVALID_VERSION)
+
+        # Equal versions (e.g. "1.0" and "1.0.0") share the same key; the
+        # first spelling seen is kept.
+        build_number = entry.get("build_number")
+        build = builds.get(key)
+        if build is None:
+            builds[key] = [
+                key,
+                normalize_version(original_version),
+                build_number,
+                entry.get("build_string", entry.get("build")),
+            ]
+        elif build_number > build[2]:
+            build[2] = build_number
+            build[3] = entry.get("build_string", entry.get("build"))
+
+    def digests(self) -> Dict[str, int]:
+        """Content hash of each package.
+
+        A package digest changes if its first record or its builds change;
+        it is computed without formatting the package.
+
+        Returns:
+            Dict[str, int]: Digest per package name
+        """
+        if self._digests is None:
+            self._digests = {
+                name: _digest(pkg_entry, map(_build_tuple, builds.values()))
+                for name, (pkg_entry, builds) in self._packages.items()
+            }
+        return self._digests
+
+    def packages(self, names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """One entry per package.
+
+        Args:
+            names (Iterable[str] or None): Packages to format in that order;
+                default to all in the order of their first record
+
+        Returns:
+            List[Dict]: The catalog entries
+        """
+        if names is None:
+            selected = self._packages.values()
+        else:
+            selected = (self._packages[name] for name in names if name in self._packages)
+
+        packages = []
+        for pkg_entry, builds in selected:
+            ordered = sorted(builds.values(), key=lambda build: build[0], reverse=True)
+
+            pkg_entry = dict(pkg_entry)
+            pkg_entry["version"] = [build[1] for build in ordered]
+            pkg_entry["build_number"] = [build[2] for build in ordered]
+            pkg_entry["build_string"] = [build[3] for build in ordered]
+
+            packages.append(pkg_entry)
+
+        return packages
+
+
+def update_packages(
+    packages: List[Dict[str, Any]],
+    pkg_info: Dict[str, Dict[str, Any]],
+    tr_channels: Dict[str, str],
+) -> List[Dict[str, Any]]:
+    """Add the channels data to the packages and sort them by name.
+
+    Args:
+        packages (List[Dict]): Formatted packages
+        pkg_info (Dict[str, Dict]): channeldata.json packages information
+        tr_channels (Dict[str, str]): Short name per channel URI
+
+    Returns:
+        List[Dict]: The packages sorted by name
+    """
+    # Update channel and add some info
+    for package in packages:
+        name = package["name"]
+        if name in pkg_info:
+            package["summary"] = pkg_info[name].get("summary", "")
+            package["home"] = pkg_info[name].get("home", "")
+            # May return None so "or" with empty list
+            package["keywords"] = pkg_info[name].get("keywords", []) or []
+            package["tags"] = pkg_info[name].get("tags", []) or []
+
+        # Convert to short channel names
+        channel, _ = os.path.split(package["channel"])
+        if channel in tr_channels:
+            package["channel"] = tr_channels[channel]
+
+    return sorted(packages, key=lambda entry: entry.get("name"))
+
+
+def split_packages(
+    data: Dict[str, List[Dict[str, Any]]], n_chunks: int
+) -> List[Dict[str, List[Dict[str, Any]]]]:
+    """Split the package records in chunks of consecutive package names.
+
+    The chunks hold roughly the same number of records and are ordered
+    by package names.
+
+    Args:
+        data (Dict[str, List[Dict]]): Package records per package name
+        n_chunks (int): Number of chunks
+
+    Returns:
+        List[Dict[str, List[Dict]]]: The chunks
+    """
+    total = sum(map(len, data.values()))
+    target = max(1, -(-total // max(1, n_chunks)))
+    chunks = []
+    chunk = {}
+    size = 0
+    for name in sorted(data):
+        chunk[name] = data[name]
+        size += len(data[name])
+        if size >= target:
+            chunks.append(chunk)
+            chunk = {}
+            size = 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def strip_record(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip a package record to the fields used by `format_packages`.
+
+    Only the first record of a package needs all its fields.
+
+    Args:
+        entry (Dict): Package record
+
+    Returns:
+        Dict: The stripped record
+    """
+    return {f: entry[f] for f in _BUILD_FIELDS if f in entry}
+
+
+def _worker_chunks(
+    data: Dict[str, List[Dict[str, Any]]]
+) -> List[Dict[str, List[Dict[str, Any]]]]:
+    # Strip the records to divide the size of the data pickled to the
+    # worker processes.
+    chunks = split_packages(data, max(1, CATALOG_WORKERS) * CHUNKS_PER_WORKER)
+    for chunk in chunks:
+        for name, entries in chunk.items():
+            chunk[name] = entries[:1] + [strip_record(e) for e in entries[1:]]
+    return chunks
+
+
+async def format_packages_in_pool(
+    data: Dict[str, List[Dict[str, Any]]], executor: ProcessPoolExecutor
+) -> List[Dict[str, Any]]:
+    """Format the packages in a process pool.
+
+    The packages are returned sorted by name; the result is otherwise
+    identical to `format_packages`.
+
+    Args:
+        data (Dict[str, List[Dict]]): Package records per package name
+        executor (ProcessPoolExecutor): Process pool
+
+    Returns:
+        List[Dict]: One entry per package
+    """
+    current_loop = asyncio.get_running_loop()
+    chunks = await current_loop.run_in_executor(None, _worker_chunks, data)
+    try:
+        results = await asyncio.gather(
+            *(current_loop.run_in_executor(executor, format_packages, c) for c in chunks)
+        )
+    except BrokenProcessPool as err:
+        get_logger().warning(
+            "Catalog process pool failed, formatting in a thread: {!s}".format(err)
+        )
+        _reset_catalog_executor()
+        results = [await current_loop.run_in_executor(None, format_packages, data)]
+    return list(itertools.chain.from_iterable(results))
+
+
+_executor = None  # type: Optional[ProcessPoolExecutor]
+
+
+def get_catalog_executor() -> Optional[ProcessPoolExecutor]:
+    """Get the process pool formatting the catalog.
+
+    Returns:
+        ProcessPoolExecutor or None: None if the catalog is formatted in a thread
+    """
+    global _executor
+    if CATALOG_WORKERS > 0 and _executor is None:
+        # Do not fork the server process
+        _executor = ProcessPoolExecutor(
+            CATALOG_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def _reset_catalog_executor():
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
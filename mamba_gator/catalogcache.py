@@ -0,0 +1,369 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""On-disk cache of the available packages catalog.
+
+A catalog depends on the channels, the platform and the package manager;
+each combination is cached under its own key. An entry is made of:
+
+- the body: the catalog JSON as served, in a file named after its SHA-256
+  digest (`<digest>.json`) so it is never modified once written;
+- its precompressed variants `<digest>.json.gz` and, if the brotli module
+  is installed, `<digest>.json.br`;
+- the metadata: `<key>.meta.json` pointing to the current body.
+
+The digest is the strong ETag of the catalog.
+
+All files are written in temporary files then renamed, and the metadata
+last, so readers - possibly in other servers - see either the previous or
+the new entry, never a partial one. Bodies that are no longer referenced
+are removed after a grace delay to let concurrent readers finish.
+"""
+import gzip
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, BinaryIO, Dict, NamedTuple, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .catalogtable import json_default
+from .log import get_logger
+
+# Version of the entries format; entries of other versions are ignored
+SCHEMA_VERSION = 1  # type: int
+
+# Age (in seconds) below which a cached catalog is used without refreshing it
+CATALOG_TTL = int(os.environ.get("GATOR_CATALOG_TTL", "3600"))  # type: int
+
+# Age (in seconds) up to which an expired catalog is still returned while
+# being refreshed in background
+CATALOG_MAX_STALE = int(os.environ.get("GATOR_CATALOG_MAX_STALE", str(7 * 24 * 3600)))  # type: int
+
+# Delay (in seconds) before removing a body that is no longer referenced
+_GRACE_DELAY = 60
+
+# Compression levels of the precompressed variants
+GZIP_LEVEL = 6  # type: int
+BROTLI_QUALITY = 5  # type: int
+
+# Precompressed variant file suffix per content encoding, by preference order
+_ENCODINGS = (("br", ".json.br"), ("gzip", ".json.gz"))
+
+_META_SUFFIX = ".meta.json"
+
+
+def default_cache_dir() -> str:
+    """User-private default cache folder.
+
+    Returns:
+        str: The folder path
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(
+            os.path.join("~", "AppData", "Local")
+        )
+    elif sys.platform == "darwin":
+        base = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(
+            os.path.join("~", ".cache")
+        )
+    return os.path.join(base, "mamba_gator", "catalog")
+
+
+def catalog_key(channels: Any, platform: Optional[str], manager: str) -> str:
+    """Cache key of a catalog.
+
+    Args:
+        channels (Any): JSON-serializable channels definition
+        platform (str or None): Platform subdirectory (e.g. "linux-64")
+        manager (str): Package manager executable
+
+    Returns:
+        str: The key
+    """
+    description = json.dumps(
+        {"channels": channels, "manager": manager, "platform": platform},
+        sort_keys=True,
+    )
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()[:32]
+
+
+def write_atomic(path: str, content: bytes):
+    """Write a file atomically.
+
+    The content is written in a temporary file with user-only permissions
+    in the same folder, then renamed.
+
+    Args:
+        path (str): File path; its folder must exist
+        content (bytes): File content
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class CatalogEntry(NamedTuple):
+    """Cached catalog."""
+
+    key: str
+    """Cache key"""
+    digest: str
+    """SHA-256 digest of the body"""
+    path: str
+    """Body file path"""
+    created: float
+    """Creation timestamp"""
+    size: int
+    """Body size in bytes"""
+    encodings: Tuple[str, ...] = ()
+    """Content encodings of the precompressed variants"""
+
+    @property
+    def etag(self) -> str:
+        """Strong entity tag of the catalog."""
+        return '"{}"'.format(self.digest)
+
+    def variant(self, accept_encoding: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """Select the body variant for a request.
+
+        Args:
+            accept_encoding (str or None): Request `Accept-Encoding` header
+
+        Returns:
+            (str, str or None): (variant file path, content encoding or None if not compressed)
+        """
+        accepted = _parse_accept_encoding(accept_encoding or "")
+        base = self.path[: -len(".json")]
+        for encoding, suffix in _ENCODINGS:
+            if encoding in self.encodings and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return base + suffix, encoding
+        return self.path, None
+
+    @property
+    def age(self) -> float:
+        """Age in seconds."""
+        return max(0.0, time.time() - self.created)
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the catalog can be used without refreshing it."""
+        return self.age < CATALOG_TTL
+
+    @property
+    def usable(self) -> bool:
+        """Whether the catalog can be used - while refreshing it if not fresh."""
+        return self.age < CATALOG_TTL + CATALOG_MAX_STALE
+
+    def open(self, path: Optional[str] = None) -> BinaryIO:
+        """Open the body or one of its variants for reading.
+
+        The files are never modified once written; an opened file can be
+        read even if the entry is replaced meanwhile.
+
+        Args:
+            path (str or None): Variant path; default to the uncompressed body
+
+        Returns:
+            BinaryIO: The opened file
+
+        Raises:
+            OSError: If the body cannot be opened
+        """
+        return open(path or self.path, "rb")
+
+    def read(self, path: Optional[str] = None) -> bytes:
+        """Read the body or one of its variants.
+
+        Args:
+            path (str or None): Variant path; default to the uncompressed body
+
+        Returns:
+            bytes: The catalog JSON
+
+        Raises:
+            OSError: If the body cannot be read
+        """
+        with self.open(path) as f:
+            return f.read()
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class CatalogCache:
+    """Store of the cached catalogs.
+
+    Args:
+        directory (str or None): Cache folder; default to `default_cache_dir()`
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = os.path.join(
+            directory or default_cache_dir(), "v{}".format(SCHEMA_VERSION)
+        )
+
+    def get(self, key: str) -> Optional[CatalogEntry]:
+        """Get the cached catalog.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            CatalogEntry or None: The entry or None if there is none or it is invalid
+        """
+        meta_path = os.path.join(self.directory, key + _META_SUFFIX)
+        try:
+            with open(meta_path, "rb") as f:
+                meta = json.load(f)
+            if meta.get("schema") != SCHEMA_VERSION or meta.get("key") != key:
+                return None
+            entry = CatalogEntry(
+                key=key,
+                digest=meta["digest"],
+                path=os.path.join(self.directory, meta["digest"] + ".json"),
+                created=float(meta["created"]),
+                size=int(meta["size"]),
+                encodings=tuple(meta.get("encodings", ())),
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            get_logger().debug("Invalid catalog cache entry {}: {!s}".format(meta_path, err))
+            return None
+
+        if not os.path.exists(entry.path):
+            return None
+        return entry
+
+    def put(self, key: str, data: Dict[str, Any], **metadata) -> CatalogEntry:
+        """Store a catalog.
+
+        Args:
+            key (str): Cache key
+            data (Dict): Catalog; its packages may be a `CatalogTable`
+            **metadata: Additional information stored with the entry (e.g. the channels)
+
+        Returns:
+            CatalogEntry: The new entry
+
+        Raises:
+            OSError: If the catalog cannot be written
+        """
+        body = json.dumps(data, default=json_default).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        created = time.time()
+
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        path = os.path.join(self.directory, digest + ".json")
+        # [(content encoding, file suffix, content factory)]
+        variants = [
+            (None, ".json", lambda: body),
+            ("gzip", ".json.gz", lambda: gzip.compress(body, GZIP_LEVEL, mtime=0)),
+        ]
+        if brotli is not None:
+            variants.append(
+                ("br", ".json.br", lambda: brotli.compress(body, quality=BROTLI_QUALITY))
+            )
+        for _, suffix, content in variants:
+            variant_path = os.path.join(self.directory, digest + suffix)
+            if not os.path.exists(variant_path):
+                self._write(variant_path, content())
+            else:
+                # Protect the variant from removal by a concurrent cleanup
+                os.utime(variant_path)
+        encodings = tuple(encoding for encoding, _, _ in variants if encoding is not None)
+
+        meta = dict(metadata)
+        meta.update(
+            {
+                "schema": SCHEMA_VERSION,
+                "key": key,
+                "digest": digest,
+                "created": created,
+                "size": len(body),
+                "encodings": encodings,
+            }
+        )
+        self._write(
+            os.path.join(self.directory, key + _META_SUFFIX),
+            json.dumps(meta).encode("utf-8"),
+        )
+        self._cleanup()
+
+        return CatalogEntry(
+            key=key,
+            digest=digest,
+            path=path,
+            created=created,
+            size=len(body),
+            encodings=encodings,
+        )
+
+    def _write(self, path: str, content: bytes):
+        write_atomic(path, content)
+
+    def _cleanup(self):
+        """Remove the bodies no longer referenced and the leftover temporary files."""
+        referenced = set()
+        candidates = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.endswith(_META_SUFFIX):
+                try:
+                    with open(path, "rb") as f:
+                        referenced.add(json.load(f)["digest"])
+                except (OSError, ValueError, KeyError, TypeError):
+                    pass
+            elif name.endswith((".json", ".json.gz", ".json.br", ".tmp")):
+                candidates.append(name)
+
+        now = time.time()
+        for name in candidates:
+            if name.split(".", 1)[0] in referenced:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > _GRACE_DELAY:
+                    os.remove(path)
+            except OSError:
+                pass
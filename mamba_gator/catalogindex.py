@@ -0,0 +1,312 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""In-memory index of the available packages catalog.
+
+The index filters, sorts and paginates the catalog on the server so that
+the clients only fetch the packages they display. The filtering and the
+ordering mirror those of the package panel of the frontend.
+"""
+import functools
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .catalogtable import CatalogTable
+from .catalogupdate import is_version
+from .jsonstream import loads
+from .searchindex import SearchIndex
+from .versions import store_version_keys
+
+# Keys by which the packages can be sorted
+SORT_KEYS = ("name", "channel")
+
+# Platform subdirectories skipped in the channel display names
+# - must match `Conda.PkgSubDirs` of the frontend
+_SUBDIRS = frozenset(
+    (
+        "linux-64",
+        "linux-32",
+        "linux-ppc64le",
+        "linux-armv6l",
+        "linux-armv7l",
+        "linux-aarch64",
+        "win-64",
+        "win-32",
+        "osx-64",
+        "zos-z",
+        "noarch",
+    )
+)
+
+# Number of indexes kept in memory
+_INDEX_CACHE_SIZE = 2
+
+
+def channel_display_name(channel: Optional[str]) -> str:
+    """Short channel name displayed by the frontend.
+
+    For example `https://conda.anaconda.org/conda-forge/linux-64` is
+    displayed `conda.anaconda.org/.../conda-forge`.
+
+    Args:
+        channel (str or None): Package channel
+
+    Returns:
+        str: The display name
+    """
+    if not channel:
+        return ""
+    parts = channel.split("/")
+    if len(parts) <= 2:
+        return channel
+
+    first = 1 if parts[0] in ("http:", "https:", "file:") else 0
+    while first < len(parts) - 1 and not parts[first]:
+        first += 1
+    name = parts[first]
+    position = len(parts) - 1
+    while parts[position] in _SUBDIRS and position > first:
+        position -= 1
+    if position > first:
+        name += "/..."
+    return name + "/" + parts[position]
+
+
+def merge_installed(
+    entry: Optional[Dict[str, Any]], installed: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Merge an installed package in its catalog entry.
+
+    Args:
+        entry (Dict or None): Catalog entry; None if the package is not available
+        installed (Dict): Installed package
+
+    Returns:
+        Dict: The catalog entry with the installed version
+    """
+    if entry is None:
+        package = dict(installed)
+        package.update(
+            {
+                "version": [installed.get("version")],
+                "build_number": [installed.get("build_number")],
+                "build_string": [installed.get("build_string")],
+                "summary": "",
+                "home": "",
+                "keywords": [],
+                "tags": [],
+            }
+        )
+    else:
+        package = dict(entry)
+        if installed.get("version") not in package["version"]:
+            package["version"] = package["version"] + [installed.get("version")]
+    package["version_installed"] = installed.get("version")
+    return package
+
+
+class CatalogIndex:
+    """Index of a catalog of available packages.
+
+    The packages are held in a `CatalogTable`.
+
+    Args:
+        catalog (Dict): Catalog as returned by `EnvManager.list_available`
+    """
+
+    def __init__(self, catalog: Dict[str, Any]):
+        packages = catalog.get("packages", [])
+        if not isinstance(packages, CatalogTable):
+            packages = CatalogTable(packages)
+        self.packages = packages  # type: CatalogTable
+        self.with_description = bool(catalog.get("with_description", False))  # type: bool
+        version = catalog.get("version")
+        # None for a catalog cached without version
+        self.version = version if is_version(version) else None  # type: Optional[str]
+        self._names = [name.lower() for name in packages.names]
+        channels = packages.column("channel")
+        # The channels are shared by many packages, so are their display names
+        display_names = {channel: channel_display_name(channel) for channel in set(channels)}
+        self._channels = [display_names[channel] for channel in channels]
+        # Packages positions per (sort key, descending)
+        self._orders: Dict[Tuple[str, bool], List[int]] = {}
+        self._search_index = None  # type: Optional[SearchIndex]
+        self._search_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.packages)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get the entry of a package.
+
+        Args:
+            name (str): Package name
+
+        Returns:
+            Dict or None: The entry; None if the package is not in the catalog
+        """
+        return self.packages.get(name)
+
+    @property
+    def search_index(self) -> SearchIndex:
+        """Search index of the packages, built on first use."""
+        with self._search_lock:
+            if self._search_index is None:
+                self._search_index = SearchIndex(self.packages)
+            return self._search_index
+
+    def search(
+        self, q: str, limit: Optional[int] = None, names_only: bool = False
+    ) -> Dict[str, Any]:
+        """Search packages.
+
+        Args:
+            q (str): Query; see `SearchIndex.search`
+            limit (int or None): Maximal number of packages; default to all
+            names_only (bool): Only search the names, e.g. for autocompletion
+
+        Returns:
+            {
+                "packages": List[package],  # Best matches first
+                "with_description": bool
+            }
+        """
+        return {
+            "packages": self.search_index.search(q, limit, names_only),
+            "with_description": self.with_description,
+        }
+
+    def query(
+        self,
+        q: str = "",
+        channels: Iterable[str] = (),
+        installed: Optional[List[Dict[str, Any]]] = None,
+        excluded: Iterable[str] = (),
+        sort: str = "name",
+        descending: bool = False,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Filter, sort and paginate the packages.
+
+        Args:
+            q (str): Search term; the packages whose name contains it are kept, the
+                ones starting with it first
+            channels (Iterable[str]): Channels to keep - display or full names; default to all
+            installed (List[Dict] or None): Installed packages of an environment; if set,
+                only those are kept with their installed version
+            excluded (Iterable[str]): Names of the packages to leave out, e.g. the
+                packages installed in an environment
+            sort (str): Sort key, one of `SORT_KEYS`
+            descending (bool): Sort in descending order; packages are always
+                sorted by name within the same channel
+            offset (int): Number of packages to skip
+            limit (int or None): Maximal number of packages to return; default to all
+
+        Returns:
+            {
+                "packages": List[package],
+                "total": int,  # Number of packages matching the filters
+                "offset": int,
+                "with_description": bool
+            }
+
+        Raises:
+            ValueError: If the sort key is unknown
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError("Unknown sort key '{}'.".format(sort))
+
+        channels = frozenset(channels)
+        if installed is None:
+            packages = self.packages
+            package_names = packages.names
+            names = self._names
+            display_channels = self._channels
+            order = self._order(sort, descending)
+            full_channels = packages.column("channel") if channels else []
+        else:
+            packages = [merge_installed(self.get(p["name"]), p) for p in installed]
+            package_names = [p["name"] for p in packages]
+            names = [name.lower() for name in package_names]
+            display_channels = [channel_display_name(p.get("channel")) for p in packages]
+            order = _sort(range(len(packages)), names, display_channels, sort, descending)
+            full_channels = [p.get("channel") for p in packages]
+
+        excluded = frozenset(excluded)
+        if excluded:
+            order = [i for i in order if package_names[i] not in excluded]
+
+        if channels:
+            order = [
+                i
+                for i in order
+                if display_channels[i] in channels or full_channels[i] in channels
+            ]
+
+        q = q.lower()
+        if q:
+            starting = []
+            containing = []
+            for i in order:
+                position = names[i].find(q)
+                if position == 0:
+                    starting.append(i)
+                elif position > 0:
+                    containing.append(i)
+            order = starting + containing
+
+        end = None if limit is None else offset + limit
+        return {
+            "packages": [packages[i] for i in order[offset:end]],
+            "total": len(order),
+            "offset": offset,
+            "with_description": self.with_description,
+        }
+
+    def _order(self, sort: str, descending: bool) -> List[int]:
+        key = (sort, descending)
+        # Queries run in threads: an order may be computed twice, not wrongly
+        if key not in self._orders:
+            self._orders[key] = _sort(
+                range(len(self.packages)), self._names, self._channels, sort, descending
+            )
+        return self._orders[key]
+
+
+def _sort(
+    positions: Iterable[int],
+    names: List[str],
+    channels: List[str],
+    sort: str,
+    descending: bool,
+) -> List[int]:
+    if sort == "channel":
+        # Sorts are stable: the names stay in ascending order within a channel
+        by_name = sorted(positions, key=names.__getitem__)
+        return sorted(by_name, key=lambda i: channels[i].lower(), reverse=descending)
+    return sorted(positions, key=names.__getitem__, reverse=descending)
+
+
+@functools.lru_cache(maxsize=_INDEX_CACHE_SIZE)
+def load_index(path: str) -> CatalogIndex:
+    """Load the index of a cached catalog.
+
+    The cached catalog files are never modified; their index is kept in memory.
+    The version keys stored with the catalog are used by the version parsing.
+
+    Args:
+        path (str): Catalog body file
+
+    Returns:
+        CatalogIndex: The index
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a valid catalog
+    """
+    with open(path, "rb") as f:
+        catalog = loads(f.read())
+    keys = catalog.get("version_keys") if isinstance(catalog, dict) else None
+    if isinstance(keys, dict):
+        store_version_keys(keys)
+    return CatalogIndex(catalog)
@@ -0,0 +1,466 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""Compact columnar representation of the available packages catalog.
+
+A catalog of 100k+ packages held as a list of dictionaries repeats its keys
+in every entry, and the channels, platforms, versions and keywords are
+duplicated strings. `CatalogTable` stores each field in a column instead:
+
+- the repeated values (channels, platforms, versions, keywords) are interned
+  in a pool shared by the columns and referenced by their position in typed
+  arrays;
+- the other strings (build strings, summaries, home pages) are stored one
+  after the other in UTF-8 buffers rather than as one object each;
+- the builds of all the packages are stored in flat arrays; each package
+  holds the offset of its first build.
+
+The entries are formatted back as dictionaries - the JSON shape of the
+catalog - only when they are read, e.g. to send a page of packages.
+"""
+import array
+import sys
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Iterator, List, Optional
+
+from .versions import version_key
+
+# Entry fields, in the order of `format_packages`
+FIELDS = (
+    "build_number",
+    "build_string",
+    "channel",
+    "name",
+    "platform",
+    "version",
+    "summary",
+    "home",
+    "keywords",
+    "tags",
+)
+
+_FIELDS = frozenset(FIELDS)
+# Fields every regular entry has
+_REQUIRED = frozenset(("name", "version", "build_number", "build_string"))
+# Presence flag of each field
+_FLAGS = {field: 1 << i for i, field in enumerate(FIELDS)}
+_ALL_FIELDS = (1 << len(FIELDS)) - 1
+# Separator of the strings of a list in a `TextColumn`
+SEPARATOR = "\x00"
+# Range of the build numbers column
+_MIN_INT = -(2**63)
+_MAX_INT = 2**63 - 1
+
+
+class StringPool:
+    """Interned values referenced by their position.
+
+    Only strings, None and tuples of strings are stored.
+    """
+
+    def __init__(self):
+        self.values = []  # type: List[Hashable]
+        self._positions = {}  # type: Dict[Hashable, int]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, value: Hashable) -> int:
+        """Intern a value.
+
+        Args:
+            value (str, None or Tuple[str]): Value
+
+        Returns:
+            int: Position of the value in the pool
+        """
+        position = self._positions.get(value)
+        if position is None:
+            position = self._positions[value] = len(self.values)
+            self.values.append(value)
+        return position
+
+    def add_all(self, values: Iterable[Hashable]) -> List[int]:
+        """Intern values.
+
+        Args:
+            values (Iterable[str, None or Tuple[str]]): Values
+
+        Returns:
+            List[int]: Positions of the values in the pool
+        """
+        values = list(values)
+        positions = list(map(self._positions.get, values))
+        if None in positions:
+            positions = list(map(self.add, values))
+        return positions
+
+
+class TextColumn:
+    """Strings stored one after the other in a UTF-8 buffer.
+
+    This avoids the overhead of one object per string for the values that
+    are rarely repeated. A list of strings is stored as a single string
+    joined by `SEPARATOR`.
+    """
+
+    def __init__(self):
+        self._data = bytearray()
+        # End of each string in the buffer
+        self._ends = array.array("I")
+
+    def __len__(self) -> int:
+        return len(self._ends)
+
+    @property
+    def nbytes(self) -> int:
+        """Size in bytes of the column buffers."""
+        return len(self._data) + self._ends.itemsize * len(self._ends)
+
+    def __getitem__(self, position: int) -> str:
+        start = self._ends[position - 1] if position > 0 else 0
+        return self._data[start : self._ends[position]].decode("utf-8", "surrogatepass")
+
+    def slice(self, start: int, end: int) -> List[str]:
+        """Strings in [start, end).
+
+        Args:
+            start (int): First position
+            end (int): Position after the last one
+
+        Returns:
+            List[str]: The strings
+        """
+        data = self._data
+        ends = self._ends
+        offset = ends[start - 1] if start > 0 else 0
+        values = []
+        for position in range(start, end):
+            values.append(data[offset : ends[position]].decode("utf-8", "surrogatepass"))
+            offset = ends[position]
+        return values
+
+    def append(self, text: str):
+        """Append a string.
+
+        Args:
+            text (str): String
+        """
+        self._data += text.encode("utf-8", "surrogatepass")
+        self._ends.append(len(self._data))
+
+    def extend_from(self, column: "TextColumn", start: int, end: int):
+        """Append the strings [start, end) of another column.
+
+        Args:
+            column (TextColumn): Source column
+            start (int): First position
+            end (int): Position after the last one
+        """
+        if start >= end:
+            return
+        first = column._ends[start - 1] if start > 0 else 0
+        shift = len(self._data) - first
+        self._data += column._data[first : column._ends[end - 1]]
+        self._ends.extend(offset + shift for offset in column._ends[start:end])
+
+
+_TEXT = frozenset((str,))
+_INT = frozenset((int,))
+_OPTIONAL_TEXT = frozenset((str, type(None)))
+
+
+def _only(values: Any, types: FrozenSet[type]) -> bool:
+    # The values are checked by type: the pool does not distinguish 1 from True
+    return type(values) is list and types.issuperset(map(type, values))
+
+
+def _regular(entry: Dict[str, Any]) -> bool:
+    # Entries with other fields or unexpected values are kept as is
+    if not _REQUIRED.issubset(entry) or not _FIELDS.issuperset(entry):
+        return False
+    versions, numbers, builds = entry["version"], entry["build_number"], entry["build_string"]
+    return (
+        type(entry["name"]) is str
+        and _only(versions, _TEXT)
+        and _only(builds, _TEXT)
+        and SEPARATOR not in "".join(builds)
+        and _only(numbers, _INT)
+        and (not numbers or (_MIN_INT <= min(numbers) and max(numbers) <= _MAX_INT))
+        and len(versions) == len(numbers) == len(builds)
+        and _OPTIONAL_TEXT.issuperset(type(entry.get(f)) for f in ("channel", "platform"))
+        and _TEXT.issuperset(type(entry.get(f, "")) for f in ("summary", "home"))
+        and _only(entry.get("keywords", []), _TEXT)
+        and _only(entry.get("tags", []), _TEXT)
+    )
+
+
+class CatalogTable:
+    """Columnar catalog of the available packages.
+
+    The table behaves like a read-only list of catalog entries; the entries
+    are formatted on access and must not be modified.
+
+    Args:
+        packages (Iterable[Dict]): Catalog entries
+        pool (StringPool or None): Pool of interned values; it may be shared
+            with other tables to copy their entries cheaply
+    """
+
+    def __init__(
+        self, packages: Iterable[Dict[str, Any]] = (), pool: Optional[StringPool] = None
+    ):
+        self.pool = StringPool() if pool is None else pool
+        self._names = []  # type: List[str]
+        self._positions = {}  # type: Dict[str, int]
+        self._flags = array.array("H")
+        self._channels = array.array("I")
+        self._platforms = array.array("I")
+        self._summaries = TextColumn()
+        self._homes = TextColumn()
+        self._keywords = array.array("I")
+        self._tags = array.array("I")
+        # Versions and build numbers of package i are at [offsets[i], offsets[i + 1]);
+        # its build strings are joined in a single row
+        self._offsets = array.array("Q", [0])
+        self._versions = array.array("I")
+        self._build_numbers = array.array("q")
+        self._build_strings = TextColumn()
+        # Entries that do not fit in the columns per position
+        self._irregular = {}  # type: Dict[int, Dict[str, Any]]
+        self._empty = self.pool.add(())
+        for entry in packages:
+            self.append(entry)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return map(self._format, range(len(self._names)))
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        if position < 0:
+            position += len(self._names)
+        if not 0 <= position < len(self._names):
+            raise IndexError("catalog table index out of range")
+        return self._format(position)
+
+    @property
+    def names(self) -> List[str]:
+        """Package names by position; must not be modified."""
+        return self._names
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size in bytes of the table, without its pool of interned values."""
+        arrays = (
+            self._flags,
+            self._channels,
+            self._platforms,
+            self._keywords,
+            self._tags,
+            self._offsets,
+            self._versions,
+            self._build_numbers,
+        )
+        size = sum(a.itemsize * len(a) for a in arrays)
+        size += self._summaries.nbytes + self._homes.nbytes + self._build_strings.nbytes
+        size += sys.getsizeof(self._names) + sum(map(sys.getsizeof, self._names))
+        size += sys.getsizeof(self._positions)
+        return size
+
+    def position(self, name: str) -> Optional[int]:
+        """Position of a package.
+
+        Args:
+            name (str): Package name
+
+        Returns:
+            int or None: The position; None if the package is not in the table
+        """
+        return self._positions.get(name)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get the entry of a package.
+
+        Args:
+            name (str): Package name
+
+        Returns:
+            Dict or None: The entry; None if the package is not in the table
+        """
+        position = self._positions.get(name)
+        return None if position is None else self._format(position)
+
+    def column(self, field: str) -> List[Any]:
+        """Values of a field for all the packages, without formatting the entries.
+
+        Args:
+            field (str): One of `FIELDS` except the builds fields
+
+        Returns:
+            List: The values by position; None for the packages without the field
+
+        Raises:
+            ValueError: If the field is not a column
+        """
+        texts = {"summary": self._summaries, "home": self._homes}
+        interned = {
+            "channel": self._channels,
+            "platform": self._platforms,
+            "keywords": self._keywords,
+            "tags": self._tags,
+        }
+        pool = self.pool.values
+        if field == "name":
+            values = list(self._names)
+        elif field in texts:
+            values = texts[field].slice(0, len(self._names))
+        elif field in ("channel", "platform"):
+            values = [pool[i] for i in interned[field]]
+        elif field in interned:
+            values = [list(pool[i]) for i in interned[field]]
+        else:
+            raise ValueError("{} is not a column of the catalog table.".format(field))
+
+        flag = _FLAGS[field]
+        for position, flags in enumerate(self._flags):
+            if not flags & flag:
+                values[position] = None
+        for position, entry in self._irregular.items():
+            values[position] = entry.get(field)
+        return values
+
+    def version_keys(self) -> Dict[str, List[int]]:
+        """Sortable key of each version of the packages.
+
+        The keys are stored with the cached catalog; see `versions.store_version_keys`.
+
+        Returns:
+            Dict[str, List[int]]: Key per version, without the versions that cannot be parsed
+        """
+        pool = self.pool.values
+        versions = {pool[i] for i in set(self._versions)}
+        for entry in self._irregular.values():
+            versions.update(v for v in entry.get("version", ()) if isinstance(v, str))
+        keys = {}
+        for version in sorted(versions):
+            key = version_key(version)
+            if key is not None:
+                keys[version] = list(key)
+        return keys
+
+    def append(self, entry: Dict[str, Any]):
+        """Append a catalog entry.
+
+        Args:
+            entry (Dict): Entry as returned by `format_packages`
+
+        Raises:
+            ValueError: If the package is already in the table
+        """
+        name = entry["name"]
+        if name in self._positions:
+            raise ValueError("{} is already in the catalog table.".format(name))
+        position = len(self._names)
+        add = self.pool.add
+        if _regular(entry):
+            if len(entry) == len(FIELDS):
+                self._flags.append(_ALL_FIELDS)
+            else:
+                self._flags.append(sum(map(_FLAGS.__getitem__, entry)))
+            self._channels.append(add(entry.get("channel")))
+            self._platforms.append(add(entry.get("platform")))
+            self._summaries.append(entry.get("summary", ""))
+            self._homes.append(entry.get("home", ""))
+            self._keywords.append(add(tuple(entry.get("keywords", ()))))
+            self._tags.append(add(tuple(entry.get("tags", ()))))
+            self._versions.extend(self.pool.add_all(entry["version"]))
+            self._build_numbers.extend(entry["build_number"])
+            self._build_strings.append(SEPARATOR.join(entry["build_string"]))
+        else:
+            self._irregular[position] = entry
+            self._flags.append(0)
+            for column in (self._channels, self._platforms, self._keywords, self._tags):
+                column.append(self._empty)
+            for text in (self._summaries, self._homes, self._build_strings):
+                text.append("")
+        self._offsets.append(len(self._versions))
+        self._names.append(name)
+        self._positions[name] = position
+
+    def append_from(self, table: "CatalogTable", position: int):
+        """Append an entry of another table.
+
+        The entry is copied without being formatted if both tables share
+        their pool.
+
+        Args:
+            table (CatalogTable): Source table
+            position (int): Position of the entry in the source table
+        """
+        if table.pool is not self.pool or position in table._irregular:
+            self.append(table[position])
+            return
+
+        name = table._names[position]
+        if name in self._positions:
+            raise ValueError("{} is already in the catalog table.".format(name))
+        start, end = table._offsets[position], table._offsets[position + 1]
+        self._flags.append(table._flags[position])
+        self._channels.append(table._channels[position])
+        self._platforms.append(table._platforms[position])
+        self._summaries.extend_from(table._summaries, position, position + 1)
+        self._homes.extend_from(table._homes, position, position + 1)
+        self._keywords.append(table._keywords[position])
+        self._tags.append(table._tags[position])
+        self._versions.extend(table._versions[start:end])
+        self._build_numbers.extend(table._build_numbers[start:end])
+        self._build_strings.extend_from(table._build_strings, position, position + 1)
+        self._offsets.append(len(self._versions))
+        self._positions[name] = len(self._names)
+        self._names.append(name)
+
+    def _format(self, position: int) -> Dict[str, Any]:
+        irregular = self._irregular.get(position)
+        if irregular is not None:
+            return irregular
+
+        pool = self.pool.values
+        start, end = self._offsets[position], self._offsets[position + 1]
+        builds = self._build_strings[position]
+        entry = {
+            "build_number": self._build_numbers[start:end].tolist(),
+            "build_string": builds.split(SEPARATOR) if end > start else [],
+            "channel": pool[self._channels[position]],
+            "name": self._names[position],
+            "platform": pool[self._platforms[position]],
+            "version": [pool[i] for i in self._versions[start:end]],
+            "summary": self._summaries[position],
+            "home": self._homes[position],
+            "keywords": list(pool[self._keywords[position]]),
+            "tags": list(pool[self._tags[position]]),
+        }
+        flags = self._flags[position]
+        if flags != _ALL_FIELDS:
+            for field in FIELDS:
+                if not flags & _FLAGS[field]:
+                    del entry[field]
+        return entry
+
+
+def json_default(value: Any) -> Any:
+    """Serialize the catalog tables with `json.dumps(..., default=json_default)`.
+
+    Args:
+        value (Any): Object not serializable by default
+
+    Returns:
+        List[Dict]: The catalog entries if value is a `CatalogTable`
+
+    Raises:
+        TypeError: If value is not a `CatalogTable`
+    """
+    if isinstance(value, CatalogTable):
+        return list(value)
+    raise TypeError(
+        "Object of type {} is not JSON serializable".format(type(value).__name__)
+    )
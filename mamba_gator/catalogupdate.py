@@ -0,0 +1,226 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""Update the available packages catalog incrementally.
+
+A catalog refresh lists all the available packages again, while only a few
+of them usually changed since the previous refresh. `CatalogUpdater` keeps
+the previous catalog with the content hash of each package: only the
+packages whose builds or channels data changed are formatted and enriched
+again, the other entries are reused as is. Each update that changes the
+catalog produces a new catalog version and the list of the packages added,
+updated and removed since the previous version; the last ones are kept so
+that a client can fetch only the packages changed since its own version.
+
+A version is an opaque token `<epoch>:<count>`. The epoch is drawn at random
+for each new catalog, so the versions of two catalogs - e.g. for other
+channels - or of a catalog built again from scratch never match.
+"""
+import collections
+import re
+import secrets
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .catalog import CatalogBuilder, entry_digest, update_packages
+from .catalogtable import CatalogTable
+from .log import get_logger
+
+# Number of change lists kept per catalog
+CHANGES_HISTORY = 32  # type: int
+
+# The successive catalog tables share their pool of interned values; it is
+# rebuilt when it grew by this factor with values of the previous versions.
+_POOL_GROWTH = 2
+
+_VERSION_PATTERN = re.compile(r"^([0-9a-f]+):([0-9]+)$")
+
+
+def is_version(version: Any) -> bool:
+    """Whether a value is a catalog version token.
+
+    Args:
+        version (Any): Value to test
+
+    Returns:
+        bool: True if it is a version token
+    """
+    return isinstance(version, str) and _VERSION_PATTERN.match(version) is not None
+
+
+class CatalogUpdater:
+    """Incremental builder of a catalog.
+
+    Args:
+        packages (Iterable[Dict] or CatalogTable): Entries of the current catalog,
+            e.g. the cached one; a table is used as is
+        version (str or None): Version of the current catalog; a new catalog
+            version is started if it is not set or invalid
+    """
+
+    def __init__(
+        self,
+        packages: Union[Iterable[Dict[str, Any]], CatalogTable] = (),
+        version: Optional[str] = None,
+    ):
+        match = _VERSION_PATTERN.match(version) if isinstance(version, str) else None
+        if match is None:
+            self._epoch = secrets.token_hex(4)
+            self._count = 0
+        else:
+            self._epoch = match.group(1)
+            self._count = int(match.group(2))
+        # Change lists of the last versions, oldest first
+        self.history = collections.deque(maxlen=CHANGES_HISTORY)  # type: collections.deque
+        if not isinstance(packages, CatalogTable):
+            packages = CatalogTable(packages)
+        self._table = packages
+        self._pool_size = len(packages.pool)
+        # Without digest, the packages are formatted again on the first update
+        self._digests = {}  # type: Dict[str, int]
+        self._pkg_info = {}  # type: Dict[str, Dict[str, Any]]
+        self._tr_channels = None  # type: Optional[Dict[str, str]]
+        self._with_description = None  # type: Optional[bool]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    @property
+    def version(self) -> str:
+        """Version of the current catalog."""
+        return "{}:{}".format(self._epoch, self._count)
+
+    def update(
+        self,
+        listing: Union[CatalogBuilder, List[Dict[str, Any]]],
+        pkg_info: Dict[str, Dict[str, Any]],
+        tr_channels: Dict[str, str],
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Update the catalog with a new packages listing.
+
+        Args:
+            listing (CatalogBuilder or List[Dict]): Builder holding the package records
+                or the formatted packages (without channels data)
+            pkg_info (Dict[str, Dict]): channeldata.json packages information
+            tr_channels (Dict[str, str]): Short name per channel URI
+
+        Returns:
+            Tuple[Dict, Dict]: The catalog
+                {"packages": CatalogTable, "with_description": bool, "version": str,
+                "version_keys": Dict[str, List[int]]} and its changes
+                {"version": str, "since": str, "added": List[str], "updated": List[str], "removed": List[str]}
+        """
+        with self._lock:
+            if isinstance(listing, CatalogBuilder):
+                digests = listing.digests()
+                formatted = None
+            else:
+                formatted = {p["name"]: p for p in listing}
+                digests = {name: entry_digest(p) for name, p in formatted.items()}
+
+            reset = tr_channels != self._tr_channels
+            changed = [
+                name
+                for name, digest in digests.items()
+                if reset
+                or self._digests.get(name) != digest
+                or self._pkg_info.get(name) != pkg_info.get(name)
+            ]
+            if formatted is None:
+                fresh = listing.packages(changed)
+            else:
+                fresh = [formatted[name] for name in changed]
+            fresh = update_packages(fresh, pkg_info, tr_channels)
+
+            previous = self._table
+            entries = {}  # type: Dict[str, Dict[str, Any]]
+            added = []  # type: List[str]
+            updated = []  # type: List[str]
+            for entry in fresh:
+                name = entry["name"]
+                current = previous.get(name)
+                if current is None:
+                    added.append(name)
+                elif entry != current:
+                    updated.append(name)
+                else:
+                    continue
+                entries[name] = entry
+            removed = sorted(name for name in previous.names if name not in digests)
+
+            if len(previous) and len(previous.pool) < _POOL_GROWTH * self._pool_size:
+                # The unchanged entries are copied without being formatted
+                table = CatalogTable(pool=previous.pool)
+            else:
+                table = CatalogTable()
+            for name in sorted(digests):
+                entry = entries.get(name)
+                if entry is None:
+                    table.append_from(previous, previous.position(name))
+                else:
+                    table.append(entry)
+            if table.pool is not previous.pool:
+                self._pool_size = len(table.pool)
+
+            with_description = len(pkg_info) > 0
+            since = self.version
+            if added or updated or removed or with_description != self._with_description:
+                self._count += 1
+
+            self._table = table
+            self._digests = digests
+            self._pkg_info = pkg_info
+            self._tr_channels = dict(tr_channels)
+            self._with_description = with_description
+
+            changes = {
+                "version": self.version,
+                "since": since,
+                "added": added,
+                "updated": updated,
+                "removed": removed,
+            }
+            if self.version != since:
+                self.history.append(changes)
+            get_logger().debug(
+                "Catalog version {}: {} packages reprocessed, {} added, {} updated, {} removed.".format(
+                    self.version, len(changed), len(added), len(updated), len(removed)
+                )
+            )
+
+            catalog = {
+                "packages": table,
+                "with_description": with_description,
+                "version": self.version,
+                # Spare parsing the versions again once the catalog is cached
+                "version_keys": table.version_keys(),
+            }
+            return catalog, changes
+
+    def changes_since(self, since: str, version: str) -> Optional[List[str]]:
+        """Names of the packages added, updated or removed between two versions.
+
+        Args:
+            since (str): Catalog version held by the client
+            version (str): Current catalog version
+
+        Returns:
+            List[str] or None: The sorted package names; None if the history
+                does not cover the versions, e.g. they are not versions of
+                this catalog
+        """
+        if since == version:
+            return []
+        names: Set[str] = set()
+        found = False
+        with self._lock:
+            # The history is a chain: each change list starts at the version
+            # the previous one ends at.
+            for changes in self.history:
+                if not found and changes["since"] != since:
+                    continue
+                found = True
+                names.update(changes["added"], changes["updated"], changes["removed"])
+                if changes["version"] == version:
+                    return sorted(names)
+        return None
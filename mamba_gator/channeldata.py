@@ -0,0 +1,335 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""Fetch the channels data (`channeldata.json`) describing the packages.
+
+The channels are fetched concurrently with a bounded fan-out through the
+shared HTTP client of the event loop, each one with its own timeout. A
+channel that failed is skipped until a retry delay expires, so that an
+unreachable channel does not slow down every catalog refresh.
+
+The channels data are cached on disk per channel with their `ETag` and
+`Last-Modified` validators, and revalidated with conditional requests. Only
+the fields used by gator are kept. The cached data are also used for the
+channels that cannot be fetched.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from functools import partial
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import tornado
+from jupyter_server.utils import url_path_join
+
+from .catalogcache import default_cache_dir, write_atomic
+from .jsonstream import loads
+from .log import get_logger
+
+# Maximal number of channels fetched at the same time
+CHANNELDATA_CONCURRENCY = max(
+    1, int(os.environ.get("GATOR_CHANNELDATA_CONCURRENCY", "8"))
+)  # type: int
+
+# Timeout (in seconds) to connect to a channel and to get its data
+CHANNELDATA_TIMEOUT = float(os.environ.get("GATOR_CHANNELDATA_TIMEOUT", "20"))  # type: float
+
+# Delay (in seconds) before fetching again a channel that failed; it
+# doubles at each consecutive failure up to `CHANNEL_MAX_RETRY_DELAY`
+CHANNEL_RETRY_DELAY = float(os.environ.get("GATOR_CHANNEL_RETRY_DELAY", "300"))  # type: float
+CHANNEL_MAX_RETRY_DELAY = 24 * 3600  # type: float
+
+# Folder of the channels data cache
+CHANNELDATA_CACHE = os.path.join(
+    os.environ.get("GATOR_CACHE_DIR") or default_cache_dir(), "channeldata"
+)  # type: str
+
+# Packages information fields used by gator
+CHANNELDATA_FIELDS = ("summary", "home", "keywords", "tags")
+
+# Version of the cache entries format; entries of other versions are ignored
+_SCHEMA_VERSION = 1
+
+
+class CircuitBreaker:
+    """Skip the resources that failed recently.
+
+    After a failure, a resource is skipped for `delay` seconds; the delay
+    doubles at each consecutive failure up to `max_delay`. A success
+    resets it.
+
+    Args:
+        delay (float): Delay in seconds after a first failure
+        max_delay (float): Maximal delay in seconds
+    """
+
+    def __init__(self, delay: float, max_delay: float = CHANNEL_MAX_RETRY_DELAY):
+        self.delay = delay
+        self.max_delay = max(delay, max_delay)
+        # {resource: (number of consecutive failures, time of the last failure)}
+        self._failures: Dict[str, Tuple[int, float]] = {}
+
+    def allowed(self, key: str) -> bool:
+        """Whether a resource can be requested.
+
+        Args:
+            key (str): Resource
+
+        Returns:
+            bool: False if the resource failed recently
+        """
+        failure = self._failures.get(key)
+        if failure is None:
+            return True
+        count, last = failure
+        delay = min(self.delay * 2 ** (count - 1), self.max_delay)
+        return time.monotonic() - last >= delay
+
+    def success(self, key: str):
+        """Record a successful request.
+
+        Args:
+            key (str): Resource
+        """
+        self._failures.pop(key, None)
+
+    def failure(self, key: str):
+        """Record a failed request.
+
+        Args:
+            key (str): Resource
+        """
+        count, _ = self._failures.get(key, (0, 0.0))
+        self._failures[key] = (count + 1, time.monotonic())
+
+
+# Shared by all the catalog refreshes
+_breaker = CircuitBreaker(CHANNEL_RETRY_DELAY)
+
+
+def compact_packages(packages: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Keep the packages information fields used by gator.
+
+    Empty fields are dropped too.
+
+    Args:
+        packages (Dict[str, Dict]): `channeldata.json` packages information
+
+    Returns:
+        Dict[str, Dict]: The compact information per package name
+    """
+    return {
+        name: {field: info[field] for field in CHANNELDATA_FIELDS if info.get(field)}
+        for name, info in packages.items()
+    }
+
+
+class ChannelDataCache:
+    """On-disk cache of the channels data.
+
+    Args:
+        directory (str or None): Cache folder; default to `CHANNELDATA_CACHE`
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = os.path.join(
+            directory or CHANNELDATA_CACHE, "v{}".format(_SCHEMA_VERSION)
+        )
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get the cached data of a channel.
+
+        Args:
+            url (str): Channel URL
+
+        Returns:
+            Dict or None: {"packages": Dict[str, Dict], "etag": str or None,
+                "last_modified": str or None}; None if there is no valid entry
+        """
+        path = self._path(url)
+        try:
+            with open(path, "rb") as f:
+                entry = loads(f.read())
+            if entry.get("schema") != _SCHEMA_VERSION or entry.get("url") != url:
+                return None
+            if not isinstance(entry.get("packages"), dict):
+                return None
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, AttributeError) as err:
+            get_logger().debug("Invalid channel data cache entry {}: {!s}".format(path, err))
+            return None
+        return entry
+
+    def put(
+        self,
+        url: str,
+        packages: Dict[str, Dict[str, Any]],
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """Store the data of a channel.
+
+        Args:
+            url (str): Channel URL
+            packages (Dict[str, Dict]): Compact packages information
+            etag (str or None): `ETag` response header
+            last_modified (str or None): `Last-Modified` response header
+
+        Raises:
+            OSError: If the data cannot be written
+        """
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        entry = {
+            "schema": _SCHEMA_VERSION,
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "packages": packages,
+        }
+        write_atomic(self._path(url), json.dumps(entry, separators=(",", ":")).encode("utf-8"))
+
+
+def _local_path(channel: str) -> Optional[str]:
+    url = tornado.httputil.urlparse(channel)
+    if url.scheme != "file":
+        return None
+    if url.netloc:
+        path = "".join(("//", url.netloc, url.path))
+    elif sys.platform == "win32":
+        path = url.path.lstrip("/")
+    else:
+        path = url.path
+    return os.path.join(path, "channeldata.json")
+
+
+def _parse(content: bytes) -> Dict[str, Dict[str, Any]]:
+    return compact_packages(loads(content)["packages"])
+
+
+def _read_file(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, "rb") as f:
+        return _parse(f.read())
+
+
+async def _fetch(
+    channel: str, validate_cert: bool, timeout: float, cache: Optional[ChannelDataCache]
+) -> Dict[str, Dict[str, Any]]:
+    current_loop = tornado.ioloop.IOLoop.current()
+    path = _local_path(channel)
+    if path is not None:
+        get_logger().debug("Reading {}".format(path))
+        return await current_loop.run_in_executor(None, _read_file, path)
+
+    cached = None
+    headers = {"Content-Type": "application/json"}
+    if cache is not None:
+        cached = await current_loop.run_in_executor(None, cache.get, channel)
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+    client = tornado.httpclient.AsyncHTTPClient()
+    response = await client.fetch(
+        tornado.httpclient.HTTPRequest(
+            url_path_join(channel, "channeldata.json"),
+            headers=headers,
+            validate_cert=validate_cert,
+            connect_timeout=timeout,
+            request_timeout=timeout,
+        ),
+        raise_error=False,
+    )
+    if response.code == 304 and cached is not None:
+        get_logger().debug("{}/channeldata.json not modified.".format(channel))
+        return cached["packages"]
+    response.rethrow()
+
+    packages = await current_loop.run_in_executor(None, _parse, response.body)
+    if cache is not None:
+        try:
+            await current_loop.run_in_executor(
+                None,
+                partial(
+                    cache.put,
+                    channel,
+                    packages,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                ),
+            )
+        except OSError as e:
+            get_logger().info("Fail to cache {}/channeldata.json.".format(channel))
+            get_logger().debug(str(e))
+    return packages
+
+
+async def fetch_channeldata(
+    channels: Iterable[str],
+    validate_cert: bool = True,
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    cache: Optional[ChannelDataCache] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Get the packages information of the channels.
+
+    The channels failing (unreachable, timed out, without channeldata.json,
+    invalid data...) are skipped; their cached data are used if any.
+
+    Args:
+        channels (Iterable[str]): Channels URI; `file://` ones are read from the disk
+        validate_cert (bool): Whether to validate the channels certificate
+        concurrency (int or None): Maximal number of concurrent requests;
+            default to `CHANNELDATA_CONCURRENCY`
+        timeout (float or None): Timeout in seconds per channel; default to `CHANNELDATA_TIMEOUT`
+        breaker (CircuitBreaker or None): Failures register; default to the shared one
+        cache (ChannelDataCache or None): Channels data cache; default to no cache
+
+    Returns:
+        Dict[str, Dict]: Information per package name - restricted to `CHANNELDATA_FIELDS`;
+            if a package is described by several channels, the last channel wins.
+    """
+    concurrency = concurrency or CHANNELDATA_CONCURRENCY
+    timeout = timeout or CHANNELDATA_TIMEOUT
+    breaker = breaker or _breaker
+    semaphore = asyncio.Semaphore(concurrency)
+    current_loop = tornado.ioloop.IOLoop.current()
+
+    async def cached(channel: str) -> Optional[Dict[str, Any]]:
+        if cache is None:
+            return None
+        entry = await current_loop.run_in_executor(None, cache.get, channel)
+        if entry is None:
+            return None
+        get_logger().debug("Using the cached {}/channeldata.json.".format(channel))
+        return entry["packages"]
+
+    async def fetch(channel: str) -> Optional[Dict[str, Any]]:
+        if not breaker.allowed(channel):
+            get_logger().debug("{}/channeldata.json skipped after a recent failure.".format(channel))
+            return await cached(channel)
+        async with semaphore:
+            try:
+                packages = await _fetch(channel, validate_cert, timeout, cache)
+            except Exception as e:
+                breaker.failure(channel)
+                get_logger().info("{}/channeldata.json skipped.".format(channel))
+                get_logger().debug(str(e))
+                return await cached(channel)
+        breaker.success(channel)
+        return packages
+
+    pkg_info = {}  # type: Dict[str, Dict[str, Any]]
+    for packages in await asyncio.gather(*map(fetch, channels)):
+        if packages:
+            pkg_info.update(packages)
+    return pkg_info
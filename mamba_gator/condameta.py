@@ -0,0 +1,182 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""Read the packages installed in a prefix from its conda-meta folder.
+
+This is a fast equivalent of `conda list --json`: the records are built from
+`<prefix>/conda-meta/*.json` and from the `*.dist-info` folders of the Python
+packages installed by pip. If the prefix layout is not the one expected
+(unknown channel location, egg installs, clobbered packages,...) None is
+returned and the caller must ask conda.
+"""
+import glob
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from email.parser import HeaderParser
+from typing import Any, Dict, List, Optional
+
+from .log import get_logger
+
+# Channel locations and their canonical name prefix as conda prints them
+KNOWN_CHANNEL_LOCATIONS = (
+    "https://conda.anaconda.org/",
+    "https://repo.anaconda.com/",
+)
+
+# Number of threads used to parse conda-meta files
+MAX_WORKERS = min(8, (os.cpu_count() or 1) + 4)  # type: int
+
+# Anchor files of the Python packages relative to site-packages
+_ANCHOR_RE = re.compile(r"^[^/]+(?:\.dist-info/RECORD|\.egg-info/PKG-INFO|\.egg-info)$")
+
+
+class UnexpectedLayout(Exception):
+    """The prefix cannot be read without conda."""
+
+
+def _load_json(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+def _channel_name(base_url: str) -> str:
+    for location in KNOWN_CHANNEL_LOCATIONS:
+        if base_url.startswith(location):
+            return base_url[len(location):]
+    raise UnexpectedLayout("Unknown channel location {}".format(base_url))
+
+
+def _conda_record(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a conda-meta record in a `conda list --json` record."""
+    try:
+        subdir = meta["subdir"]
+        # <channel>/<subdir>/<filename>
+        base_url = meta["url"].rsplit("/", 2)[0]
+        build = meta["build"]
+        name = meta["name"]
+        version = meta["version"]
+    except (KeyError, AttributeError) as err:
+        raise UnexpectedLayout("Invalid conda-meta record: {!s}".format(err))
+
+    fn = meta.get("fn", "")
+    for extension in (".tar.bz2", ".conda"):
+        if fn.endswith(extension):
+            dist_name = fn[: -len(extension)]
+            break
+    else:
+        dist_name = "-".join((name, version, build))
+
+    return {
+        "base_url": base_url,
+        "build_number": meta.get("build_number", 0),
+        "build_string": build,
+        "channel": _channel_name(base_url),
+        "dist_name": dist_name,
+        "name": name,
+        "platform": subdir,
+        "version": version,
+    }
+
+
+def _site_packages(python_version: str) -> str:
+    if sys.platform == "win32":
+        return "Lib/site-packages"
+    return "lib/python{}/site-packages".format(".".join(python_version.split(".")[:2]))
+
+
+def _pypi_record(dist_info: str) -> Dict[str, Any]:
+    """Build the `conda list --json` record of a Python package installed by pip."""
+    try:
+        with open(os.path.join(dist_info, "METADATA"), encoding="utf-8") as f:
+            metadata = HeaderParser().parse(f)
+    except OSError as err:
+        raise UnexpectedLayout(str(err))
+
+    name, version = metadata.get("Name"), metadata.get("Version")
+    if not name or not version:
+        raise UnexpectedLayout("Invalid metadata in {}".format(dist_info))
+    name = name.replace(".", "-").replace("_", "-").lower()
+
+    editable = False
+    try:
+        direct_url = _load_json(os.path.join(dist_info, "direct_url.json"))
+    except (OSError, ValueError):
+        pass
+    else:
+        editable = bool(direct_url.get("dir_info", {}).get("editable", False))
+
+    return {
+        "base_url": "https://conda.anaconda.org/pypi",
+        "build_number": 0,
+        "build_string": "pypi_0",
+        "channel": "pypi",
+        "dist_name": "{}-{}-pypi_0".format(name, version),
+        "editable": editable,
+        "name": name,
+        "platform": "pypi",
+        "version": version,
+    }
+
+
+def read_prefix_packages(prefix: str) -> Optional[List[Dict[str, Any]]]:
+    """List the packages installed in a prefix without calling conda.
+
+    Args:
+        prefix (str): Environment prefix
+
+    Returns:
+        List[Dict] or None: The packages like `conda list --json` prints them
+            sorted by name; the pip packages have an additional "editable"
+            boolean. None if the prefix cannot be read.
+    """
+    paths = glob.glob(os.path.join(glob.escape(prefix), "conda-meta", "*.json"))
+    if not paths:
+        return None
+
+    try:
+        with ThreadPoolExecutor(MAX_WORKERS) as executor:
+            metas = list(executor.map(_load_json, paths))
+
+        packages = {}
+        python_version = None
+        for meta in metas:
+            record = _conda_record(meta)
+            packages[record["name"]] = record
+            if record["name"] == "python":
+                python_version = record["version"]
+
+        if python_version is not None:
+            sp_dir = _site_packages(python_version)
+            sp_path = os.path.join(prefix, sp_dir)
+            conda_anchors = {
+                path
+                for meta in metas
+                for path in meta.get("files", [])
+                if path.startswith(sp_dir + "/")
+                and _ANCHOR_RE.match(path[len(sp_dir) + 1:])
+            }
+            entries = os.listdir(sp_path) if os.path.isdir(sp_path) else []
+            for entry in entries:
+                if entry.endswith(".dist-info"):
+                    anchor = "{}/{}/RECORD".format(sp_dir, entry)
+                    if anchor not in conda_anchors:
+                        record = _pypi_record(os.path.join(sp_path, entry))
+                        # pip packages replace the conda ones (as conda does)
+                        packages[record["name"]] = record
+                elif entry.endswith((".egg-info", ".egg", ".egg-link")):
+                    anchor = "{}/{}".format(sp_dir, entry)
+                    if anchor not in conda_anchors and anchor + "/PKG-INFO" not in conda_anchors:
+                        raise UnexpectedLayout("Egg installation {}".format(entry))
+            # Check conda packages have not been clobbered by another installer
+            for anchor in conda_anchors:
+                if not os.path.exists(os.path.join(prefix, anchor)):
+                    raise UnexpectedLayout("Missing file {}".format(anchor))
+    except (OSError, ValueError, UnexpectedLayout) as err:
+        get_logger().debug(
+            "Unable to read the packages of {} from conda-meta: {!s}".format(prefix, err)
+        )
+        return None
+
+    return sorted(packages.values(), key=lambda record: record["name"])
@@ -0,0 +1,199 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+import asyncio
+import json
+import logging
+import os
+import sys
+from asyncio.subprocess import PIPE
+from typing import Any, Dict, List, Optional, Tuple
+
+from .log import get_logger
+
+# Script executed by the conda interpreter
+SERVER_SCRIPT = os.path.join(os.path.dirname(__file__), "condaworker_server.py")
+
+# Maximal time to wait for the worker to import conda
+STARTUP_TIMEOUT = 120  # type: int
+
+# Number of consecutive failures after which the worker is not used anymore
+MAX_FAILURES = 3  # type: int
+
+
+class CondaWorkerError(RuntimeError):
+    """The conda worker failed to process a command."""
+
+
+def find_conda_python() -> Optional[str]:
+    """Find the Python interpreter of the conda installation.
+
+    Returns:
+        str or None: Path to the interpreter in which conda is installed
+    """
+    python = os.environ.get("CONDA_PYTHON_EXE")
+    if python:
+        return python
+
+    conda_exe = os.environ.get("CONDA_EXE")
+    if not conda_exe or not os.path.isabs(conda_exe):
+        return None
+
+    # CONDA_EXE is <root>/bin/conda, <root>/condabin/conda or <root>\Scripts\conda.exe
+    root = os.path.dirname(os.path.dirname(conda_exe))
+    if sys.platform == "win32":
+        python = os.path.join(root, "python.exe")
+    else:
+        python = os.path.join(root, "bin", "python")
+
+    return python if os.path.exists(python) else None
+
+
+class CondaWorker:
+    """Client of a long-lived conda process executing commands in-process.
+
+    The process is started on the first command and restarted on the next
+    command if it crashes. Commands are executed one at a time.
+    """
+
+    def __init__(self, python: str):
+        """
+        Args:
+            python (str): Python interpreter in which conda is installed
+        """
+        self._python = python
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._lock = asyncio.Lock()
+        self._last_id = 0
+        self._failures = 0
+        self._started = False
+        self.conda_version: Optional[str] = None
+
+    @property
+    def log(self) -> logging.Logger:
+        """logging.Logger : Extension logger"""
+        return get_logger()
+
+    @property
+    def available(self) -> bool:
+        """bool: Whether the worker can be used."""
+        return self._failures < MAX_FAILURES
+
+    @property
+    def pid(self) -> Optional[int]:
+        """int or None: Worker process id if it is running."""
+        if self._process is None or self._process.returncode is not None:
+            return None
+        return self._process.pid
+
+    async def _read_message(self) -> Dict[str, Any]:
+        header = await self._process.stdout.readline()
+        if not header:
+            raise CondaWorkerError("Conda worker exited unexpectedly.")
+        payload = await self._process.stdout.readexactly(int(header))
+        current_loop = asyncio.get_running_loop()
+        return await current_loop.run_in_executor(None, json.loads, payload)
+
+    async def _write_message(self, message: Dict[str, Any]):
+        payload = json.dumps(message).encode("utf-8")
+        self._process.stdin.write(b"%d\n" % len(payload))
+        self._process.stdin.write(payload)
+        await self._process.stdin.drain()
+
+    async def _start(self):
+        self.log.debug("Starting conda worker with {}.".format(self._python))
+        self._process = await asyncio.create_subprocess_exec(
+            self._python, SERVER_SCRIPT, stdin=PIPE, stdout=PIPE
+        )
+        ready = await asyncio.wait_for(self._read_message(), STARTUP_TIMEOUT)
+        self.conda_version = ready.get("conda_version")
+        self.log.debug(
+            "Conda worker {} ready with conda {}.".format(
+                self._process.pid, self.conda_version
+            )
+        )
+
+    async def _kill(self):
+        process, self._process = self._process, None
+        if process is not None and process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass  # Process already exited
+            await process.wait()
+
+    async def _request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self._started = self.pid is None
+        if self._started:
+            await self._start()
+        self._last_id += 1
+        await self._write_message(dict(request, id=self._last_id))
+        response = await self._read_message()
+        if response.get("id") != self._last_id:
+            raise CondaWorkerError("Conda worker answered another request.")
+        return response
+
+    async def execute(self, args: List[str]) -> Tuple[int, str, str]:
+        """Execute a conda command in the worker.
+
+        Args:
+            args (List[str]): conda command arguments
+
+        Returns:
+            (int, str, str): (return code, output, error)
+
+        Raises:
+            CondaWorkerError: If the worker failed to execute the command
+        """
+        response = await self._send({"args": list(args)})
+        return response["returncode"], response["stdout"], response["stderr"]
+
+    async def call(self, name: str, *args) -> Any:
+        """Call a conda API function in the worker.
+
+        Args:
+            name (str): API function name; see `condaworker_server.API_CALLS`
+            *args: function arguments
+
+        Returns:
+            Any: Function result
+
+        Raises:
+            CondaWorkerError: If the worker failed to execute the function
+        """
+        response = await self._send({"call": name, "args": list(args)})
+        return response["result"]
+
+    async def _send(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._lock:
+            try:
+                try:
+                    response = await self._request(request)
+                except (asyncio.IncompleteReadError, CondaWorkerError, OSError):
+                    if self._started:
+                        raise
+                    # The worker died since the previous command => restart it
+                    self.log.info("Conda worker exited, restarting it.")
+                    await self._kill()
+                    response = await self._request(request)
+            except asyncio.CancelledError:
+                # conda cannot be interrupted in-process
+                await self._kill()
+                raise
+            except (
+                asyncio.IncompleteReadError,
+                asyncio.TimeoutError,
+                CondaWorkerError,
+                OSError,
+                ValueError,
+            ) as err:
+                self._failures += 1
+                await self._kill()
+                raise CondaWorkerError(str(err)) from err
+
+        self._failures = 0
+        return response
+
+    async def shutdown(self):
+        """Stop the worker process."""
+        async with self._lock:
+            await self._kill()
@@ -0,0 +1,194 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""Long-lived conda worker process.
+
+This script is executed by the conda base environment interpreter (not by the
+server one). It imports conda once and then runs the commands or the conda
+API calls received on stdin in-process to avoid paying the interpreter
+startup and conda import costs on every command.
+
+Protocol - every message is a header line with the byte length of a UTF-8
+JSON payload followed by the payload:
+
+* command request: {"id": int, "args": List[str]}
+* command response: {"id": int, "returncode": int, "stdout": str, "stderr": str}
+* API request: {"id": int, "call": str, "args": List[Any]}
+* API response: {"id": int, "result": Any}
+
+The first message sent by the worker is {"ready": true, "conda_version": str}.
+
+It must only depend on the standard library and conda as it is executed
+outside of the server environment. The API functions are also called
+in-process by the server when conda is importable.
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import warnings
+
+# Modules imported ahead of time to make the first commands fast
+PRELOAD_MODULES = (
+    "conda.cli.main_config",
+    "conda.cli.main_info",
+    "conda.cli.main_list",
+    "conda.cli.main_search",
+    "conda.core.index",
+    "conda.core.prefix_data",
+)
+
+
+def read_message(stream):
+    """Read a message from a binary stream; returns None at end of stream."""
+    header = stream.readline()
+    if not header:
+        return None
+    return json.loads(stream.read(int(header)).decode("utf-8"))
+
+
+def write_message(stream, message):
+    """Write a message on a binary stream."""
+    payload = json.dumps(message).encode("utf-8")
+    stream.write(b"%d\n" % len(payload))
+    stream.write(payload)
+    stream.flush()
+
+
+def run_command(conda_main, args):
+    """Execute a conda command and capture its outputs."""
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            returncode = conda_main(*args)
+        except SystemExit as err:
+            returncode = err.code
+        except BaseException as err:  # Keep the worker alive
+            print("{}: {!s}".format(type(err).__name__, err), file=sys.stderr)
+            returncode = 1
+
+    if returncode is None:
+        returncode = 0
+    elif not isinstance(returncode, int):
+        returncode = 1
+
+    return {
+        "returncode": returncode,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+    }
+
+
+def to_json_compatible(data):
+    """Convert conda objects (paths, channels,...) as conda prints them in JSON."""
+    try:
+        from conda.common.serialize.json import dumps
+    except ImportError:  # conda < 24.x
+        from conda.common.serialize import json_dump as dumps
+
+    return json.loads(dumps(data))
+
+
+def api_info():
+    """Equivalent of `conda info --json`."""
+    from conda.base.context import reset_context
+    from conda.cli.main_info import get_info_dict
+    from conda.core.envs_manager import list_all_known_prefixes
+
+    reset_context()  # Reload the configuration files
+    info = get_info_dict()
+    info["envs"] = list_all_known_prefixes()
+    return to_json_compatible(info)
+
+
+def api_config():
+    """Equivalent of `conda config --show --json`."""
+    from conda.base.context import context, reset_context
+
+    reset_context()
+    with warnings.catch_warnings():
+        # Deprecated parameters are still listed
+        warnings.simplefilter("ignore", DeprecationWarning)
+        config = {key: getattr(context, key) for key in context.list_parameters()}
+    plugins = getattr(context, "plugins", None)
+    config["plugins"] = (
+        {key: getattr(plugins, key) for key in plugins.list_parameters()}
+        if plugins is not None
+        else {}
+    )
+    return to_json_compatible(dict(sorted(config.items())))
+
+
+def api_list(env):
+    """Equivalent of `conda list --json -n <env>`."""
+    from conda.base.context import locate_prefix_by_name, reset_context
+    from conda.core.prefix_data import PrefixData
+
+    reset_context()
+    prefix = locate_prefix_by_name(env)
+    try:
+        prefix_data = PrefixData(prefix, interoperability=True)
+    except TypeError:  # conda < 25.x
+        prefix_data = PrefixData(prefix, pip_interop_enabled=True)
+    # The instances are cached per prefix by conda; reset_context does not
+    # clear them, so the records read on the first call must be read again.
+    prefix_data.reload()
+    records = sorted(prefix_data.iter_records(), key=lambda record: record.name)
+    return [record.dist_fields_dump() for record in records]
+
+
+API_CALLS = {
+    "config": api_config,
+    "info": api_info,
+    "list": api_list,
+}
+
+
+def call_api(name, args):
+    """Call a conda API function.
+
+    Errors are returned like conda reports them with the --json flag.
+    """
+    try:
+        return API_CALLS[name](*args)
+    except Exception as err:
+        return {
+            "error": "{}: {!s}".format(type(err).__name__, err),
+            "exception_name": type(err).__name__,
+            "message": str(err),
+        }
+
+
+def main():
+    # Keep a private copy of stdout for the protocol and send anything
+    # written directly to the file descriptor 1 to stderr.
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    requests = sys.stdin.buffer
+
+    from conda import __version__ as conda_version
+    from conda.cli.main import main as conda_main
+
+    for module in PRELOAD_MODULES:
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+    write_message(channel, {"ready": True, "conda_version": conda_version})
+
+    while True:
+        request = read_message(requests)
+        if request is None:
+            break
+        if "call" in request:
+            response = {"result": call_api(request["call"], request["args"])}
+        else:
+            response = run_command(conda_main, request["args"])
+        response["id"] = request["id"]
+        write_message(channel, response)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,31 +11,73 @@ import tempfile
 from functools import lru_cache, partial
 from pathlib import Path
 from subprocess import PIPE, Popen
-from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union
 
 import tornado
 from jupyter_client.kernelspec import KernelSpecManager
-from packaging.version import InvalidVersion, Version, parse
 
 try:
     import nb_conda_kernels
 except ImportError:
     nb_conda_kernels = None
 
-from jupyter_server.utils import url2path, url_path_join
-
+from jupyter_server.utils import url2path
+
+from .backends import (
+    CachedQueryBackend,
+    CliQueryBackend,
+    CondaApiQueryBackend,
+    QueryBackend,
+)
+from .catalog import (
+    CatalogBuilder,
+    format_packages_in_pool,
+    get_catalog_executor,
+    normalize_pkg_info,
+    strip_record,
+    update_packages,
+)
+from .catalogupdate import CatalogUpdater
+from .channeldata import ChannelDataCache, fetch_channeldata
+from .condameta import read_prefix_packages
+from .condaworker import CondaWorker, CondaWorkerError, find_conda_python
+from .jsonstream import JsonRecordStream, extract_json
 from .log import get_logger
+from .repodata import read_catalog
+from .scheduler import get_scheduler
+from .searchindex import SearchIndex
+# parse_version is re-exported: it was defined in this module before
+from .versions import parse_version  # noqa: F401
 
 CONDA_EXE = os.environ.get("CONDA_EXE", "conda")  # type: str
 
+# Execute read-only conda commands in a long-lived conda process
+CONDA_WORKER = os.environ.get("GATOR_CONDA_WORKER", "0").lower() in ("1", "true", "yes")  # type: bool
+
+# conda sub-commands that can be executed by the conda worker
+CONDA_WORKER_COMMANDS = ("config", "info", "list", "search")
+
+# Quick read-only commands (arguments prefixes) allowed to use the process
+# slots reserved by the scheduler
+QUICK_COMMANDS = (("config",), ("info",), ("list",), ("env", "list"), ("-m", "pip", "list"))
+
+# Backend answering read-only queries: "cli" or "api" (conda Python API)
+QUERY_BACKEND = os.environ.get("GATOR_QUERY_BACKEND", "cli").lower()  # type: str
+
+# Cache the conda information and configuration until conda files change
+QUERY_CACHE = os.environ.get("GATOR_QUERY_CACHE", "1").lower() in ("1", "true", "yes")  # type: bool
+
+# List the installed packages from the environment conda-meta folder
+READ_CONDA_META = os.environ.get("GATOR_READ_CONDA_META", "1").lower() in ("1", "true", "yes")  # type: bool
+
 PATH_SEP = "\\" + os.path.sep
 CONDA_ENV_PATH = r"^(.*?" + PATH_SEP + r"envs" + PATH_SEP + r".+?)" + PATH_SEP
 
-# try to match lines of json
-JSONISH_RE = r'(^\s*["\{\}\[\],\d])|(["\}\}\[\],\d]\s*$)'  # type: str
-
 MAX_LOG_OUTPUT = 6000  # type: int
 
+# Size of the chunks read from the standard output of streamed commands
+OUTPUT_CHUNK_SIZE = 1 << 16  # type: int
+
 ROOT_ENV_NAME = "base"
 
 # See https://github.com/Anaconda-Platform/nb_conda_kernels/blob/master/nb_conda_kernels/manager.py#L19
@@ -45,28 +87,6 @@ except AttributeError:
     RUNNER_COMMAND = ["python", "-m", "nb_conda_kernels.runner"]
 
 
-def normalize_pkg_info(s: Dict[str, Any]) -> Dict[str, Union[str, List[str]]]:
-    """Normalize package information.
-
-    Args:
-        s (dict): Raw package information
-
-    Returns:
-        dict: Normalized package information
-    """
-    return {
-        "build_number": s.get("build_number"),
-        "build_string": s.get("build_string", s.get("build")),
-        "channel": s.get("channel"),
-        "name": s.get("name"),
-        "platform": s.get("platform"),
-        "version": s.get("version"),
-        "summary": s.get("summary", ""),
-        "home": s.get("home", ""),
-        "keywords": s.get("keywords", []),
-        "tags": s.get("tags", []),
-    }
-
 def normalize_preview_pkg(s: Dict[str, Any]) -> Dict[str, Any]:
     """Normalize a LINK/UNLINK/FETCH record from conda --dry-run JSON for the UI."""
     row = dict(normalize_pkg_info(s))
@@ -117,38 +137,6 @@ def get_env_path(kernel_spec: Dict[str, Any]) -> Optional[str]:
     return None
 
 
-def parse_version(version: str) -> Optional[Version]:
-    """Handle R-style and year-based versions"""
-    # Convert R package versions like "1.8_4" to "1.8.4"
-    version = version.replace('_', '.')
-
-    # Handle year-based versions like "2023d" -> "2023.4"
-    if re.match(r'^\d{4}[a-z]$', version):
-        letter = version[-1]
-        number = ord(letter) - ord('a') + 1
-        version = f"{version[:-1]}.{number}"
-
-    # Handle custom versions like "custom" -> "0.0.0"
-    if version == "custom":
-        version = "0.0.0"
-        return Version(version)
-
-    # Handle OpenSSL style versions like "1.1.1j" -> "1.1.1.post10"
-    # and legacy short form versions like "9d" -> "9.post4"
-    # Letter suffix implies patch level
-    match_openssl = re.match(r'^(\d+\.\d+\.\d+)([a-z])$', version)
-    match_legacy = re.match(r'^(\d+)([a-z])$', version)
-    if match_openssl or match_legacy:
-        base, letter = match_openssl.groups() if match_openssl else match_legacy.groups()
-        patchlevel = ord(letter) - ord('a') + 1
-        version = f"{base}.post{patchlevel}"
-
-    try:
-        return Version(version)
-    except InvalidVersion:
-        return None
-
-
 class EnvManager:
     """Handles environment and package actions."""
 
@@ -163,6 +151,32 @@ class EnvManager:
         """
         self._root_dir = root_dir
         self._kernel_spec_manager = kernel_spec_manager
+        self._conda_worker = None  # type: Optional[CondaWorker]
+        if CONDA_WORKER:
+            python = find_conda_python()
+            if python is None:
+                self.log.warning(
+                    "Unable to find the conda interpreter, the conda worker is disabled."
+                )
+            else:
+                self._conda_worker = CondaWorker(python)
+
+        self._cli_backend = CliQueryBackend(self)
+        self._query_backend: QueryBackend = self._cli_backend
+        if QUERY_BACKEND == "api":
+            worker = self._conda_worker
+            if worker is None:
+                python = find_conda_python()
+                worker = None if python is None else CondaWorker(python)
+            backend = CondaApiQueryBackend.create(self._cli_backend, worker)
+            if backend is None:
+                self.log.warning(
+                    "Unable to reach the conda Python API, falling back to the CLI."
+                )
+            else:
+                self._query_backend = backend
+        if QUERY_CACHE:
+            self._query_backend = CachedQueryBackend(self._query_backend)
 
     def _clean_conda_json(self, output: str) -> Dict[str, Any]:
         """Clean a command output to fit json format.
@@ -173,32 +187,27 @@ class EnvManager:
         Returns:
             Dict[str, Any]: Cleaned output
         """
-        lines = output.splitlines()
-
-        if not output.strip():
+        if not output or output.isspace():
             return {}
 
         try:
-            return json.loads("\n".join(lines))
-        except (ValueError, json.JSONDecodeError) as err:
-            self.log.warning("JSON parse fail:\n{!s}".format(err))
-
-        # try to remove bad lines
-        lines = [line for line in lines if re.match(JSONISH_RE, line)]
-
-        try:
-            return json.loads("\n".join(lines))
-        except (ValueError, json.JSONDecodeError) as err:
+            return extract_json(output)
+        except ValueError as err:
             self.log.error("JSON clean/parse fail:\n{!s}".format(err))
 
         return {"error": True}
 
-    async def _execute(self, cmd: str, *args) -> Tuple[int, str]:
+    async def _execute(
+        self, cmd: str, *args, on_output: Optional[Callable[[bytes], None]] = None
+    ) -> Tuple[int, str]:
         """Asynchronously execute a command.
 
         Args:
             cmd (str): command to execute
             *args: additional command arguments
+            on_output (Callable[[bytes], None] or None): if set, called with
+                the chunks of the standard output as soon as they are read
+                instead of returning it
 
         Returns:
             (int, str): (return code, output) or (return code, error)
@@ -208,17 +217,123 @@ class EnvManager:
 
         self.log.debug("command: {!s}".format(" ".join(cmdline)))
 
-        current_loop = tornado.ioloop.IOLoop.current()
-        
+        quick = any(tuple(args[: len(prefix)]) == prefix for prefix in QUICK_COMMANDS)
+        async with get_scheduler().process_slot(quick):
+            returncode = None
+            if self._use_conda_worker(cmdline):
+                try:
+                    returncode, output, error = await self._conda_worker.execute(args)
+                    if on_output is not None:
+                        on_output(output.encode("utf-8"))
+                        output = ""
+                except CondaWorkerError as err:
+                    self.log.warning(
+                        "Conda worker failed, falling back to the CLI: {!s}".format(err)
+                    )
+                    returncode = None
+
+            if returncode is None:
+                returncode, output, error = await self._execute_process(cmdline, on_output)
+
+        if returncode != 0:
+            self.log.debug("exit code: {!s}".format(returncode))
+            output = error + output
+
+        self.log.debug("output: {!s}".format(output[:MAX_LOG_OUTPUT]))
+
+        if len(output) > MAX_LOG_OUTPUT:
+            self.log.debug("...")
+
+        return returncode, output
+
+    def _use_conda_worker(self, cmdline: List[str]) -> bool:
+        """Whether the command can be executed by the conda worker."""
+        return (
+            self._conda_worker is not None
+            and self._conda_worker.available
+            and len(cmdline) > 1
+            and Path(cmdline[0]).stem == "conda"
+            and cmdline[1] in CONDA_WORKER_COMMANDS
+        )
+
+    async def _execute_process(
+        self, cmdline: List[str], on_output: Optional[Callable[[bytes], None]] = None
+    ) -> Tuple[int, str, str]:
+        """Execute a command in a new process.
+
+        Args:
+            cmdline (List[str]): command line to execute
+            on_output (Callable[[bytes], None] or None): standard output consumer
+
+        Returns:
+            (int, str, str): (return code, output, error)
+        """
         # Set environment variables to suppress Windows file association dialogs
         env = os.environ.copy()
-        subprocess_kwargs = {"stdout": PIPE, "stderr": PIPE, "env": env}
-        
         if sys.platform == "win32":
             env["PATHEXT"] = env.get("PATHEXT", "") + ";.env"  # Treat .env as executable to avoid dialog
-        
+
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmdline, stdout=PIPE, stderr=PIPE, env=env
+            )
+        except NotImplementedError:
+            # The running loop does not support subprocesses (e.g. selector
+            # loop on Windows) => fall back on blocking pipes in the executor
+            returncode, output, error = await self._execute_in_executor(cmdline, env)
+            if on_output is not None:
+                on_output(output)
+                output = b""
+        else:
+            try:
+                if on_output is None:
+                    output, error = await process.communicate()
+                else:
+                    output = b""
+                    _, error = await asyncio.gather(
+                        self._read_stream(process.stdout, on_output),
+                        process.stderr.read(),
+                    )
+                    await process.wait()
+            except BaseException:  # Cancelled or output consumer failure
+                try:
+                    process.terminate()
+                except ProcessLookupError:
+                    pass  # Process already exited
+                await process.wait()
+                raise
+            returncode = process.returncode
+
+        return returncode, output.decode("utf-8"), error.decode("utf-8")
+
+    @staticmethod
+    async def _read_stream(
+        stream: asyncio.StreamReader, on_output: Callable[[bytes], None]
+    ) -> None:
+        """Pass the chunks read from a stream to a consumer until its end."""
+        while True:
+            chunk = await stream.read(OUTPUT_CHUNK_SIZE)
+            if not chunk:
+                break
+            on_output(chunk)
+
+    async def _execute_in_executor(
+        self, cmdline: List[str], env: Dict[str, str]
+    ) -> Tuple[int, bytes, bytes]:
+        """Execute a command with blocking pipes in the default executor.
+
+        Only used if the event loop does not support asynchronous subprocesses.
+
+        Args:
+            cmdline (List[str]): command line to execute
+            env (Dict[str, str]): environment variables
+
+        Returns:
+            (int, bytes, bytes): (return code, output, error)
+        """
+        current_loop = tornado.ioloop.IOLoop.current()
         process = await current_loop.run_in_executor(
-            None, partial(Popen, cmdline, **subprocess_kwargs)
+            None, partial(Popen, cmdline, stdout=PIPE, stderr=PIPE, env=env)
         )
         try:
             output, error = await current_loop.run_in_executor(
@@ -229,19 +344,7 @@ class EnvManager:
             await current_loop.run_in_executor(None, process.wait)
             raise
 
-        returncode = process.returncode
-        if returncode == 0:
-            output = output.decode("utf-8")
-        else:
-            self.log.debug("exit code: {!s}".format(returncode))
-            output = error.decode("utf-8") + output.decode("utf-8")
-
-        self.log.debug("output: {!s}".format(output[:MAX_LOG_OUTPUT]))
-
-        if len(output) > MAX_LOG_OUTPUT:
-            self.log.debug("...")
-
-        return returncode, output
+        return process.returncode, output, error
 
     @property
     def log(self) -> logging.Logger:
@@ -363,9 +466,7 @@ class EnvManager:
         Returns:
             Dict[str, Any]: Conda configuration
         """
-        ans = await self._execute(CONDA_EXE, "config", "--show", "--json")
-        _, output = ans
-        return self._clean_conda_json(output)
+        return await self._query_backend.config()
 
     async def clone_env(self, env: str, name: str) -> Dict[str, str]:
         """Clone an environment.
@@ -493,23 +594,28 @@ class EnvManager:
         
         return self._clean_conda_json(output)
 
+    def query_stats(self) -> Dict[str, Any]:
+        """Get the statistics of the read-only queries.
+
+        Returns:
+            Dict: {"backend": str, "cache": {query: {"hits": int, "misses": int}}};
+                "cache" is only set if the queries are cached
+        """
+        stats = {"backend": self._query_backend.name}  # type: Dict[str, Any]
+        if isinstance(self._query_backend, CachedQueryBackend):
+            stats["cache"] = self._query_backend.stats
+        return stats
+
     async def info(self) -> Dict[str, Any]:
         """Returns `conda info --json` execution.
 
         Returns:
             The dictionary of conda information
         """
-        ans = await self._execute(self.manager, "info", "--json")
-        rcode, output = ans
-        
-        if rcode != 0:
-            error_data = self._clean_conda_json(output)
-            if isinstance(error_data, dict) and "message" in error_data:
-                return {"error": True, "message": error_data["message"]}
-            return {"error": True, "message": output}
-            
-        info = self._clean_conda_json(output)
-        
+        info = await self._query_backend.info()
+        if "error" in info:
+            return info
+
         conda_version = info.get("conda_version")
         if conda_version is not None:
             EnvManager._conda_version = tuple(
@@ -647,9 +753,10 @@ class EnvManager:
         Returns:
             {"packages": List[package]}
         """
-        ans = await self._execute(self.manager, "list", "--json", "-n", env)
-        _, output = ans
-        data = self._clean_conda_json(output)
+        data = await self._read_prefix_packages(env)
+        from_conda_meta = data is not None
+        if not from_conda_meta:
+            data = await self._query_backend.packages(env)
 
         # Data structure
         #   List of dictionary. Example:
@@ -674,7 +781,12 @@ class EnvManager:
             normalize_pkg_info(pkg).get("channel") == "pypi" for pkg in data
         )
 
-        if has_pypi_packages:
+        if from_conda_meta:
+            # Editable installs are detected from the packages metadata
+            editable_pkg_names = {
+                normalize_name(pkg["name"]) for pkg in data if pkg.get("editable")
+            }
+        elif has_pypi_packages:
             envs = await self.list_envs()
             env_info = next((e for e in envs["environments"] if e["name"] == env), None)
 
@@ -712,6 +824,28 @@ class EnvManager:
 
         return {"packages": packages}
 
+    async def _read_prefix_packages(self, env: str) -> Optional[List[Dict[str, Any]]]:
+        """List the environment packages from its conda-meta folder.
+
+        Args:
+            env (str): Environment name
+
+        Returns:
+            List[Dict] or None: The packages or None if conda must be used
+        """
+        if not READ_CONDA_META:
+            return None
+
+        envs = await self.list_envs()
+        if "error" in envs:
+            return None
+        prefix = next((e["dir"] for e in envs["environments"] if e["name"] == env), None)
+        if prefix is None:
+            return None
+
+        current_loop = asyncio.get_running_loop()
+        return await current_loop.run_in_executor(None, read_prefix_packages, prefix)
+
     async def pkg_depends(self, pkg: str) -> Dict[str, List[str]]:
         """List environment packages dependencies.
 
@@ -746,113 +880,27 @@ class EnvManager:
         return resp
 
 
-    async def list_available(self) -> Dict[str, List[Dict[str, str]]]:
+    async def list_available(
+        self, updater: Optional[CatalogUpdater] = None
+    ) -> Dict[str, List[Dict[str, str]]]:
         """List all available packages
 
+        The packages are read from the repodata cached by the package manager
+        if it is fresh; they are searched with the package manager otherwise.
+
+        Args:
+            updater (CatalogUpdater or None): Updater of the previous catalog; if set, only
+                the packages that changed since are processed again
+
         Returns:
             {
-                "packages": List[package],
-                "with_description": bool  # Whether we succeed in get some channeldata.json files
+                "packages": List[package],  # CatalogTable if `updater` is set
+                "with_description": bool,  # Whether we succeed in get some channeldata.json files
+                "version": str,  # Catalog version; only if `updater` is set
+                "version_keys": Dict[str, List[int]]  # Sortable key per version; only if `updater` is set
             }
         """
-        if self.is_mamba():
-            ans = await self._execute(self.manager, "repoquery", "search", "*", "--json")
-        else:
-            ans = await self._execute(self.manager, "search", "--json")
-        _, output = ans
-
         current_loop = tornado.ioloop.IOLoop.current()
-        data = await current_loop.run_in_executor(None, self._clean_conda_json, output)
-
-        if "error" in data:
-            # we didn't get back a list of packages, we got a
-            # dictionary with error info
-            return data
-
-        def process_mamba_repoquery_output(data: Dict) -> Dict:
-            """Make a dictionary with keys as packages name and values
-            containing the list of available packages to match the json output
-            of "conda search --json".
-            """
-
-            data_ = collections.defaultdict(lambda: [])
-            for entry in data["result"]["pkgs"]:
-                name = entry.get("name")
-                if name is not None:
-                    data_[name].append(entry)
-
-            return data_
-
-        if self.is_mamba():
-            data = await current_loop.run_in_executor(None, process_mamba_repoquery_output, data)
-
-        def format_packages(data: Dict) -> List:
-            packages = []
-
-            # Data structure
-            #  Dictionary with package name key and value is a list of dictionary. Example:
-            #  {
-            #   "arch": "x86_64",
-            #   "build": "np17py33_0",
-            #   "build_number": 0,
-            #   "channel": "https://repo.anaconda.com/pkgs/free/win-64",
-            #   "constrains": [],
-            #   "date": "2013-02-20",
-            #   "depends": [
-            #     "numpy 1.7*",
-            #     "python 3.3*"
-            #   ],
-            #   "fn": "astropy-0.2-np17py33_0.tar.bz2",
-            #   "license": "BSD",
-            #   "md5": "3522090a8922faebac78558fbde9b492",
-            #   "name": "astropy",
-            #   "platform": "win32",
-            #   "size": 3352442,
-            #   "subdir": "win-64",
-            #   "url": "https://repo.anaconda.com/pkgs/free/win-64/astropy-0.2-np17py33_0.tar.bz2",
-            #   "version": "0.2"
-            # }
-
-            # List all available version for packages
-            for entries in data.values():
-                pkg_entry = None
-                versions = list()
-                max_build_numbers = list()
-                max_build_strings = list()
-
-                for entry in entries:
-                    entry = normalize_pkg_info(entry)
-                    if pkg_entry is None:
-                        pkg_entry = entry
-                    version = parse_version(entry.get("version", ""))
-
-                    if version is None:
-                        name = entry.get("name")
-                        original_version = entry.get("version")
-                        self.log.warning(f"Unable to parse version '{original_version}' of '{name}'")
-                        version = Version("0.0.0")
-
-                    if version not in versions:
-                        versions.append(version)
-                        max_build_numbers.append(entry.get("build_number", 0))
-                        max_build_strings.append(entry.get("build_string", ""))
-                    else:
-                        version_idx = versions.index(version)
-                        build_number = entry.get("build_number", 0)
-                        if build_number > max_build_numbers[version_idx]:
-                            max_build_numbers[version_idx] = build_number
-                            max_build_strings[version_idx] = entry.get("build_string", "")
-
-                sorted_versions_idx = sorted(range(len(versions)), key=versions.__getitem__, reverse=True)
-
-                pkg_entry["version"] = [str(versions[i]) for i in sorted_versions_idx]
-                pkg_entry["build_number"] = [max_build_numbers[i] for i in sorted_versions_idx]
-                pkg_entry["build_string"] = [max_build_strings[i] for i in sorted_versions_idx]
-
-                packages.append(pkg_entry)
-            return packages
-
-        packages = await current_loop.run_in_executor(None, format_packages, data)
 
         # Get channel short names
         configuration = await self.conda_config()
@@ -871,47 +919,14 @@ class EnvManager:
         #     else:
         #         top_channels.add(uri)
 
-        # Request channeldata.json
-        pkg_info = {}
-        client = tornado.httpclient.AsyncHTTPClient(force_instance=True)
-        for channel in tr_channels:
-            url = tornado.httputil.urlparse(channel)
-            if url.scheme == "file":
-                if url.netloc:
-                    path = "".join(("//", url.netloc, url.path))
-                elif sys.platform == "win32":
-                    path = url.path.lstrip("/")
-                else:
-                    path = url.path
-                path = os.path.join(path, "channeldata.json")
-                self.log.debug("Reading {}".format(path))
-                try:  # Skip if file is not accessible
-                    with open(path) as f:
-                        channeldata = json.load(f)
-                except (json.JSONDecodeError, OSError, ValueError) as err:
-                    self.log.info("{!s} skipped".format(path))
-                    self.log.debug(str(err))
-                else:
-                    pkg_info.update(channeldata["packages"])
-            else:
-                try:  # Skip if file is not accessible
-                    response = await client.fetch(
-                        tornado.httpclient.HTTPRequest(
-                            url_path_join(channel, "channeldata.json"),
-                            headers={"Content-Type": "application/json"},
-                            validate_cert=configuration.get("ssl_verify", True),
-                        )
-                    )
-                except Exception as e:
-                    self.log.info("{}/channeldata.json skipped.".format(channel))
-                    self.log.debug(str(e))
-                else:
-                    channeldata = response.body.decode("utf-8")
-                    try:
-                        pkg_info.update(json.loads(channeldata)["packages"])
-                    except (json.JSONDecodeError, ValueError) as error:
-                        self.log.info("{}/channeldata.json skipped.".format(channel))
-                        self.log.debug(str(error))
+        # Request channeldata.json while the packages are listed
+        fetching = asyncio.ensure_future(
+            fetch_channeldata(
+                tr_channels,
+                validate_cert=configuration.get("ssl_verify", True),
+                cache=ChannelDataCache(),
+            )
+        )
 
         # Example structure channeldata['packages'] for channeldata_version == 1
         # "tmpc0d7d950": {
@@ -937,24 +952,44 @@ class EnvManager:
         #     "version": "0.1.0.dev1"
         # }
 
-        def update_packages(packages, pkg_info, tr_channels):
-            # Update channel and add some info
-            for package in packages:
-                name = package["name"]
-                if name in pkg_info:
-                    package["summary"] = pkg_info[name].get("summary", "")
-                    package["home"] = pkg_info[name].get("home", "")
-                    # May return None so "or" with empty list
-                    package["keywords"] = pkg_info[name].get("keywords", []) or []
-                    package["tags"] = pkg_info[name].get("tags", []) or []
-
-                # Convert to short channel names
-                channel, _ = os.path.split(package["channel"])
-                if channel in tr_channels:
-                    package["channel"] = tr_channels[channel]
+        try:
+            listing = None
+            # The cache files of conda with `use_only_tar_bz2` are not supported
+            if (
+                configuration.get("pkgs_dirs")
+                and configuration.get("subdirs")
+                and not configuration.get("use_only_tar_bz2")
+            ):
+                listing = await current_loop.run_in_executor(
+                    None,
+                    read_catalog,
+                    configuration["pkgs_dirs"],
+                    list(tr_channels),
+                    configuration["subdirs"],
+                )
+            if listing is None:
+                listing = await self._search_available()
+                if isinstance(listing, dict):
+                    # Error
+                    fetching.cancel()
+                    return listing
+        except BaseException:
+            fetching.cancel()
+            raise
 
-            return sorted(packages, key=lambda entry: entry.get("name"))
+        if updater is not None:
+            pkg_info = await fetching
+            catalog, _ = await current_loop.run_in_executor(
+                None, updater.update, listing, pkg_info, tr_channels
+            )
+            return catalog
 
+        # Format the packages while the channels data are fetched
+        if isinstance(listing, CatalogBuilder):
+            packages = await current_loop.run_in_executor(None, listing.packages)
+        else:
+            packages = listing
+        pkg_info = await fetching
         packages = await current_loop.run_in_executor(
             None, update_packages, packages, pkg_info, tr_channels
         )
@@ -964,11 +999,79 @@ class EnvManager:
             "with_description": len(pkg_info) > 0,
         }
 
-    async def package_search(self, q: str) -> Dict[str, List]:
-        """Search packages.
+    async def _search_available(
+        self,
+    ) -> Union[CatalogBuilder, List[Dict[str, Any]], Dict[str, Any]]:
+        """List all available packages with the package manager search command.
+
+        Returns:
+            CatalogBuilder, List[Dict] or Dict: The builder holding the package records
+                or the formatted packages if they are formatted by a process pool;
+                a dictionary with an "error" key if it fails
+        """
+        if self.is_mamba():
+            args = ("repoquery", "search", "*", "--json")
+            # {"query": {...}, "result": {"msg": "", "pkgs": [records]}}
+            stream = JsonRecordStream(("result", "pkgs"))
+        else:
+            args = ("search", "--json")
+            # {package name: [records]}
+            stream = JsonRecordStream((None,))
+
+        # The records are folded in the catalog while the output is read,
+        # the whole output is never held in memory.
+        executor = get_catalog_executor()
+        if executor is None:
+            catalog = CatalogBuilder()
+            add_record = catalog.add
+        else:
+            # Group the records for the process pool
+            records = collections.defaultdict(list)
+
+            def add_record(record):
+                name = record.get("name")
+                if name is not None:
+                    group = records[name]
+                    group.append(strip_record(record) if group else record)
+
+        def consume(chunk):
+            for record in stream.feed(chunk):
+                add_record(record)
+
+        try:
+            _, output = await self._execute(self.manager, *args, on_output=consume)
+            # Error output
+            consume(output)
+            for record in stream.close():
+                add_record(record)
+        except ValueError as err:
+            self.log.error("JSON parse fail:\n{!s}".format(err))
+            return {"error": True}
+        self.log.debug("{} package records read".format(stream.count))
+
+        if "error" in stream.document:
+            # we didn't get back a list of packages, we got a
+            # dictionary with error info
+            return stream.document
+
+        if executor is None:
+            return catalog
+        return await format_packages_in_pool(records, executor)
+
+    async def package_search(
+        self, q: str, limit: Optional[int] = None, names_only: bool = False
+    ) -> Dict[str, List]:
+        """Search packages with the package manager.
+
+        The records found are merged in catalog entries, as listed by
+        `list_available`, and ranked like a search in the cached catalog.
+        The packages matched by the package manager but not by the query
+        words (e.g. for a glob pattern) come last.
 
         Args:
             q (str): Search query
+            limit (int or None): Maximal number of packages; default to all
+            names_only (bool): Only rank the query in the package names, e.g. for autocompletion
 
         Returns:
             {
@@ -985,23 +1088,19 @@ class EnvManager:
             # error info
             return data
 
-        packages = []
-
-        for entries in data.values():
-            max_version = None
-            max_version_entry = None
-
+        catalog = CatalogBuilder()
+        for name, entries in data.items():
             for entry in entries:
-                version = parse(entry.get("version", ""))
-
-                if max_version is None or version > max_version:
-                    max_version = version
-                    max_version_entry = entry
+                catalog.add(entry, name)
+        packages = sorted(catalog.packages(), key=lambda entry: entry["name"])
 
-            packages.append(max_version_entry)
+        found = SearchIndex(packages).search(q, limit, names_only)
+        if limit is None or len(found) < limit:
+            names = {entry["name"] for entry in found}
+            found.extend(entry for entry in packages if entry["name"] not in names)
 
         return {
-            "packages": sorted(packages, key=lambda entry: entry.get("name")),
+            "packages": found[:limit],
             "with_description": False,
         }
 
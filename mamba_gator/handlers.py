@@ -11,53 +11,113 @@ import json
 import logging
 import os
 import re
-import stat
 import sys
-import tempfile
 import traceback
-from typing import Any, Callable, ClassVar, Dict, NoReturn
+from functools import partial
+from typing import Any, BinaryIO, Callable, ClassVar, Dict, NoReturn, Optional, Set, Tuple
 
 import tornado
 
+from .catalogcache import CatalogCache, catalog_key, default_cache_dir
+from .catalogindex import SORT_KEYS, CatalogIndex, load_index
+from .catalogtable import json_default
+from .catalogupdate import CatalogUpdater, is_version
 from .envmanager import EnvManager
 from .log import get_logger
+from .scheduler import Priority, TaskStats, current_task, get_scheduler
+from .taskresults import TaskResults
 from jupyter_server.base.handlers import APIHandler
 from jupyter_server.utils import url_path_join
 
 NS = r"conda"
-# Filename for the available conda packages list cache in temp folder
-AVAILABLE_CACHE = "mamba_gator_packages"
+# Folder of the available conda packages catalog cache
+AVAILABLE_CACHE = os.environ.get("GATOR_CACHE_DIR") or default_cache_dir()  # type: str
+# Size of the chunks in which the cached catalog is sent
+CATALOG_CHUNK_SIZE = 1 << 18  # type: int
+# Maximal number of task events waiting to be sent to a client
+EVENTS_QUEUE_SIZE = 1024  # type: int
+# Interval (in seconds) of the comments keeping an events stream open
+EVENTS_KEEPALIVE = 15.0  # type: float
+# Maximal time (in seconds) a task request waits for the task completion
+TASK_WAIT_MAX = 60.0  # type: float
 
 
 class ActionsStack:
     """Process long asynchronous task.
 
-    The task result can only be queried once.
+    The result of a finished task is kept in a `TaskResults` store: it can be
+    queried several times until it expires or it is evicted.
 
-    Note: The task start immediately => may bring trouble if the user is not careful,
-    this assumes 'conda' handle lockers when appropriate.
+    Tasks start immediately but their commands are scheduled by the shared
+    `Scheduler`: the number of conda processes is limited, interactive tasks
+    go before background ones and tasks modifying the same environment are
+    executed one at a time.
+
+    The task state changes are published to the subscribers; the final
+    "done" event is published once the result can be queried.
+
+    Args:
+        results (TaskResults or None): Store of the finished tasks results
     """
 
     __last_index: ClassVar[int] = 0
 
-    def __init__(self):
+    def __init__(self, results: Optional[TaskResults] = None):
         self.__tasks: Dict[int, asyncio.Task] = dict()
+        self.__stats: Dict[int, TaskStats] = dict()
+        self.__results = TaskResults() if results is None else results
+        self.__subscribers: Set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Subscribe to the task events.
+
+        An event is the task scheduling statistics with its index `id`; the
+        "done" event has a `cancelled` flag too. The events that do not fit
+        in the queue are dropped.
+
+        Returns:
+            asyncio.Queue: Queue receiving the events
+        """
+        queue = asyncio.Queue(EVENTS_QUEUE_SIZE)
+        self.__subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """Stop sending the task events to a queue.
+
+        Args:
+            queue (asyncio.Queue): Queue returned by `subscribe`
+        """
+        self.__subscribers.discard(queue)
+
+    def __publish(self, idx: int, stats: TaskStats, **kwargs):
+        event = dict(stats.to_dict(), id=idx, **kwargs)
+        for queue in self.__subscribers:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                get_logger().debug("Task {} event dropped.".format(idx))
 
     def cancel(self, idx: int) -> NoReturn:
         """Cancel the task `idx`.
 
         Args:
             idx (int): Task index
+
+        Raises:
+            ValueError: If the task `idx` does not exists.
         """
         get_logger().debug("Cancel task {}.".format(idx))
-        if idx not in self.__tasks:
+        if idx in self.__tasks:
+            self.__tasks[idx].cancel()
+        elif idx not in self.__results:
             raise ValueError("Task {} does not exists.".format(idx))
 
-        self.__tasks[idx].cancel()
-
     def get(self, idx: int) -> Any:
         """Get the task `idx` results or None.
 
+        The result of a finished task can be read again until it expires.
+
         Args:
             idx (int): Task index
 
@@ -65,35 +125,121 @@ class ActionsStack:
             Any: None if the task is pending else its result
 
         Raises:
-            ValueError: If the task `idx` does not exists.
+            ValueError: If the task `idx` does not exists or its result expired.
             asyncio.CancelledError: If the task `idx` was cancelled.
         """
-        if idx not in self.__tasks:
+        if idx in self.__tasks:
+            if not self.__tasks[idx].done():
+                return None
+            self.__store(idx)
+
+        try:
+            result, error, _ = self.__results.get(idx)
+        except KeyError:
             raise ValueError("Task {} does not exists.".format(idx))
+        if error is not None:
+            raise error
+        return result
 
-        if self.__tasks[idx].done():
-            task = self.__tasks.pop(idx)
-            return task.result()
-        else:
-            return None
+    async def wait(self, idx: int, timeout: float) -> bool:
+        """Wait for the task `idx` completion.
+
+        The task is not cancelled if the timeout expires.
+
+        Args:
+            idx (int): Task index
+            timeout (float): Maximal waiting time in seconds
+
+        Returns:
+            bool: Whether the task is done
+
+        Raises:
+            ValueError: If the task `idx` does not exists.
+        """
+        task = self.__tasks.get(idx)
+        if task is None:
+            if idx not in self.__results:
+                raise ValueError("Task {} does not exists.".format(idx))
+            return True
+        done, _ = await asyncio.wait((task,), timeout=timeout)
+        return bool(done)
+
+    def stats(self, idx: int) -> Dict[str, Any]:
+        """Get the task `idx` scheduling statistics.
+
+        Args:
+            idx (int): Task index
 
-    def put(self, task: Callable, *args) -> int:
+        Returns:
+            Dict: state, priority, queue depth, wait time, number of processes and elapsed time
+
+        Raises:
+            ValueError: If the task `idx` does not exists.
+        """
+        if idx in self.__stats:
+            return self.__stats[idx].to_dict()
+        try:
+            _, _, stats = self.__results.get(idx)
+        except KeyError:
+            raise ValueError("Task {} does not exists.".format(idx))
+        return stats.to_dict()
+
+    def usage(self) -> Dict[str, Any]:
+        """Get the number of pending tasks and the memory usage of the results.
+
+        Returns:
+            Dict: pending tasks and `TaskResults.usage`
+        """
+        return dict(self.__results.usage(), pending=len(self.__tasks))
+
+    def __store(self, idx: int):
+        # Move a finished task outcome to the results store
+        task = self.__tasks.pop(idx, None)
+        if task is None:
+            return
+        stats = self.__stats.pop(idx)
+        # A task cancelled before being started did not update its state
+        stats.state = "done"
+        if task.cancelled():
+            outcome = (None, asyncio.CancelledError(), stats)
+        elif task.exception() is not None:
+            outcome = (None, task.exception(), stats)
+        else:
+            outcome = (task.result(), None, stats)
+        self.__results.put(idx, outcome)
+        self.__publish(idx, stats, cancelled=task.cancelled())
+
+    def put(
+        self,
+        task: Callable,
+        *args,
+        env: Optional[str] = None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> int:
         """Add a asynchronous task into the queue.
 
         Args:
             task (Callable): Asynchronous task
             *args : arguments of the task
+            env (str or None): Environment modified by the task
+            priority (Priority): Task priority
 
         Returns:
             int: Task id
         """
         ActionsStack.__last_index += 1
         idx = ActionsStack.__last_index
+        stats = TaskStats(priority)
 
         async def execute_task(idx, f, *args) -> Any:
+            current_task.set(stats)
             try:
                 get_logger().debug("Will execute task {}.".format(idx))
-                result = await f(*args)
+                if env is None:
+                    result = await f(*args)
+                else:
+                    async with get_scheduler().env_lock(env):
+                        result = await f(*args)
             except asyncio.CancelledError:
                 raise
             except Exception as e:
@@ -106,11 +252,24 @@ class ActionsStack:
                 }
                 get_logger().error("Error for task {}.".format(result))
             else:
-                get_logger().debug("Has executed task {}.".format(idx))
+                get_logger().debug(
+                    "Has executed task {} (waited {:.3f}s).".format(idx, stats.wait_time)
+                )
+            finally:
+                stats.state = "done"
 
             return result
 
+        def on_change(stats: TaskStats):
+            # The "done" event is published once the result is stored
+            if stats.state != "done":
+                self.__publish(idx, stats)
+
+        stats.on_change = on_change
+        self.__stats[idx] = stats
+        self.__publish(idx, stats)
         self.__tasks[idx] = asyncio.ensure_future(execute_task(idx, task, *args))
+        self.__tasks[idx].add_done_callback(lambda _: self.__store(idx))
         return idx
 
     def __del__(self):
@@ -201,15 +360,17 @@ class EnvironmentsHandler(EnvBaseHandler):
         file_name = data.get("filename", "environment.txt")
 
         if packages is not None:
-            idx = self._stack.put(self.env_manager.create_env, name, *packages)
+            idx = self._stack.put(
+                self.env_manager.create_env, name, *packages, env=name
+            )
         elif twin is not None:
-            idx = self._stack.put(self.env_manager.clone_env, twin, name)
+            idx = self._stack.put(self.env_manager.clone_env, twin, name, env=name)
         elif file_content is not None:
             idx = self._stack.put(
-                self.env_manager.import_env, name, file_content, file_name
+                self.env_manager.import_env, name, file_content, file_name, env=name
             )
         else:
-            idx = self._stack.put(self.env_manager.create_env, name)
+            idx = self._stack.put(self.env_manager.create_env, name, env=name)
 
         self.redirect_to_task(idx)
 
@@ -220,7 +381,7 @@ class EnvironmentHandler(EnvBaseHandler):
     @tornado.web.authenticated
     def delete(self, env: str):
         """`DELETE /environments/<env>` deletes an environment."""
-        idx = self._stack.put(self.env_manager.delete_env, env)
+        idx = self._stack.put(self.env_manager.delete_env, env, env=env)
 
         self.redirect_to_task(idx)
 
@@ -276,7 +437,9 @@ class EnvironmentHandler(EnvBaseHandler):
         file_content = data["file"]
         file_name = data.get("filename", "environment.yml")
 
-        idx = self._stack.put(self.env_manager.update_env, env, file_content, file_name)
+        idx = self._stack.put(
+            self.env_manager.update_env, env, file_content, file_name, env=env
+        )
 
         self.redirect_to_task(idx)
 
@@ -295,7 +458,7 @@ class PackagesEnvironmentHandler(EnvBaseHandler):
         """
         body = self.get_json_body()
         packages = body["packages"]
-        idx = self._stack.put(self.env_manager.remove_packages, env, packages)
+        idx = self._stack.put(self.env_manager.remove_packages, env, packages, env=env)
         self.redirect_to_task(idx)
 
     @tornado.web.authenticated
@@ -311,7 +474,7 @@ class PackagesEnvironmentHandler(EnvBaseHandler):
         """
         body = self.get_json_body() or {}
         packages = body.get("packages", ["--all"])
-        idx = self._stack.put(self.env_manager.update_packages, env, packages)
+        idx = self._stack.put(self.env_manager.update_packages, env, packages, env=env)
         self.redirect_to_task(idx)
 
     @tornado.web.authenticated
@@ -334,9 +497,13 @@ class PackagesEnvironmentHandler(EnvBaseHandler):
         develop = int(self.get_query_argument("develop", 0))
 
         if develop:
-            idx = self._stack.put(self.env_manager.develop_packages, env, packages)
+            idx = self._stack.put(
+                self.env_manager.develop_packages, env, packages, env=env
+            )
         else:
-            idx = self._stack.put(self.env_manager.install_packages, env, packages)
+            idx = self._stack.put(
+                self.env_manager.install_packages, env, packages, env=env
+            )
         self.redirect_to_task(idx)
 
 class PreviewPackagesEnvironmentHandler(EnvBaseHandler):
@@ -376,18 +543,277 @@ class PreviewPackagesEnvironmentHandler(EnvBaseHandler):
 class PackagesHandler(EnvBaseHandler):
     """Handles packages search"""
 
-    __is_listing_available = False
+    # Keys of the catalogs being refreshed
+    __refreshing = set()  # type: Set[Optional[str]]
+    # Incremental updaters of the catalogs per (cache folder, key)
+    __updaters: Dict[Tuple[str, str], CatalogUpdater] = {}
+
+    async def _catalog_key(self) -> Optional[str]:
+        """Cache key of the available packages catalog.
+
+        Returns:
+            str or None: The key or None if the conda configuration is not available
+        """
+        configuration = await self.env_manager.conda_config()
+        if "error" in configuration:
+            return None
+        channels = await self.env_manager.env_channels(configuration)
+        return catalog_key(
+            channels.get("channels"), configuration.get("subdir"), self.env_manager.manager
+        )
+
+    def _page_arguments(self) -> Optional[Dict[str, Any]]:
+        """Parse the catalog page query arguments.
+
+        Returns:
+            Dict or None: `CatalogIndex.query` arguments, `installed_in` and
+                `not_installed_in`; None if the whole catalog is requested
+
+        Raises:
+            400 if an argument is invalid
+        """
+        names = (
+            "offset",
+            "limit",
+            "channel",
+            "installed_in",
+            "not_installed_in",
+            "sort",
+            "order",
+            "q",
+        )
+        if not any(name in self.request.query_arguments for name in names):
+            return None
+
+        try:
+            offset = int(self.get_query_argument("offset", "0"))
+            limit = self.get_query_argument("limit", None)
+            limit = None if limit is None else int(limit)
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="offset and limit must be integers.")
+        if offset < 0 or (limit is not None and limit < 0):
+            raise tornado.web.HTTPError(400, reason="offset and limit must be positive.")
+        sort = self.get_query_argument("sort", "name")
+        if sort not in SORT_KEYS:
+            raise tornado.web.HTTPError(
+                400, reason="sort must be one of {}.".format(", ".join(SORT_KEYS))
+            )
+        order = self.get_query_argument("order", "asc")
+        if order not in ("asc", "desc"):
+            raise tornado.web.HTTPError(400, reason="order must be asc or desc.")
+
+        return {
+            "q": self.get_query_argument("q", ""),
+            "channels": self.get_query_arguments("channel"),
+            "installed_in": self.get_query_argument("installed_in", None),
+            "not_installed_in": self.get_query_argument("not_installed_in", None),
+            "sort": sort,
+            "descending": order == "desc",
+            "offset": offset,
+            "limit": limit,
+        }
+
+    async def _query_catalog(self, index: CatalogIndex, page: Dict[str, Any]) -> Dict:
+        """Get a catalog page.
+
+        Args:
+            index (CatalogIndex): Catalog index
+            page (Dict): Page arguments from `_page_arguments`
+
+        Returns:
+            Dict: The page as returned by `CatalogIndex.query` or the error
+        """
+        arguments = dict(page)
+        env = arguments.pop("installed_in")
+        if env:
+            installed = await self.env_manager.env_packages(env)
+            if "error" in installed:
+                return installed
+            arguments["installed"] = installed["packages"]
+        env = arguments.pop("not_installed_in")
+        if env:
+            installed = await self.env_manager.env_packages(env)
+            if "error" in installed:
+                return installed
+            arguments["excluded"] = [p["name"] for p in installed["packages"]]
+        # Sorting, filtering and formatting a large catalog would block the loop
+        current_loop = tornado.ioloop.IOLoop.current()
+        return await current_loop.run_in_executor(None, partial(index.query, **arguments))
+
+    def _since_argument(self) -> Optional[str]:
+        """Parse the catalog version held by the client.
+
+        Returns:
+            str or None: The version; None if the whole catalog is requested
+
+        Raises:
+            400 if the version is invalid
+        """
+        since = self.get_query_argument("since", None)
+        if since is not None and not is_version(since):
+            raise tornado.web.HTTPError(400, reason="since must be a catalog version.")
+        return since
+
+    async def _catalog_delta(self, key: str, path: str, since: str) -> Optional[Dict]:
+        """Get the changes of the cached catalog since a version.
+
+        Args:
+            key (str): Catalog cache key
+            path (str): Cached catalog file
+            since (str): Catalog version held by the client
+
+        Returns:
+            Dict or None: {"packages": List[package], "removed": List[str], "version": str,
+                "since": str, "with_description": bool} with the packages added or
+                updated and the names of the packages removed; None if the changes
+                since the version are unknown, e.g. it is the version of another catalog
+        """
+        current_loop = tornado.ioloop.IOLoop.current()
+        try:
+            index = await current_loop.run_in_executor(None, load_index, path)
+        except (OSError, ValueError) as e:
+            self.log.debug("Fail to load the cached available packages: {!s}".format(e))
+            return None
+
+        if index.version is None:
+            return None
+        elif since == index.version:
+            names = []
+        else:
+            updater = PackagesHandler.__updaters.get((AVAILABLE_CACHE, key))
+            names = None if updater is None else updater.changes_since(since, index.version)
+            if names is None:
+                return None
+
+        packages = []
+        removed = []
+        for name in names:
+            package = index.get(name)
+            if package is None:
+                removed.append(name)
+            else:
+                packages.append(package)
+        return {
+            "packages": packages,
+            "removed": removed,
+            "version": index.version,
+            "since": since,
+            "with_description": index.with_description,
+        }
+
+    async def _catalog_updater(self, key: str) -> CatalogUpdater:
+        """Get the incremental updater of a catalog.
+
+        A new updater starts from the cached catalog, if any.
+
+        Args:
+            key (str): Catalog cache key
+
+        Returns:
+            CatalogUpdater: The updater
+        """
+        updater = PackagesHandler.__updaters.get((AVAILABLE_CACHE, key))
+        if updater is None:
+            entry = CatalogCache(AVAILABLE_CACHE).get(key)
+            updater = CatalogUpdater()
+            if entry is not None:
+                current_loop = tornado.ioloop.IOLoop.current()
+                try:
+                    index = await current_loop.run_in_executor(None, load_index, entry.path)
+                except (OSError, ValueError) as e:
+                    self.log.debug("Fail to load the cached available packages: {!s}".format(e))
+                else:
+                    updater = CatalogUpdater(index.packages, index.version)
+            updater = PackagesHandler.__updaters.setdefault((AVAILABLE_CACHE, key), updater)
+        return updater
+
+    async def _search_catalog(
+        self, query: str, limit: Optional[int], names_only: bool
+    ) -> Optional[Dict]:
+        """Search the cached catalog.
+
+        Args:
+            query (str): Search query
+            limit (int or None): Maximal number of packages
+            names_only (bool): Only search the query in the package names
+
+        Returns:
+            Dict or None: The packages found as returned by `CatalogIndex.search`;
+                None if there is no usable cached catalog
+        """
+        key = await self._catalog_key()
+        entry = None if key is None else CatalogCache(AVAILABLE_CACHE).get(key)
+        if entry is None or not entry.usable:
+            return None
+
+        current_loop = tornado.ioloop.IOLoop.current()
+        try:
+            index = await current_loop.run_in_executor(None, load_index, entry.path)
+        except (OSError, ValueError) as e:
+            self.log.info("Fail to index the cached available packages.")
+            self.log.debug(str(e))
+            return None
+        # The search index is built on the first search
+        return await current_loop.run_in_executor(
+            None, index.search, query, limit, names_only
+        )
 
     @tornado.web.authenticated
     async def get(self):
         """`GET /packages` Search for packages.
 
+        The catalog of all available packages is cached per channels,
+        platform and package manager. A cached catalog younger than
+        `GATOR_CATALOG_TTL` is returned as is; an older one is returned while
+        being refreshed in background, unless it is older than
+        `GATOR_CATALOG_MAX_STALE` too. The `Age` header is the age of the
+        returned catalog in seconds.
+
+        The catalog can be filtered, sorted and paginated with the page query
+        arguments; the page is computed from an in-memory index of the cached
+        catalog and returned as `{"packages", "total", "offset",
+        "with_description"}`.
+
+        A client holding a version of the catalog can ask only the changes
+        since that version: `{"packages", "removed", "version", "since",
+        "with_description"}` is returned with the packages added or updated
+        and the names of the packages removed. The versions are opaque tokens
+        specific to a catalog: the whole catalog is returned if the changes
+        are no longer known or if the version is the one of another catalog,
+        e.g. before the channels changed.
+
+        The cached catalog has a strong `ETag`: if it matches the request
+        `If-None-Match` header, 304 is returned without body, even if the
+        changes since a version are requested. Otherwise its
+        precompressed variant matching the `Accept-Encoding` header is sent.
+        It is read by chunks in a thread and sent as it is read, so neither
+        the event loop nor the memory use depend on the catalog size.
+
+        A query is searched in the names, keywords and summaries of the cached
+        catalog packages with an in-memory index, best matches first; the
+        package manager is only called if there is no cached catalog.
+
         Query arguments:
             dependencies: 0 (default) or 1
             query (str): optional string query
+            limit (int): Maximal number of packages found by the query; default all
+            autocomplete: 0 (default) or 1 to only search the query in the names
+            since (str): Version of the catalog held by the client
+
+        Page query arguments:
+            offset (int): Number of packages to skip; default 0
+            limit (int): Maximal number of packages; default all
+            channel (str): Channel of the packages; may be repeated
+            installed_in (str): Environment in which the packages are installed
+            not_installed_in (str): Environment in which the packages are not installed
+            sort (str): "name" (default) or "channel"
+            order (str): "asc" (default) or "desc"
+            q (str): Term contained in the package names
         """
         dependencies = self.get_query_argument("dependencies", 0)
         query = self.get_query_argument("query", "")
+        page = self._page_arguments()
+        since = self._since_argument()
 
         idx = None
         if query:
@@ -395,96 +821,217 @@ class PackagesHandler(EnvBaseHandler):
                 idx = self._stack.put(self.env_manager.pkg_depends, query)
 
             else:  # Specific search
-                idx = self._stack.put(self.env_manager.package_search, query)
+                limit = None if page is None else page["limit"]
+                names_only = bool(int(self.get_query_argument("autocomplete", 0)))
+                answer = await self._search_catalog(query, limit, names_only)
+                if answer is None:
+                    # No catalog to search, ask the package manager
+                    idx = self._stack.put(
+                        self.env_manager.package_search, query, limit, names_only
+                    )
+                else:
+                    self.finish(json.dumps(answer))
 
         else:  # List all available
-            cache_file = os.path.join(tempfile.gettempdir(), AVAILABLE_CACHE + ".json")
-            cache_data = ""
-            try:
-                with open(cache_file) as cache:
-                    cache_data = cache.read()
-            except OSError as e:
+            cache = CatalogCache(AVAILABLE_CACHE)
+            key = await self._catalog_key()
+            current_loop = tornado.ioloop.IOLoop.current()
+            entry = None if key is None else cache.get(key)
+            if entry is not None and not entry.usable:
+                entry = None
+            cache_file = None
+            cache_index = None
+            delta = None
+            encoding = None
+            not_modified = False
+            if entry is None:
                 self.log.info("No available packages list in cache.")
-                self.log.debug(str(e))
+            elif page is not None:
+                try:
+                    cache_index = await current_loop.run_in_executor(None, load_index, entry.path)
+                except (OSError, ValueError) as e:
+                    self.log.info("Fail to index the cached available packages.")
+                    self.log.debug(str(e))
+
+            if entry is not None and page is None:
+                self.set_header("ETag", entry.etag)
+                not_modified = self.check_etag_header()
+                if not not_modified and since is not None:
+                    delta = await self._catalog_delta(key, entry.path, since)
+                if not not_modified and delta is None:
+                    path, encoding = entry.variant(self.request.headers.get("Accept-Encoding"))
+                    try:
+                        cache_file = await current_loop.run_in_executor(None, entry.open, path)
+                    except OSError as e:
+                        self.log.info("Fail to read the cached available packages.")
+                        self.log.debug(str(e))
+                        self.clear_header("ETag")
 
             async def update_available(
-                env_manager: EnvManager, cache_file: str, return_packages: bool = True
+                env_manager: EnvManager,
+                key: Optional[str],
+                return_packages: bool = True,
+                page: Optional[Dict[str, Any]] = None,
             ) -> Dict:
-                answer = await env_manager.list_available()
                 try:
-                    with open(cache_file, "w+") as cache:
-                        json.dump(answer, cache)
-                except (ValueError, OSError) as e:
-                    self.log.info("Fail to cache available packages.")
-                    self.log.debug(str(e))
-                else:
-                    # Change rights to ensure every body can update the cache
-                    os.chmod(
-                        cache_file,
-                        stat.S_IMODE(os.stat(cache_file).st_mode)
-                        | (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH),
-                    )
-                PackagesHandler.__is_listing_available = False
-
-                if return_packages:
-                    return answer
-                else:
+                    updater = None if key is None else await self._catalog_updater(key)
+                    answer = await env_manager.list_available(updater)
+                    if key is not None and "error" not in answer:
+                        try:
+                            await current_loop.run_in_executor(
+                                None, partial(cache.put, key, answer, manager=env_manager.manager)
+                            )
+                        except (ValueError, OSError) as e:
+                            self.log.info("Fail to cache available packages.")
+                            self.log.debug(str(e))
+                finally:
+                    PackagesHandler.__refreshing.discard(key)
+
+                if not return_packages:
                     return {}
-
-            if len(cache_data) > 0:
-                self.log.debug("Loading available packages from cache.")
+                if page is not None and "error" not in answer:
+                    index = await current_loop.run_in_executor(None, CatalogIndex, answer)
+                    answer = await self._query_catalog(index, page)
+                return answer
+
+            if not_modified or any(r is not None for r in (cache_file, cache_index, delta)):
+                self.log.debug(
+                    "Loading available packages from cache ({:.0f} s old).".format(entry.age)
+                )
                 # Request cache update in background
-                if not PackagesHandler.__is_listing_available:
-                    PackagesHandler.__is_listing_available = True
+                if not entry.fresh and key not in PackagesHandler.__refreshing:
+                    PackagesHandler.__refreshing.add(key)
                     self._stack.put(
-                        update_available, self.env_manager, cache_file, False
+                        update_available,
+                        self.env_manager,
+                        key,
+                        False,
+                        priority=Priority.BACKGROUND,
                     )
                 # Return current cache
-                self.set_status(200)
-                self.finish(cache_data)
+                self.set_header("Age", str(int(entry.age)))
+                if cache_index is not None:
+                    answer = await self._query_catalog(cache_index, page)
+                    self.set_status(500 if "error" in answer else 200)
+                    self.finish(json.dumps(answer))
+                else:
+                    # The browser must check the catalog version before using its copy
+                    self.set_header("Cache-Control", "private, no-cache")
+                    self.set_header("Vary", "Accept-Encoding")
+                    if delta is not None:
+                        self.set_status(200)
+                        self.finish(json.dumps(delta))
+                    elif not_modified:
+                        self.set_status(304)
+                        self.finish()
+                    else:
+                        self.set_status(200)
+                        self.set_header("Content-Type", "application/json; charset=UTF-8")
+                        if encoding is not None:
+                            self.set_header("Content-Encoding", encoding)
+                        await self._send_file(cache_file)
             else:
                 # Request cache update and return once updated
-                PackagesHandler.__is_listing_available = True
-                idx = self._stack.put(update_available, self.env_manager, cache_file)
+                PackagesHandler.__refreshing.add(key)
+                idx = self._stack.put(update_available, self.env_manager, key, True, page)
 
         if idx is not None:
             self.redirect_to_task(idx)
 
+    async def _send_file(self, f: BinaryIO):
+        """Send a file as response body and close it.
+
+        Args:
+            f (BinaryIO): File opened for reading
+        """
+        current_loop = tornado.ioloop.IOLoop.current()
+        try:
+            self.set_header("Content-Length", os.fstat(f.fileno()).st_size)
+            while True:
+                chunk = await current_loop.run_in_executor(None, f.read, CATALOG_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.write(chunk)
+                await self.flush()
+        except tornado.iostream.StreamClosedError:
+            self.log.debug("Connection closed while sending the available packages.")
+            return
+        finally:
+            f.close()
+        await self.finish()
+
+
+class StatsHandler(EnvBaseHandler):
+    """Handle the server statistics."""
+
+    @tornado.web.authenticated
+    def get(self):
+        """`GET /stats` Returns the read-only queries cache hits and misses
+        and the memory usage of the tasks results."""
+        stats = {"queries": self.env_manager.query_stats(), "tasks": self._stack.usage()}
+        self.finish(tornado.escape.json_encode(stats))
+
 
 class TaskHandler(EnvBaseHandler):
     """Handler for /tasks/<id>"""
 
     @tornado.web.authenticated
-    def get(self, index: int):
+    async def get(self, index: int):
         """`GET /tasks/<id>` Returns the task `index` status.
 
         Status are:
 
         * 200: Task result is returned
-        * 202: Task is pending
+        * 202: Task is pending; its scheduling statistics are returned
+        * 410: Task was cancelled
         * 500: Task ends with errors
 
+        The result of a finished task can be requested again until it expires
+        (see `GATOR_TASK_RESULT_TTL`).
+
+        Query arguments:
+            wait (float): Time in seconds to wait for the task completion before
+                answering, at most `TASK_WAIT_MAX`; default 0
+
         Args:
             index (int): Task index
 
         Raises:
-            404 if task `index` does not exist
+            400 if the waiting time is invalid
+            404 if task `index` does not exist or its result expired
         """
+        wait = self.get_query_argument("wait", None)
+        if wait is not None:
+            try:
+                wait = float(wait)
+            except ValueError:
+                raise tornado.web.HTTPError(400, reason="wait must be a number.")
+            if not 0 <= wait < float("inf"):
+                raise tornado.web.HTTPError(400, reason="wait must be positive.")
+            try:
+                await self._stack.wait(int(index), min(wait, TASK_WAIT_MAX))
+            except ValueError as err:
+                raise tornado.web.HTTPError(404, reason=str(err))
+
         try:
+            stats = self._stack.stats(int(index))
             r = self._stack.get(int(index))
         except ValueError as err:
             raise tornado.web.HTTPError(404, reason=str(err))
+        except asyncio.CancelledError:
+            raise tornado.web.HTTPError(410, reason="Task {} was cancelled.".format(index))
         else:
             if r is None:
                 self.set_status(202)
-                self.finish("{}")
+                self.finish(json.dumps(stats))
             else:
                 if "error" in r:
                     self.set_status(500)
                     self.log.error("{}".format(r))
                 else:
                     self.set_status(200)
-                self.finish(json.dumps(r))
+                # The available packages are held in a table
+                self.finish(json.dumps(r, default=json_default))
 
     @tornado.web.authenticated
     def delete(self, index: int):
@@ -508,6 +1055,58 @@ class TaskHandler(EnvBaseHandler):
             self.finish()
 
 
+class EventsHandler(EnvBaseHandler):
+    """Handler for /events"""
+
+    _closed = None  # type: Optional[asyncio.Event]
+
+    @tornado.web.authenticated
+    async def get(self):
+        """`GET /events` streams the task events as Server-Sent Events.
+
+        Each task state change is sent as a `task` event whose data is the
+        task scheduling statistics with its index `id`. Once a task is
+        done, its result can be requested with `GET /tasks/<id>`.
+
+        A comment is sent every `EVENTS_KEEPALIVE` seconds to keep the
+        connection open.
+        """
+        self._closed = asyncio.Event()
+        closed = asyncio.ensure_future(self._closed.wait())
+        queue = self._stack.subscribe()
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        # Disable the buffering of the proxies
+        self.set_header("X-Accel-Buffering", "no")
+        try:
+            self.write(": connected\n\n")
+            await self.flush()
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    (getter, closed), timeout=EVENTS_KEEPALIVE, return_when=asyncio.FIRST_COMPLETED
+                )
+                if closed in done:
+                    getter.cancel()
+                    break
+                if getter in done:
+                    self.write("event: task\ndata: {}\n\n".format(json.dumps(getter.result())))
+                else:
+                    getter.cancel()
+                    self.write(": keep-alive\n\n")
+                await self.flush()
+        except tornado.iostream.StreamClosedError:
+            pass
+        finally:
+            closed.cancel()
+            self._stack.unsubscribe(queue)
+        self.log.debug("Task events stream closed.")
+
+    def on_connection_close(self):
+        if self._closed is not None:
+            self._closed.set()
+
+
 # -----------------------------------------------------------------------------
 # URL to handler mappings
 # -----------------------------------------------------------------------------
@@ -519,12 +1118,14 @@ _env_regex = r"(?P<env>[^/&+$?@<>%*-][^/&+$?@<>%*]*)"  # type: str
 
 default_handlers = [
     (r"/channels", ChannelsHandler),
+    (r"/events", EventsHandler),  # GET
     (r"/environments", EnvironmentsHandler),  # GET / POST
     (r"/environments/%s" % _env_regex, EnvironmentHandler),  # GET / PATCH / DELETE
     # PATCH / POST / DELETE
     (r"/environments/%s/packages" % _env_regex, PackagesEnvironmentHandler),
     (r"/environments/%s/packages/preview" % _env_regex, PreviewPackagesEnvironmentHandler),  # PATCH
     (r"/packages", PackagesHandler),  # GET
+    (r"/stats", StatsHandler),  # GET
     (r"/tasks/%s" % r"(?P<index>\d+)", TaskHandler),  # GET / DELETE
 ]
 
@@ -0,0 +1,314 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""Parse the JSON outputs of the package managers.
+
+The package managers may print some text (banners, warnings, progress)
+around their JSON output. `extract_json` finds the JSON documents in such
+an output in a single pass.
+
+The package search commands print hundreds of MB of JSON. Instead of
+holding the whole output and its parsed tree in memory, `JsonRecordStream`
+consumes the output chunk by chunk and hands over each record of the
+arrays of interest as soon as it is complete.
+"""
+import codecs
+import json
+import re
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional whitespaces
+_WS_RE = re.compile(r"[ \t\n\r]*")
+# Start of the document: the first line starting with "{"; package managers
+# may print some text before the JSON output.
+_START_RE = re.compile(r"^[ \t]*\{", re.MULTILINE)
+# Longest JSON token that is not a string ("-Infinity")
+_MAX_TOKEN_LENGTH = 9
+
+
+# Start of a document: "{" or "[" at the start of the output, of a line or
+# after the NUL separating the progress messages of conda. Indented lines
+# are not considered: they are within a document.
+_DOCUMENT_RE = re.compile(r"(?:\A\s*|^|(?<=\x00))[\{\[]", re.MULTILINE)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse a JSON document; orjson is used if it is installed.
+
+    Args:
+        data (bytes or str): JSON document
+
+    Returns:
+        Any: The parsed document
+
+    Raises:
+        ValueError: If the document is invalid
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def extract_json(output: str) -> Any:
+    """Parse the JSON document of a command output.
+
+    The documents starting at the beginning of a line are decoded in a
+    single pass, skipping the text around them. If there are several
+    documents, the last object is returned.
+
+    Args:
+        output (str): Command output
+
+    Returns:
+        Any: The JSON document of the output
+
+    Raises:
+        ValueError: If the output contains no JSON document
+    """
+    if orjson is not None:
+        # Much faster on a clean output, and fails fast on a leading text
+        try:
+            return orjson.loads(output)
+        except orjson.JSONDecodeError:
+            pass
+
+    decoder = json.JSONDecoder()
+    document = None
+    position = 0
+    while True:
+        match = _DOCUMENT_RE.search(output, position)
+        if match is None:
+            break
+        try:
+            value, position = decoder.raw_decode(output, match.end() - 1)
+        except json.JSONDecodeError:
+            position = match.end()
+        else:
+            if document is None or isinstance(value, dict) or not isinstance(document, dict):
+                document = value
+
+    if document is None:
+        raise ValueError("No JSON document found.")
+    return document
+
+
+class _Incomplete(Exception):
+    """More data is needed to go on."""
+
+
+class JsonRecordStream:
+    """Incremental parser yielding the records of a JSON document.
+
+    The records are the items of the arrays found at `path` in the document.
+    A path item is an object key or None to match any key. For example:
+
+    - `("result", "pkgs")` yields the items of `document["result"]["pkgs"]`
+    - `(None,)` yields the items of all the arrays `document[key]`
+
+    The other values (like an error message) are kept in `document`.
+
+    Example:
+
+        stream = JsonRecordStream(("result", "pkgs"))
+        for chunk in chunks:
+            for record in stream.feed(chunk):
+                ...
+        for record in stream.close():
+            ...
+
+    Args:
+        path (Sequence[Optional[str]]): Keys leading to the records arrays
+    """
+
+    def __init__(self, path: Sequence[Optional[str]]):
+        if not path:
+            raise ValueError("The records path cannot be empty.")
+        self._path = tuple(path)
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        # Do not try again to decode an incomplete value until the buffer
+        # has doubled - this keeps the parsing linear for large values.
+        self._retry_size = 0
+        # Stack of the containers being parsed:
+        # [kind ("object" or "records"), depth, object or None, state]
+        # with state in ("key", "value", "next") for objects and
+        # ("item", "next") for records arrays.
+        self._stack = []  # type: List[List[Any]]
+        self._started = False
+        self._done = False
+        self._received = False
+        self.document: Dict[str, Any] = {}
+        self.count = 0  # type: int
+
+    @property
+    def done(self) -> bool:
+        """Whether the whole document has been parsed."""
+        return self._done
+
+    def feed(self, data: Union[bytes, str]) -> List[Any]:
+        """Parse a chunk of the document.
+
+        Args:
+            data (bytes or str): Next chunk of the document; bytes are decoded as UTF-8
+
+        Returns:
+            List[Any]: The records completed by this chunk
+
+        Raises:
+            ValueError: If the document is invalid
+        """
+        if isinstance(data, bytes):
+            data = self._text_decoder.decode(data)
+        if not data or self._done:
+            return []
+
+        if not self._received:
+            self._received = bool(data.strip())
+        self._buffer = self._buffer[self._pos :] + data
+        self._pos = 0
+        if len(self._buffer) < self._retry_size:
+            return []
+
+        return self._parse()
+
+    def close(self) -> List[Any]:
+        """Parse the end of the document.
+
+        Returns:
+            List[Any]: The last records
+
+        Raises:
+            ValueError: If the document is invalid or truncated
+        """
+        records = self.feed(self._text_decoder.decode(b"", final=True))
+        if self._retry_size:
+            self._retry_size = 0
+            records.extend(self._parse())
+        if not self._done and (self._started or self._received):
+            raise ValueError("Truncated or invalid JSON document.")
+        self._done = True
+        self._buffer = ""
+        self._pos = 0
+        return records
+
+    def _parse(self) -> List[Any]:
+        records = []  # type: List[Any]
+        try:
+            if not self._started:
+                self._find_start()
+            while self._stack:
+                position = self._pos
+                try:
+                    self._step(records)
+                except _Incomplete:
+                    # Steps are applied as a whole
+                    self._pos = position
+                    raise
+        except _Incomplete:
+            self._retry_size = 2 * (len(self._buffer) - self._pos)
+        else:
+            self._retry_size = 0
+            self._done = True
+        self.count += len(records)
+        return records
+
+    def _find_start(self):
+        match = _START_RE.search(self._buffer, self._pos)
+        if match is None:
+            # Only keep the last line which may be the start of the document
+            self._pos = max(self._pos, self._buffer.rfind("\n") + 1)
+            raise _Incomplete()
+        self._pos = match.end()
+        self._started = True
+        self._stack.append(["object", 0, self.document, "key"])
+
+    def _skip_ws(self) -> str:
+        self._pos = _WS_RE.match(self._buffer, self._pos).end()
+        if self._pos >= len(self._buffer):
+            raise _Incomplete()
+        return self._buffer[self._pos]
+
+    def _decode(self) -> Any:
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError as err:
+            # The value may be cut by the end of the chunk (e.g. within a
+            # string or a literal like "tru"); if the document is really
+            # invalid, the error is raised once the next chunk arrives.
+            if err.msg.startswith("Unterminated string") or (
+                len(self._buffer) - err.pos <= _MAX_TOKEN_LENGTH
+            ):
+                raise _Incomplete() from err
+            raise ValueError(str(err)) from err
+        if end >= len(self._buffer) and not isinstance(value, (dict, list, str)):
+            # A number may continue in the next chunk
+            raise _Incomplete()
+        self._pos = end
+        return value
+
+    def _step(self, records: List[Any]):
+        frame = self._stack[-1]
+        kind, depth, obj, state = frame[:4]
+        char = self._skip_ws()
+
+        if kind == "records":
+            if state == "item" and char != "]":
+                records.append(self._decode())
+                frame[3] = "next"
+            elif state == "next" and char == ",":
+                self._pos += 1
+                frame[3] = "item"
+            elif char == "]":
+                self._pos += 1
+                self._stack.pop()
+            else:
+                raise ValueError(self._error("',' or ']'"))
+
+        elif state == "key":
+            if char == "}":
+                self._pos += 1
+                self._stack.pop()
+                return
+            if char != '"':
+                raise ValueError(self._error("an object key"))
+            key = self._decode()
+            if self._skip_ws() != ":":
+                raise ValueError(self._error("':'"))
+            self._pos += 1
+            frame[3] = "value"
+            frame.append(key)
+
+        elif state == "value":
+            key = frame[4]
+            opening = "[" if depth + 1 == len(self._path) else "{"
+            if self._path[depth] in (None, key) and char == opening:
+                self._pos += 1
+                if opening == "[":
+                    self._stack.append(["records", depth + 1, None, "item"])
+                else:
+                    child = obj.setdefault(key, {})
+                    self._stack.append(["object", depth + 1, child, "key"])
+            else:
+                obj[key] = self._decode()
+            del frame[4]
+            frame[3] = "next"
+
+        else:  # next
+            if char == ",":
+                frame[3] = "key"
+            elif char == "}":
+                self._stack.pop()
+            else:
+                raise ValueError(self._error("',' or '}'"))
+            self._pos += 1
+
+    def _error(self, expected: str) -> str:
+        return "Expecting {} near {!r}".format(
+            expected, self._buffer[self._pos : self._pos + 20]
+        )
@@ -0,0 +1,213 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""Build the available packages catalog from the local repodata cache.
+
+conda and mamba keep the `repodata.json` of each channel subdirectory in
+`<pkgs dir>/cache/<hash>.json` with a state sidecar (`<hash>.info.json` for
+conda, `<hash>.state.json` for mamba) recording the size and modification
+time of the cached file and when it was last checked against the channel. Reading those files is much faster than running the
+package manager search command, which loads and serializes them again.
+
+If a channel subdirectory is not cached, or its cache was not refreshed for
+more than `REPODATA_MAX_AGE` seconds, None is returned and the caller must
+ask the package manager - which refreshes the cache.
+"""
+import functools
+import hashlib
+import os
+import time
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from .catalog import CatalogBuilder
+from .jsonstream import loads
+from .log import get_logger
+
+# Maximal age (in seconds) of the cached repodata used to build the catalog; 0 to
+# always ask the package manager
+REPODATA_MAX_AGE = float(os.environ.get("GATOR_REPODATA_MAX_AGE", "3600"))  # type: float
+
+# State sidecars of conda and mamba
+_STATE_SUFFIXES = (".info.json", ".state.json")
+
+# Packages keys of the repodata, the first build found of a version is kept
+_PACKAGES_KEYS = ("packages.conda", "packages")
+
+
+class RepodataFile(NamedTuple):
+    """Cached repodata of a channel subdirectory."""
+
+    url: str  # Channel subdirectory URL
+    path: str  # repodata.json cache file
+    mtime_ns: int
+    size: int
+    refreshed: float  # Time at which the cache was last checked against the channel
+
+
+def cache_name(url: str) -> str:
+    """Name of the repodata cache file of a channel subdirectory.
+
+    This is the conda (and mamba) naming: the first 8 hexadecimal digits of the
+    MD5 hash of the URL ending with a slash.
+
+    Args:
+        url (str): Channel subdirectory URL
+
+    Returns:
+        str: The cache file name
+    """
+    if not url.endswith("/"):
+        url += "/"
+    return hashlib.md5(url.encode("utf-8")).hexdigest()[:8] + ".json"
+
+
+def _same_url(cached: Any, url: str) -> bool:
+    if not isinstance(cached, str):
+        return False
+    for suffix in (".zst", "repodata.json", "/"):
+        if cached.endswith(suffix):
+            cached = cached[: -len(suffix)]
+    return cached == url.rstrip("/")
+
+
+def _load_state(path: str) -> Optional[Dict[str, Any]]:
+    for suffix in _STATE_SUFFIXES:
+        try:
+            with open(path[: -len(".json")] + suffix, "rb") as f:
+                state = loads(f.read())
+        except FileNotFoundError:
+            continue
+        except (OSError, ValueError) as err:
+            get_logger().debug("Invalid repodata state of {}: {!s}".format(path, err))
+            return None
+        return state if isinstance(state, dict) else None
+    return None
+
+
+def _state_stat(state: Dict[str, Any]) -> Tuple[Any, Any, Optional[int]]:
+    # conda records the modification time in nanoseconds and the refresh time
+    if "file_mtime" not in state:
+        return state.get("mtime_ns"), state.get("size"), state.get("refresh_ns")
+
+    # libmamba records {"seconds": ..., "nanoseconds": ...} and touches the
+    # cached file when it checks it against the channel.
+    mtime = state["file_mtime"]
+    try:
+        mtime_ns = int(mtime["seconds"]) * 1_000_000_000 + int(mtime["nanoseconds"])
+    except (KeyError, TypeError, ValueError):
+        mtime_ns = None
+    return mtime_ns, state.get("file_size"), None
+
+
+def find_repodata(pkgs_dirs: Iterable[str], url: str) -> Optional[RepodataFile]:
+    """Find the valid cached repodata of a channel subdirectory.
+
+    Args:
+        pkgs_dirs (Iterable[str]): Packages cache folders
+        url (str): Channel subdirectory URL
+
+    Returns:
+        RepodataFile or None: None if the subdirectory is not cached or if its
+            cache does not match its state
+    """
+    name = cache_name(url)
+    for pkgs_dir in pkgs_dirs:
+        path = os.path.join(pkgs_dir, "cache", name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+
+        state = _load_state(path)
+        if state is None:
+            # Legacy cache without state; the URL is stored in the repodata
+            # and it is checked when the file is read.
+            return RepodataFile(url, path, st.st_mtime_ns, st.st_size, st.st_mtime)
+
+        if not _same_url(state.get("url"), url):
+            get_logger().debug("Repodata cache {} is not the one of {}.".format(path, url))
+            return None
+        mtime_ns, size, refresh_ns = _state_stat(state)
+        # The repodata was replaced without updating its state
+        if mtime_ns != st.st_mtime_ns or size != st.st_size:
+            get_logger().debug("Repodata cache {} does not match its state.".format(path))
+            return None
+        refresh_ns = refresh_ns or st.st_mtime_ns
+        return RepodataFile(url, path, st.st_mtime_ns, st.st_size, refresh_ns / 1e9)
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def _build(files: Tuple[RepodataFile, ...]) -> CatalogBuilder:
+    # The files are identified by their modification time and size: the
+    # catalog is built again only if one of them changes.
+    catalog = CatalogBuilder()
+    for repodata in files:
+        with open(repodata.path, "rb") as f:
+            data = loads(f.read())
+        if "_url" in data and not _same_url(data["_url"], repodata.url):
+            raise ValueError("{} is not the repodata of {}".format(repodata.path, repodata.url))
+
+        channel = repodata.url.rstrip("/")
+        for key in _PACKAGES_KEYS:
+            for record in (data.get(key) or {}).values():
+                name = record.get("name")
+                if name is not None:
+                    record["channel"] = channel
+                    catalog.add(record, name)
+        # Only one repodata document is held at a time
+        del data
+    return catalog
+
+
+def read_catalog(
+    pkgs_dirs: Iterable[str],
+    channels: Iterable[str],
+    subdirs: Iterable[str],
+    max_age: Optional[float] = None,
+) -> Optional[CatalogBuilder]:
+    """Build the available packages catalog from the repodata cache.
+
+    The builder is shared by the calls as long as the cache files do not
+    change; it must not be modified.
+
+    Args:
+        pkgs_dirs (Iterable[str]): Packages cache folders, as listed by `conda info`
+        channels (Iterable[str]): Channels URI by priority
+        subdirs (Iterable[str]): Platform subdirectories (e.g. "linux-64", "noarch")
+        max_age (float or None): Maximal age in seconds of the cached repodata;
+            default to `REPODATA_MAX_AGE`
+
+    Returns:
+        CatalogBuilder or None: The builder holding the cached package records;
+            None if the catalog cannot be built from the cache.
+    """
+    max_age = REPODATA_MAX_AGE if max_age is None else max_age
+    if max_age <= 0:
+        return None
+
+    pkgs_dirs = list(pkgs_dirs)
+    subdirs = list(subdirs)
+    files = []
+    now = time.time()
+    for channel in channels:
+        for subdir in subdirs:
+            url = "/".join((channel.rstrip("/"), subdir))
+            repodata = find_repodata(pkgs_dirs, url)
+            if repodata is None:
+                get_logger().debug("No valid repodata cache for {}.".format(url))
+                return None
+            if now - repodata.refreshed > max_age:
+                get_logger().debug("Repodata cache of {} is outdated.".format(url))
+                return None
+            files.append(repodata._replace(refreshed=0.0))
+
+    if not files:
+        return None
+
+    try:
+        catalog = _build(tuple(files))
+    except (OSError, ValueError, AttributeError, TypeError) as err:
+        get_logger().debug("Unable to read the repodata cache: {!s}".format(err))
+        return None
+    get_logger().debug("Catalog read from {} repodata cache files.".format(len(files)))
+    return catalog
@@ -0,0 +1,216 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+import asyncio
+import contextlib
+import contextvars
+import enum
+import itertools
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from .log import get_logger
+
+# Maximal number of conda processes executed at once
+MAX_PROCESSES = max(1, int(os.environ.get("GATOR_MAX_PROCESSES", "4")))  # type: int
+# Number of those processes reserved to the quick read-only commands
+RESERVED_PROCESSES = max(0, int(os.environ.get("GATOR_RESERVED_PROCESSES", "1")))  # type: int
+
+
+class Priority(enum.IntEnum):
+    """Task priority; lower values are executed first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class TaskStats:
+    """Scheduling statistics of a task."""
+
+    def __init__(self, priority: Priority = Priority.INTERACTIVE):
+        """
+        Args:
+            priority (Priority): Task priority
+        """
+        self.priority = priority
+        self.created = time.monotonic()
+        # Called with the statistics when the task state changes
+        self.on_change: Optional[Callable[[TaskStats], None]] = None
+        self._state = "pending"
+        self.queue_depth = 0
+        self.wait_time = 0.0
+        self.processes = 0
+
+    @property
+    def state(self) -> str:
+        """str: pending, locked, queued, running or done"""
+        return self._state
+
+    @state.setter
+    def state(self, value: str):
+        changed = value != self._state
+        self._state = value
+        if changed and self.on_change is not None:
+            self.on_change(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Statistics as a JSON-able dictionary."""
+        return {
+            "state": self.state,
+            "priority": self.priority.name.lower(),
+            "queue_depth": self.queue_depth,
+            "wait_time": round(self.wait_time, 3),
+            "processes": self.processes,
+            "elapsed": round(time.monotonic() - self.created, 3),
+        }
+
+
+# Statistics of the task being executed in the current context
+current_task: contextvars.ContextVar[Optional[TaskStats]] = contextvars.ContextVar(
+    "current_task", default=None
+)
+
+
+class Scheduler:
+    """Schedule the conda commands.
+
+    * At most `max_processes` commands are executed at once; the others
+      wait in a queue ordered by priority then by arrival.
+    * `reserved` of those slots are kept for the quick commands (e.g.
+      listings), so that long commands (e.g. installations) do not block
+      the interactive queries; long commands always get at least one slot.
+    * Tasks modifying the same environment are executed one at a time;
+      tasks modifying different environments run in parallel.
+    """
+
+    def __init__(self, max_processes: int = MAX_PROCESSES, reserved: int = RESERVED_PROCESSES):
+        """
+        Args:
+            max_processes (int): Maximal number of commands executed at once
+            reserved (int): Number of slots reserved to the quick commands
+        """
+        self.max_processes = max_processes
+        self.reserved = max(0, min(reserved, max_processes - 1))
+        self._running = 0
+        self._waiters: List[list] = []  # [priority, order, future, quick]
+        self._order = itertools.count()
+        self._env_locks: Dict[str, asyncio.Lock] = {}
+        self._env_users: Dict[str, int] = {}
+
+    @property
+    def running(self) -> int:
+        """int: Number of commands being executed."""
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        """int: Number of commands waiting for execution."""
+        return len(self._waiters)
+
+    def _release(self):
+        self._running -= 1
+        self._wake()
+
+    def _wake(self):
+        # Hand the free slots over to the first waiters allowed to take them
+        for entry in sorted(self._waiters):
+            if self._running >= self.max_processes:
+                break
+            limit = self.max_processes if entry[3] else self.max_processes - self.reserved
+            if self._running < limit:
+                self._waiters.remove(entry)
+                self._running += 1
+                entry[2].set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def process_slot(self, quick: bool = False) -> AsyncIterator[None]:
+        """Wait for the right to execute a command.
+
+        The priority is the one of the current task or Priority.INTERACTIVE
+        outside of a task.
+
+        Args:
+            quick (bool): Whether the command is a quick read-only one that
+                may use the reserved slots
+        """
+        stats = current_task.get()
+        priority = Priority.INTERACTIVE if stats is None else stats.priority
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self._order), future, quick]
+        self._waiters.append(entry)
+        self._wake()
+        if not future.done():
+            start = time.monotonic()
+            if stats is not None:
+                stats.state = "queued"
+                stats.queue_depth = sum(1 for other in self._waiters if other < entry)
+            get_logger().debug(
+                "Command queued ({} running, {} queued).".format(
+                    self._running, len(self._waiters)
+                )
+            )
+            try:
+                await entry[2]
+            except asyncio.CancelledError:
+                if entry[2].done() and not entry[2].cancelled():
+                    self._release()  # Slot already handed over
+                else:
+                    self._waiters.remove(entry)
+                raise
+            finally:
+                if stats is not None:
+                    stats.wait_time += time.monotonic() - start
+                    stats.queue_depth = 0
+
+        if stats is not None:
+            stats.state = "running"
+            stats.processes += 1
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextlib.asynccontextmanager
+    async def env_lock(self, env: str) -> AsyncIterator[None]:
+        """Wait for the exclusive right to modify an environment.
+
+        Args:
+            env (str): Environment name
+        """
+        stats = current_task.get()
+        lock = self._env_locks.setdefault(env, asyncio.Lock())
+        self._env_users[env] = self._env_users.get(env, 0) + 1
+        try:
+            if lock.locked():
+                start = time.monotonic()
+                if stats is not None:
+                    stats.state = "locked"
+                get_logger().debug("Waiting for environment '{}' lock.".format(env))
+                try:
+                    await lock.acquire()
+                finally:
+                    if stats is not None:
+                        stats.wait_time += time.monotonic() - start
+            else:
+                await lock.acquire()
+            try:
+                yield
+            finally:
+                lock.release()
+        finally:
+            self._env_users[env] -= 1
+            if self._env_users[env] == 0:
+                del self._env_users[env]
+                del self._env_locks[env]
+
+
+_scheduler: Optional[Scheduler] = None
+
+
+def get_scheduler() -> Scheduler:
+    """Get the scheduler shared by all commands."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
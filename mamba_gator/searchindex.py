@@ -0,0 +1,168 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""In-memory search index of the available packages catalog.
+
+Packages are searched by name, keywords and summary without calling the
+package manager:
+
+- the name prefixes are looked up by bisection in the sorted names - a
+  flat prefix tree, much lighter than a tree of dictionaries;
+- the other substrings are looked up with trigram posting lists; the
+  packages containing all the trigrams of the query are then checked.
+"""
+import bisect
+import collections
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .catalogtable import CatalogTable
+
+# Length of the indexed substrings
+_GRAM = 3
+
+# Ranks of the matches, best first
+_EXACT_NAME = 0
+_NAME_PREFIX = 1
+_NAME = 2
+_KEYWORD = 3
+_SUMMARY = 4
+
+
+def _as_text(value: Any) -> str:
+    if not value:
+        return ""
+    if isinstance(value, str):
+        return value
+    return " ".join(map(str, value))
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + _GRAM] for i in range(len(text) - _GRAM + 1)}
+
+
+class SearchIndex:
+    """Search index of packages.
+
+    Args:
+        packages (List[Dict] or CatalogTable): Catalog entries with at least a `name`
+    """
+
+    def __init__(self, packages: Union[List[Dict[str, Any]], CatalogTable]):
+        self._packages = packages
+        if isinstance(packages, CatalogTable):
+            # Read the columns without formatting the entries
+            names = packages.names
+            keywords = zip(packages.column("keywords"), packages.column("tags"))
+            summaries = packages.column("summary")
+        else:
+            names = [p["name"] for p in packages]
+            keywords = ((p.get("keywords"), p.get("tags")) for p in packages)
+            summaries = [p.get("summary") for p in packages]
+        self._names = [name.lower() for name in names]
+        self._keywords = [
+            " ".join((_as_text(words), _as_text(tags))).lower() for words, tags in keywords
+        ]
+        self._summaries = [_as_text(summary).lower() for summary in summaries]
+        # Sorted (name, position) for the prefix lookups
+        self._sorted = sorted(zip(self._names, range(len(packages))))
+        # Positions of the packages per trigram, in ascending order
+        postings = collections.defaultdict(list)  # type: Dict[str, List[int]]
+        for i, fields in enumerate(zip(self._names, self._keywords, self._summaries)):
+            for gram in _trigrams("\n".join(fields)):
+                postings[gram].append(i)
+        self._postings = dict(postings)
+
+    def __len__(self) -> int:
+        return len(self._packages)
+
+    def search(
+        self, q: str, limit: Optional[int] = None, names_only: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Search packages.
+
+        All the words of the query must be found in the name, the keywords
+        or the summary of a package. The packages are ranked by: exact name,
+        name starting with the query, name containing it, keywords containing
+        the words, others; then by name length and name.
+
+        Args:
+            q (str): Query - case insensitive
+            limit (int or None): Maximal number of packages; default to all
+            names_only (bool): Only search the names, e.g. for autocompletion
+
+        Returns:
+            List[Dict]: The matching packages, best first
+        """
+        terms = q.lower().split()
+        if not terms or (limit is not None and limit <= 0):
+            return []
+        query = " ".join(terms)
+
+        ranked: List[Tuple[int, int, str, int]] = []
+        seen = set()  # type: Set[int]
+        # The ranks are computed from the best to the worst, only as long as
+        # the number of matches is below the limit - no match found later
+        # could be better.
+        for i in self._prefixed(query):
+            seen.add(i)
+            rank = _EXACT_NAME if self._names[i] == query else _NAME_PREFIX
+            ranked.append((rank, len(self._names[i]), self._names[i], i))
+
+        if limit is None or len(ranked) < limit:
+            candidates = [i for i in self._candidates(terms) if i not in seen]
+            for i in candidates:
+                if query in self._names[i]:
+                    seen.add(i)
+                    ranked.append((_NAME, len(self._names[i]), self._names[i], i))
+
+            if not names_only and (limit is None or len(ranked) < limit):
+                for i in candidates:
+                    if i in seen:
+                        continue
+                    rank = self._rank(i, terms)
+                    if rank is not None:
+                        ranked.append((rank, len(self._names[i]), self._names[i], i))
+
+        best = sorted(ranked) if limit is None else heapq.nsmallest(limit, ranked)
+        return [self._packages[entry[3]] for entry in best]
+
+    def _prefixed(self, prefix: str) -> Iterable[int]:
+        position = bisect.bisect_left(self._sorted, (prefix,))
+        while position < len(self._sorted):
+            name, i = self._sorted[position]
+            if not name.startswith(prefix):
+                break
+            yield i
+            position += 1
+
+    def _candidates(self, terms: List[str]) -> Iterable[int]:
+        grams = set()  # type: Set[str]
+        for term in terms:
+            grams.update(_trigrams(term))
+        if not grams:
+            # Terms too short to be indexed
+            return range(len(self._packages))
+
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return ()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(candidates)
+
+    def _rank(self, i: int, terms: List[str]) -> Optional[int]:
+        name = self._names[i]
+        keywords = self._keywords[i]
+        if all(t in name or t in keywords for t in terms):
+            return _KEYWORD
+        summary = self._summaries[i]
+        if all(t in name or t in keywords or t in summary for t in terms):
+            return _SUMMARY
+        return None
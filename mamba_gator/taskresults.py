@@ -0,0 +1,180 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""Bounded store of the finished tasks results.
+
+A task result can be read as many times as needed - e.g. by a retried poll
+or by another browser tab - until it expires. The store holds at most
+`TASK_RESULTS_MAX` results: the least recently read one is evicted first.
+
+The results are held by reference, not copied: a catalog returned by a task
+is shared with the catalog updater. Their size is estimated once, when they
+are stored, to report the memory used by the store.
+"""
+import collections
+import itertools
+import os
+import sys
+import time
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+
+from .log import get_logger
+
+# Time (in seconds) during which a finished task result can be read
+TASK_RESULT_TTL = float(os.environ.get("GATOR_TASK_RESULT_TTL", "600"))  # type: float
+# Maximal number of finished task results kept
+TASK_RESULTS_MAX = max(1, int(os.environ.get("GATOR_TASK_RESULTS_MAX", "64")))  # type: int
+
+# Number of items of a sequence or mapping measured to estimate its size
+_SIZE_SAMPLE = 64
+
+
+class _Entry(NamedTuple):
+    value: Any
+    expires: float
+    size: int
+
+
+def estimate_size(value: Any) -> int:
+    """Estimate the memory used by a task result.
+
+    Objects with a `nbytes` attribute (e.g. `CatalogTable`) report their own
+    size; the size of the large sequences and mappings is extrapolated from
+    their first items.
+
+    Args:
+        value (Any): Task result
+
+    Returns:
+        int: The estimated size in bytes
+    """
+    seen = set()
+
+    def measure(obj: Any) -> int:
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        nbytes = getattr(obj, "nbytes", None)
+        if isinstance(nbytes, int):
+            return nbytes
+        size = sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            sample = itertools.islice(obj.items(), _SIZE_SAMPLE)
+            items = [measure(k) + measure(v) for k, v in sample]
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            items = [measure(item) for item in itertools.islice(obj, _SIZE_SAMPLE)]
+        else:
+            return size
+        if items:
+            size += sum(items) * len(obj) // len(items)
+        return size
+
+    return measure(value)
+
+
+class TaskResults:
+    """Results of the finished tasks with a time to live.
+
+    Args:
+        ttl (float or None): Time in seconds during which a result can be read;
+            default to `TASK_RESULT_TTL`
+        max_entries (int or None): Maximal number of results; default to
+            `TASK_RESULTS_MAX`
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = TASK_RESULT_TTL if ttl is None else ttl
+        self.max_entries = TASK_RESULTS_MAX if max_entries is None else max(1, max_entries)
+        self.expired = 0
+        self.evicted = 0
+        self._entries = collections.OrderedDict()  # type: collections.OrderedDict
+        self._size = 0
+
+    def __len__(self) -> int:
+        self._purge()
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        self._purge()
+        return key in self._entries
+
+    @property
+    def nbytes(self) -> int:
+        """Estimated size in bytes of the results held."""
+        self._purge()
+        return self._size
+
+    def put(self, key: Hashable, value: Any):
+        """Store a result.
+
+        Args:
+            key (Hashable): Result key, e.g. the task index
+            value (Any): Result; it is stored by reference and must not be modified
+        """
+        self.discard(key)
+        size = estimate_size(value)
+        self._entries[key] = _Entry(value, time.monotonic() + self.ttl, size)
+        self._size += size
+        self._purge()
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evicted += 1
+        get_logger().debug(
+            "Result {} stored ({} bytes); {} results held ({} bytes).".format(
+                key, size, len(self._entries), self._size
+            )
+        )
+
+    def get(self, key: Hashable) -> Any:
+        """Get a result; it can be read again until it expires.
+
+        Args:
+            key (Hashable): Result key
+
+        Returns:
+            Any: The result
+
+        Raises:
+            KeyError: If there is no such result or if it expired.
+        """
+        self._purge()
+        entry = self._entries[key]
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def discard(self, key: Hashable):
+        """Remove a result if it is stored.
+
+        Args:
+            key (Hashable): Result key
+        """
+        if key in self._entries:
+            self._remove(key)
+
+    def usage(self) -> Dict[str, Any]:
+        """Memory usage of the store.
+
+        Returns:
+            Dict: Number of results, their estimated size in bytes, the limits
+                and the number of results expired and evicted so far
+        """
+        self._purge()
+        return {
+            "entries": len(self._entries),
+            "bytes": self._size,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+
+    def _purge(self):
+        # The entries are ordered by last read, not by expiration: all are
+        # checked, which is cheap as their number is bounded.
+        now = time.monotonic()
+        for key in [k for k, entry in self._entries.items() if entry.expires <= now]:
+            self._remove(key)
+            self.expired += 1
@@ -0,0 +1,188 @@
+"""Benchmark the available packages catalog processing.
+
+Usage: python -m mamba_gator.tests.benchmark_catalog [number of records]
+       python -m mamba_gator.tests.benchmark_catalog memory [number of records]
+       python -m mamba_gator.tests.benchmark_catalog json
+       python -m mamba_gator.tests.benchmark_catalog table [number of records]
+
+A synthetic `mamba repoquery search "*" --json` payload is generated: a few
+packages (like python or numpy) have thousands of builds spread over many
+versions and subdirs, most packages have a handful of builds.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from packaging.version import Version
+
+from mamba_gator import versions
+from mamba_gator.catalog import CatalogBuilder, format_packages, group_repoquery_output
+from mamba_gator.catalogtable import CatalogTable
+from mamba_gator.envmanager import EnvManager
+from mamba_gator.jsonstream import JsonRecordStream, extract_json
+from mamba_gator.tests.utils import make_payload
+
+def timeit(label, f, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = f(*args)
+        best = min(best, time.perf_counter() - start)
+    print("{:<32} {:8.3f} s".format(label, best))
+    return result
+
+
+def clear_version_caches():
+    for f in (versions.parse_version, versions.version_key, versions.normalize_version):
+        f.cache_clear()
+
+
+def parse_all(parse, strings):
+    return [parse(v) for v in strings]
+
+
+def bench_versions(payload):
+    strings = [r["version"] for r in payload["result"]["pkgs"]]
+    print("{} version strings, {} distinct".format(len(strings), len(set(strings))))
+
+    def uncached(v):
+        return versions.parse_version.__wrapped__(v)
+
+    timeit("parse_version (no memo)", parse_all, uncached, strings, repeat=1)
+    clear_version_caches()
+    timeit("parse_version (cold memo)", parse_all, versions.parse_version, strings, repeat=1)
+    timeit("parse_version (warm memo)", parse_all, versions.parse_version, strings)
+
+    parsed = [versions.parse_version(v) or Version("0") for v in strings]
+    keys = [versions.version_key(v) or () for v in strings]
+    timeit("sort Version objects", sorted, parsed)
+    timeit("sort version keys", sorted, keys)
+
+
+async def read_catalog(mode, path):
+    """Read the catalog from the command output as `list_available` does."""
+    manager = EnvManager("", None)
+    code = "import shutil, sys; shutil.copyfileobj(open(sys.argv[1], 'rb'), sys.stdout.buffer)"
+    command = (sys.executable, "-c", code, path)
+    if mode == "buffered":
+        _, output = await manager._execute(*command)
+        data = manager._clean_conda_json(output)
+        del output
+        packages = format_packages(group_repoquery_output(data))
+    else:
+        stream = JsonRecordStream(("result", "pkgs"))
+        catalog = CatalogBuilder()
+
+        def consume(chunk):
+            for record in stream.feed(chunk):
+                catalog.add(record)
+
+        await manager._execute(*command, on_output=consume)
+        for record in stream.close():
+            catalog.add(record)
+        packages = catalog.packages()
+    return len(packages)
+
+
+def bench_json():
+    for n_records in (1000, 20_000, 200_000):
+        clean = json.dumps(make_payload(n_records), indent=2)
+        noisy = "Loading channels: done\nWARNING: conda is outdated\n{}\nDone\n".format(clean)
+        for label, output in (("clean", clean), ("noisy", noisy)):
+            timeit(
+                "extract_json {:.0f} MB {}".format(len(output) / 1e6, label),
+                extract_json,
+                output,
+            )
+
+
+def peak_rss():
+    """Peak resident set size of the process in MiB."""
+    # ru_maxrss is inherited from the parent process: prefer the VmHWM value
+    # of Linux that is reset when the process is executed.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Unix only
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_memory(n_records=500_000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "repoquery.json")
+        with open(path, "w") as f:
+            json.dump(make_payload(n_records), f)
+        print("{} records, {:.0f} MB of JSON".format(n_records, os.path.getsize(path) / 1e6))
+        for mode in ("buffered", "streamed"):
+            subprocess.run(
+                [sys.executable, "-m", "mamba_gator.tests.benchmark_catalog", "_read", mode, path],
+                check=True,
+            )
+
+
+def bench_table(n_records=500_000):
+    packages = format_packages(group_repoquery_output(make_payload(n_records)))
+    # The cached catalog is parsed: its strings are not shared
+    body = json.dumps({"packages": packages})
+    del packages
+    print("{} records, {:.0f} MB catalog".format(n_records, len(body) / 1e6))
+
+    tracemalloc.start()
+    packages = json.loads(body)["packages"]
+    as_list = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    table = CatalogTable(packages)
+    elapsed = time.perf_counter() - start
+    del packages
+    as_table = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("{:<32} {:8.0f} MiB".format("list of entries", as_list / 2**20))
+    print("{:<32} {:8.0f} MiB".format("catalog table", as_table / 2**20))
+    print("{:<32} {:8.3f} s (traced)".format("build table", elapsed))
+    timeit("format all entries", list, table)
+
+
+def main(n_records=500_000):
+    payload = make_payload(n_records)
+    print(
+        "{} records, {} packages, {:.0f} MB of JSON".format(
+            n_records,
+            len({r["name"] for r in payload["result"]["pkgs"]}),
+            len(json.dumps(payload)) / 1e6,
+        )
+    )
+    bench_versions(payload)
+    grouped = timeit("group_repoquery_output", group_repoquery_output, payload)
+    clear_version_caches()
+    timeit("format_packages", format_packages, grouped)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["_read"]:
+        start = time.perf_counter()
+        n_packages = asyncio.run(read_catalog(*sys.argv[2:]))
+        peak = peak_rss()
+        print(
+            "{:<10} {} packages  {:6.2f} s  peak RSS {:6.0f} MiB".format(
+                sys.argv[2], n_packages, time.perf_counter() - start, peak
+            )
+        )
+    elif sys.argv[1:2] == ["memory"]:
+        bench_memory(*map(int, sys.argv[2:]))
+    elif sys.argv[1:2] == ["json"]:
+        bench_json()
+    elif sys.argv[1:2] == ["table"]:
+        bench_table(*map(int, sys.argv[2:]))
+    else:
+        main(*map(int, sys.argv[1:]))
@@ -0,0 +1,75 @@
+"""Benchmark the execution of concurrent conda commands.
+
+Usage: python -m mamba_gator.tests.benchmark_execute [number of commands...]
+
+N commands sleeping 2 seconds are executed at once by `EnvManager._execute`,
+either with asynchronous subprocesses or with the blocking pipes read in the
+default executor (the fallback for loops without subprocess support). While
+they run, the latency of a trivial job submitted to the default executor -
+as the server does to read files or build the catalog - is measured.
+
+The default executor is limited to 5 threads, its size on a single CPU.
+"""
+import asyncio
+import concurrent.futures
+import sys
+import time
+from unittest import mock
+
+from mamba_gator.envmanager import EnvManager
+from mamba_gator.scheduler import Scheduler
+
+# Duration in seconds of each command
+COMMAND_DURATION = 2.0
+# Delay in seconds after which the executor latency is measured
+PROBE_DELAY = 0.5
+
+
+async def run(mode, n_commands):
+    """Execute the commands; returns (executor latency, total time) in seconds."""
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(max_workers=5))
+    manager = EnvManager("", None)
+    command = (sys.executable, "-c", "import time; time.sleep({})".format(COMMAND_DURATION))
+
+    patches = [mock.patch("mamba_gator.scheduler._scheduler", Scheduler(n_commands))]
+    if mode == "executor":
+        patches.append(
+            mock.patch(
+                "mamba_gator.envmanager.asyncio.create_subprocess_exec",
+                side_effect=NotImplementedError,
+            )
+        )
+    for patch in patches:
+        patch.start()
+    try:
+        start = time.perf_counter()
+        commands = asyncio.gather(*(manager._execute(*command) for _ in range(n_commands)))
+        await asyncio.sleep(PROBE_DELAY)
+        probe = time.perf_counter()
+        await loop.run_in_executor(None, lambda: None)
+        latency = time.perf_counter() - probe
+        await commands
+        return latency, time.perf_counter() - start
+    finally:
+        for patch in reversed(patches):
+            patch.stop()
+
+
+def main(*counts):
+    print(
+        "{:>8}  {:>23}  {:>23}".format(
+            "commands", "executor: latency/total", "asyncio: latency/total"
+        )
+    )
+    for n_commands in counts or (4, 16, 64):
+        results = []
+        for mode in ("executor", "asyncio"):
+            results.extend(asyncio.run(run(mode, n_commands)))
+        print(
+            "{:>8}  {:>11.3f} s {:>8.2f} s  {:>11.3f} s {:>8.2f} s".format(n_commands, *results)
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
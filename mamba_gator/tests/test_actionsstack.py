@@ -6,6 +6,7 @@ import time
 
 import pytest
 from mamba_gator.handlers import ActionsStack
+from mamba_gator.taskresults import TaskResults
 
 
 async def test_ActionsStack_cancel():
@@ -122,3 +123,126 @@ async def test_ActionsStack_put_result():
             await asyncio.sleep(dt)
             r = a.get(idxs[i])
         assert r == v
+
+
+async def test_ActionsStack_get_idempotent():
+    a = ActionsStack()
+
+    async def f():
+        return {"packages": ["numpy"]}
+
+    i = a.put(f)
+    await asyncio.sleep(0.01)
+
+    first = a.get(i)
+    assert first == {"packages": ["numpy"]}
+    # Stored by reference
+    assert a.get(i) is first
+    assert a.stats(i)["state"] == "done"
+    # Cancelling a finished task does nothing
+    a.cancel(i)
+    assert a.get(i) is first
+
+
+async def test_ActionsStack_cancelled_idempotent():
+    a = ActionsStack()
+
+    async def f():
+        await asyncio.sleep(10.0)
+
+    i = a.put(f)
+    await asyncio.sleep(0.01)
+    a.cancel(i)
+    await asyncio.sleep(0.01)
+
+    for _ in range(2):
+        with pytest.raises(asyncio.CancelledError):
+            a.get(i)
+
+
+async def test_ActionsStack_results_bounded():
+    a = ActionsStack(TaskResults(ttl=60.0, max_entries=2))
+
+    async def f(v):
+        return v
+
+    idxs = [a.put(f, v) for v in range(3)]
+    pending = a.usage()
+    await asyncio.sleep(0.01)
+
+    assert pending["pending"] == 3
+    # Oldest result evicted without being read
+    with pytest.raises(ValueError):
+        a.get(idxs[0])
+    assert [a.get(i) for i in idxs[1:]] == [1, 2]
+    usage = a.usage()
+    assert usage["pending"] == 0
+    assert usage["entries"] == 2
+    assert usage["evicted"] == 1
+    assert usage["bytes"] > 0
+
+
+async def test_ActionsStack_result_expires():
+    a = ActionsStack(TaskResults(ttl=0.05))
+
+    async def f():
+        return True
+
+    i = a.put(f)
+    await asyncio.sleep(0.01)
+    assert a.get(i) is True
+
+    await asyncio.sleep(0.1)
+    with pytest.raises(ValueError):
+        a.get(i)
+    with pytest.raises(ValueError):
+        a.stats(i)
+
+
+async def test_ActionsStack_events():
+    a = ActionsStack()
+    queue = a.subscribe()
+
+    async def f():
+        await asyncio.sleep(0.01)
+        return True
+
+    i = a.put(f)
+    j = a.put(f)
+    a.cancel(j)
+    events = [await asyncio.wait_for(queue.get(), 1.0) for _ in range(4)]
+    a.unsubscribe(queue)
+    a.put(f)
+    await asyncio.sleep(0.05)
+
+    assert [(e["id"], e["state"]) for e in events] == [
+        (i, "pending"),
+        (j, "pending"),
+        (j, "done"),
+        (i, "done"),
+    ]
+    assert [e.get("cancelled") for e in events] == [None, None, True, False]
+    # The result is available when the "done" event is received
+    assert a.get(i) is True
+    assert queue.empty()
+
+
+async def test_ActionsStack_wait():
+    a = ActionsStack()
+
+    async def f(dt):
+        await asyncio.sleep(dt)
+        return dt
+
+    fast = a.put(f, 0.01)
+    slow = a.put(f, 10.0)
+
+    assert await a.wait(fast, 1.0)
+    assert a.get(fast) == 0.01
+    assert await a.wait(fast, 1.0)
+    # The task is not cancelled by the timeout
+    assert not await a.wait(slow, 0.01)
+    assert a.get(slow) is None
+    with pytest.raises(ValueError):
+        await a.wait(slow + 1, 0.01)
+    a.cancel(slow)
@@ -4,12 +4,16 @@ This module contains tests for all REST API endpoints.
 Uses pytest-jupyter fixtures for server testing.
 """
 
+import asyncio
+import gzip
 import json
 import os
 import random
 import shutil
+import stat
 import sys
 import tempfile
+import threading
 import uuid
 import unittest.mock as mock
 from itertools import chain
@@ -18,6 +22,8 @@ from unittest.mock import AsyncMock
 import pytest
 import tornado.httpclient
 
+from mamba_gator.catalogcache import CatalogCache
+from mamba_gator.catalogindex import CatalogIndex
 from mamba_gator.envmanager import EnvManager
 
 from .utils import assert_http_error, has_mamba
@@ -101,6 +107,28 @@ async def test_channels_fail_get(conda_fetch):
         assert_http_error(exc_info, 500, error_msg)
 
 
+async def test_stats(conda_fetch):
+    """Test GET /stats returns the queries cache and tasks statistics."""
+
+    def config_queries(stats):
+        config = stats["queries"].get("cache", {}).get("config", {})
+        return config.get("hits", 0) + config.get("misses", 0)
+
+    response = await conda_fetch("stats", method="GET")
+    assert response.code == 200
+    before = json.loads(response.body)
+
+    await conda_fetch("channels", method="GET")
+    await conda_fetch("channels", method="GET")
+
+    response = await conda_fetch("stats", method="GET")
+    after = json.loads(response.body)
+
+    assert after["queries"]["backend"] == before["queries"]["backend"]
+    assert config_queries(after) == config_queries(before) + 2
+    assert {"entries", "bytes", "pending"} <= set(after["tasks"])
+
+
 async def test_channels_deployment(conda_fetch):
     """Test channels with deployment configuration."""
     with mock.patch("mamba_gator.envmanager.EnvManager._execute", new_callable=AsyncMock) as f:
@@ -963,9 +991,67 @@ async def test_package_search(conda_fetch, wait_for_task):
     assert v is not None
 
 
-async def test_package_list_available(conda_fetch, wait_for_task):
+async def test_package_search_cached_catalog(conda_fetch, tmp_path):
+    """Test GET /packages?query=<pkg> searches the cached catalog."""
+    catalog = {
+        "packages": [
+            {"name": "astroid", "summary": "Abstract syntax tree", "version": ["2.0"]},
+            {"name": "pylint", "summary": "Python linter", "keywords": ["astroid"], "version": ["2.1"]},
+            {"name": "xastroid", "summary": "", "version": ["0.1"]},
+        ],
+        "with_description": True,
+    }
+    CatalogCache(str(tmp_path)).put("key", catalog)
+
+    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", str(tmp_path)), mock.patch(
+        "mamba_gator.handlers.PackagesHandler._catalog_key",
+        new_callable=AsyncMock,
+        return_value="key",
+    ), mock.patch("mamba_gator.envmanager.EnvManager._execute", new_callable=AsyncMock) as f:
+        response = await conda_fetch("packages", method="GET", params={"query": "astroid"})
+        assert response.code == 200
+        body = json.loads(response.body)
+        assert [p["name"] for p in body["packages"]] == ["astroid", "xastroid", "pylint"]
+        assert body["with_description"] is True
+
+        response = await conda_fetch(
+            "packages",
+            method="GET",
+            params={"query": "astroid", "autocomplete": 1, "limit": 1},
+        )
+        assert response.code == 200
+        assert [p["name"] for p in json.loads(response.body)["packages"]] == ["astroid"]
+
+        f.assert_not_called()
+
+
+async def test_package_search_without_catalog(conda_fetch, wait_for_task, tmp_path):
+    """Test GET /packages?query=<pkg> asks the package manager without cached catalog."""
+    answer = {"packages": [{"name": "astroid", "version": ["3.0.1"]}], "with_description": False}
+    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", str(tmp_path)), mock.patch(
+        "mamba_gator.handlers.PackagesHandler._catalog_key",
+        new_callable=AsyncMock,
+        return_value="key",
+    ), mock.patch(
+        "mamba_gator.envmanager.EnvManager.package_search",
+        new_callable=AsyncMock,
+        return_value=answer,
+    ) as f:
+        response = await conda_fetch(
+            "packages",
+            method="GET",
+            params={"query": "astroid", "autocomplete": 1, "limit": 1},
+        )
+        assert response.code == 202
+        response = await wait_for_task(response.headers.get("Location"))
+        assert response.code == 200
+        assert json.loads(response.body) == answer
+        f.assert_called_once_with("astroid", 1, True)
+
+
+async def test_package_list_available(conda_fetch, wait_for_task, tmp_path):
     """Test GET /packages (list all available)."""
-    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", generate_name()):
+    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", str(tmp_path)):
         with mock.patch("mamba_gator.envmanager.EnvManager._execute", new_callable=AsyncMock) as f:
             dummy = {
                 "numpy_sugar": [
@@ -1124,8 +1210,8 @@ async def test_package_list_available(conda_fetch, wait_for_task):
                 dummy = {"result": {"pkgs": list(chain(*dummy.values()))}}
 
             f.side_effect = [
-                (0, json.dumps(dummy)),
                 (0, json.dumps(channels)),
+                (0, json.dumps(dummy)),
             ]
 
             response = await conda_fetch("packages", method="GET")
@@ -1134,7 +1220,7 @@ async def test_package_list_available(conda_fetch, wait_for_task):
             response = await wait_for_task(location)
             assert response.code == 200
 
-            args, _ = f.call_args_list[0]
+            args, _ = f.call_args_list[1]
             if has_mamba:
                 assert args[1:] == ("repoquery", "search", "*", "--json")
             else:
@@ -1170,14 +1256,22 @@ async def test_package_list_available(conda_fetch, wait_for_task):
                     },
                 ],
                 "with_description": True,
+                "version": mock.ANY,
+                "version_keys": {
+                    "0.8.0": mock.ANY,
+                    "0.9.0": mock.ANY,
+                    "0.9.1": mock.ANY,
+                    "1.0.6": mock.ANY,
+                    "1.0.8": mock.ANY,
+                },
             }
             assert body == expected
 
 
 @pytest.mark.skipif(sys.platform.startswith("win"), reason="TODO test not enough reliability")
-async def test_package_list_available_local_channel(conda_fetch, wait_for_task):
+async def test_package_list_available_local_channel(conda_fetch, wait_for_task, tmp_path):
     """Test GET /packages with local channel."""
-    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", generate_name()):
+    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", str(tmp_path)):
         with mock.patch("mamba_gator.envmanager.EnvManager._execute", new_callable=AsyncMock) as f:
             dummy = {
                 "numpy_sugar": [
@@ -1343,8 +1437,8 @@ async def test_package_list_available_local_channel(conda_fetch, wait_for_task):
                 }
 
                 f.side_effect = [
-                    (0, json.dumps(dummy)),
                     (0, json.dumps(channels)),
+                    (0, json.dumps(dummy)),
                 ]
 
                 response = await conda_fetch("packages", method="GET")
@@ -1353,7 +1447,7 @@ async def test_package_list_available_local_channel(conda_fetch, wait_for_task):
                 response = await wait_for_task(location)
                 assert response.code == 200
 
-                args, _ = f.call_args_list[0]
+                args, _ = f.call_args_list[1]
                 if has_mamba:
                     assert args[1:] == ("repoquery", "search", "*", "--json")
                 else:
@@ -1389,14 +1483,22 @@ async def test_package_list_available_local_channel(conda_fetch, wait_for_task):
                         },
                     ],
                     "with_description": True,
+                    "version": mock.ANY,
+                    "version_keys": {
+                    "0.8.0": mock.ANY,
+                    "0.9.0": mock.ANY,
+                    "0.9.1": mock.ANY,
+                    "1.0.6": mock.ANY,
+                    "1.0.8": mock.ANY,
+                },
                 }
                 assert body == expected
 
 
 @pytest.mark.skipif(sys.platform.startswith("win"), reason="not reliable on Windows")
-async def test_package_list_available_no_description(conda_fetch, wait_for_task):
+async def test_package_list_available_no_description(conda_fetch, wait_for_task, tmp_path):
     """Test GET /packages without description."""
-    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", generate_name()):
+    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", str(tmp_path)):
         with mock.patch("mamba_gator.envmanager.EnvManager._execute", new_callable=AsyncMock) as f:
             dummy = {
                 "numpy_sugar": [
@@ -1548,8 +1650,8 @@ async def test_package_list_available_no_description(conda_fetch, wait_for_task)
                 }
 
                 f.side_effect = [
-                    (0, json.dumps(dummy)),
                     (0, json.dumps(channels)),
+                    (0, json.dumps(dummy)),
                 ]
 
                 response = await conda_fetch("packages", method="GET")
@@ -1558,7 +1660,7 @@ async def test_package_list_available_no_description(conda_fetch, wait_for_task)
                 response = await wait_for_task(location)
                 assert response.code == 200
 
-                args, _ = f.call_args_list[0]
+                args, _ = f.call_args_list[1]
                 if has_mamba:
                     assert args[1:] == ("repoquery", "search", "*", "--json")
                 else:
@@ -1594,14 +1696,21 @@ async def test_package_list_available_no_description(conda_fetch, wait_for_task)
                         },
                     ],
                     "with_description": False,
+                    "version": mock.ANY,
+                    "version_keys": {
+                    "0.8.0": mock.ANY,
+                    "0.9.0": mock.ANY,
+                    "0.9.1": mock.ANY,
+                    "1.0.6": mock.ANY,
+                    "1.0.8": mock.ANY,
+                },
                 }
                 assert body == expected
 
 
-async def test_package_list_available_caching(conda_fetch, wait_for_task):
+async def test_package_list_available_caching(conda_fetch, wait_for_task, tmp_path):
     """Test GET /packages uses caching."""
-    cache_name = generate_name()
-    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", cache_name):
+    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", str(tmp_path)):
         with mock.patch("mamba_gator.envmanager.EnvManager._execute", new_callable=AsyncMock) as f:
             dummy = {
                 "numpy_sugar": [
@@ -1760,8 +1869,8 @@ async def test_package_list_available_caching(conda_fetch, wait_for_task):
                 dummy = {"result": {"pkgs": list(chain(*dummy.values()))}}
 
             f.side_effect = [
-                (0, json.dumps(dummy)),
                 (0, json.dumps(channels)),
+                (0, json.dumps(dummy)),
             ]
 
             # First retrieval - no cache available
@@ -1771,7 +1880,7 @@ async def test_package_list_available_caching(conda_fetch, wait_for_task):
             response = await wait_for_task(location)
             assert response.code == 200
 
-            args, _ = f.call_args_list[0]
+            args, _ = f.call_args_list[1]
             if has_mamba:
                 assert args[1:] == ("repoquery", "search", "*", "--json")
             else:
@@ -1805,19 +1914,335 @@ async def test_package_list_available_caching(conda_fetch, wait_for_task):
                     },
                 ],
                 "with_description": True,
+                "version": mock.ANY,
+                "version_keys": {
+                    "0.8.0": mock.ANY,
+                    "0.9.0": mock.ANY,
+                    "0.9.1": mock.ANY,
+                    "1.0.6": mock.ANY,
+                    "1.0.8": mock.ANY,
+                },
             }
 
-            cache_file = os.path.join(tempfile.gettempdir(), cache_name + ".json")
-            assert os.path.exists(cache_file)
-
-            with open(cache_file) as cache:
-                assert json.load(cache) == expected
+            entries = list((tmp_path / "v1").glob("*.meta.json"))
+            assert len(entries) == 1
+            meta = json.loads(entries[0].read_text())
+            assert meta["schema"] == 1
+            assert json.loads((tmp_path / "v1" / (meta["digest"] + ".json")).read_text()) == expected
+            assert stat.S_IMODE(entries[0].stat().st_mode) & 0o077 == 0
 
             # Retrieve using cache
             response = await conda_fetch("packages", method="GET")
             assert response.code == 200
+            assert int(response.headers["Age"]) < 60
             body = json.loads(response.body)
             assert body == expected
+            etag = response.headers["ETag"]
+            assert etag == '"{}"'.format(meta["digest"])
+
+            # Conditional retrieval
+            response = await conda_fetch(
+                "packages", method="GET", headers={"If-None-Match": etag}, raise_error=False
+            )
+            assert response.code == 304
+            assert response.body == b""
+
+            # Precompressed retrieval
+            response = await conda_fetch(
+                "packages",
+                method="GET",
+                headers={"Accept-Encoding": "gzip"},
+                decompress_response=False,
+            )
+            assert response.code == 200
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert json.loads(gzip.decompress(response.body)) == expected
+
+            # Fresh catalog => no refresh
+            assert f.call_count == 2
+
+
+async def test_package_list_available_cache_chunks(conda_fetch, tmp_path):
+    """Test GET /packages sends the cached catalog by chunks."""
+    catalog = {
+        "packages": [{"name": "package{}".format(i), "version": ["1.0"]} for i in range(100)],
+        "with_description": False,
+    }
+    CatalogCache(str(tmp_path)).put("key", catalog)
+
+    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", str(tmp_path)), mock.patch(
+        "mamba_gator.handlers.CATALOG_CHUNK_SIZE", 64
+    ), mock.patch(
+        "mamba_gator.handlers.PackagesHandler._catalog_key",
+        new_callable=AsyncMock,
+        return_value="key",
+    ), mock.patch(
+        "mamba_gator.envmanager.EnvManager._execute", new_callable=AsyncMock
+    ) as f:
+        response = await conda_fetch("packages", method="GET", decompress_response=False)
+
+        assert response.code == 200
+        assert "Content-Encoding" not in response.headers
+        assert int(response.headers["Content-Length"]) == len(response.body)
+        assert json.loads(response.body) == catalog
+        f.assert_not_called()
+
+
+async def test_package_list_available_page(conda_fetch, tmp_path):
+    """Test GET /packages with page arguments."""
+    catalog = {
+        "packages": [
+            {"name": "numpy", "channel": "conda-forge", "version": ["1.0"]},
+            {"name": "numpydoc", "channel": "pkgs/main", "version": ["0.9"]},
+            {"name": "scipy", "channel": "conda-forge", "version": ["1.1"]},
+        ],
+        "with_description": False,
+    }
+    CatalogCache(str(tmp_path)).put("key", catalog)
+    threads = []
+    query = CatalogIndex.query
+
+    def query_in_thread(index, **kwargs):
+        threads.append(threading.current_thread())
+        return query(index, **kwargs)
+
+    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", str(tmp_path)), mock.patch(
+        "mamba_gator.handlers.PackagesHandler._catalog_key",
+        new_callable=AsyncMock,
+        return_value="key",
+    ), mock.patch(
+        "mamba_gator.envmanager.EnvManager.env_packages", new_callable=AsyncMock
+    ) as env_packages, mock.patch.object(
+        CatalogIndex, "query", autospec=True, side_effect=query_in_thread
+    ):
+        response = await conda_fetch(
+            "packages",
+            method="GET",
+            params={"channel": "conda-forge", "sort": "name", "order": "desc", "limit": 1},
+        )
+        assert response.code == 200
+        # The page is not computed on the event loop
+        assert threads and threads[0] is not threading.main_thread()
+        assert json.loads(response.body) == {
+            "packages": [catalog["packages"][2]],
+            "total": 2,
+            "offset": 0,
+            "with_description": False,
+        }
+
+        env_packages.return_value = {
+            "packages": [
+                {
+                    "name": "numpy",
+                    "channel": "conda-forge",
+                    "version": "0.9",
+                    "build_number": 0,
+                    "build_string": "py_0",
+                }
+            ]
+        }
+        response = await conda_fetch(
+            "packages", method="GET", params={"installed_in": "env", "q": "num"}
+        )
+        assert response.code == 200
+        body = json.loads(response.body)
+        env_packages.assert_called_once_with("env")
+        assert body["total"] == 1
+        assert body["packages"][0]["version"] == ["1.0", "0.9"]
+        assert body["packages"][0]["version_installed"] == "0.9"
+
+        env_packages.reset_mock()
+        response = await conda_fetch(
+            "packages", method="GET", params={"not_installed_in": "env", "q": "num"}
+        )
+        assert response.code == 200
+        body = json.loads(response.body)
+        env_packages.assert_called_once_with("env")
+        assert [p["name"] for p in body["packages"]] == ["numpydoc"]
+
+
+async def test_package_list_available_page_without_cache(conda_fetch, wait_for_task, tmp_path):
+    """Test GET /packages with page arguments builds the catalog first."""
+    catalog = {
+        "packages": [
+            {"name": "numpy", "channel": "conda-forge", "version": ["1.0"]},
+            {"name": "scipy", "channel": "conda-forge", "version": ["1.1"]},
+        ],
+        "with_description": False,
+    }
+
+    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", str(tmp_path)), mock.patch(
+        "mamba_gator.handlers.PackagesHandler._catalog_key",
+        new_callable=AsyncMock,
+        return_value="key",
+    ), mock.patch(
+        "mamba_gator.envmanager.EnvManager.list_available",
+        new_callable=AsyncMock,
+        return_value=catalog,
+    ):
+        response = await conda_fetch("packages", method="GET", params={"offset": 1})
+        assert response.code == 202
+        response = await wait_for_task(response.headers.get("Location"))
+        assert response.code == 200
+        assert json.loads(response.body) == {
+            "packages": [catalog["packages"][1]],
+            "total": 2,
+            "offset": 1,
+            "with_description": False,
+        }
+        assert CatalogCache(str(tmp_path)).get("key") is not None
+
+
+async def test_package_list_available_incremental_refresh(conda_fetch, tmp_path):
+    """Test GET /packages refreshes a stale catalog incrementally and returns its changes."""
+    channel = "https://conda.anaconda.org/conda-forge"
+
+    def entry(name, version, channel):
+        return {
+            "name": name,
+            "channel": channel,
+            "version": [version],
+            "build_number": [0],
+            "build_string": ["h_0"],
+        }
+
+    cached = {
+        "packages": [entry("numpy", "1.0", "conda-forge")],
+        "with_description": False,
+        "version": "5eed:3",
+    }
+    first = CatalogCache(str(tmp_path)).put("key", cached)
+    updaters = []
+
+    async def list_available(updater):
+        updaters.append(updater)
+        listing = [entry("numpy", "1.0", channel + "/noarch"), entry("scipy", "1.1", channel + "/noarch")]
+        catalog, _ = updater.update(listing, {}, {channel: "conda-forge"})
+        return catalog
+
+    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", str(tmp_path)), mock.patch(
+        "mamba_gator.catalogcache.CATALOG_TTL", 0
+    ), mock.patch(
+        "mamba_gator.handlers.PackagesHandler._catalog_key",
+        new_callable=AsyncMock,
+        return_value="key",
+    ), mock.patch(
+        "mamba_gator.envmanager.EnvManager.list_available", side_effect=list_available
+    ):
+        response = await conda_fetch("packages", method="GET")
+        assert response.code == 200
+        assert json.loads(response.body) == cached
+
+        # Wait for the background refresh
+        for _ in range(50):
+            if CatalogCache(str(tmp_path)).get("key").digest != first.digest:
+                break
+            await asyncio.sleep(0.1)
+
+        updater = updaters[0]
+        # The updater started from the cached catalog
+        assert list(updater.history) == [
+            {"version": "5eed:4", "since": "5eed:3", "added": ["scipy"], "updated": [], "removed": []}
+        ]
+        response = await conda_fetch("packages", method="GET")
+        assert json.loads(response.body)["version"] == "5eed:4"
+
+        # Changes since the cached catalog
+        response = await conda_fetch("packages", method="GET", params={"since": "5eed:3"})
+        assert response.code == 200
+        etag = CatalogCache(str(tmp_path)).get("key").etag
+        assert response.headers["ETag"] == etag
+        assert json.loads(response.body) == {
+            "packages": [entry("scipy", "1.1", "conda-forge")],
+            "removed": [],
+            "version": "5eed:4",
+            "since": "5eed:3",
+            "with_description": False,
+        }
+        response = await conda_fetch("packages", method="GET", params={"since": "5eed:4"})
+        assert json.loads(response.body)["packages"] == []
+        # The client copy is current
+        response = await conda_fetch(
+            "packages",
+            method="GET",
+            params={"since": "5eed:3"},
+            headers={"If-None-Match": etag},
+            raise_error=False,
+        )
+        assert response.code == 304
+        # Unknown changes - the whole catalog is returned
+        response = await conda_fetch("packages", method="GET", params={"since": "5eed:2"})
+        body = json.loads(response.body)
+        assert "since" not in body
+        assert [p["name"] for p in body["packages"]] == ["numpy", "scipy"]
+
+
+async def test_package_list_available_since_other_channels(conda_fetch, wait_for_task, tmp_path):
+    """Test GET /packages returns the whole catalog for the version of another catalog."""
+    channels = ["conda-forge"]
+    packages = {"conda-forge": ["numpy", "scipy"], "bioconda": ["samtools"]}
+
+    async def catalog_key():
+        return channels[0]
+
+    async def list_available(updater):
+        channel = "https://conda.anaconda.org/" + channels[0]
+        listing = [
+            {
+                "name": name,
+                "channel": channel + "/noarch",
+                "version": ["1.0"],
+                "build_number": [0],
+                "build_string": ["h_0"],
+            }
+            for name in packages[channels[0]]
+        ]
+        catalog, _ = updater.update(listing, {}, {channel: channels[0]})
+        return catalog
+
+    async def fetch(params=None):
+        response = await conda_fetch("packages", method="GET", params=params)
+        if response.code == 202:
+            response = await wait_for_task(response.headers.get("Location"))
+        assert response.code == 200
+        return json.loads(response.body)
+
+    with mock.patch("mamba_gator.handlers.AVAILABLE_CACHE", str(tmp_path)), mock.patch(
+        "mamba_gator.handlers.PackagesHandler._catalog_key", side_effect=catalog_key
+    ), mock.patch(
+        "mamba_gator.envmanager.EnvManager.list_available", side_effect=list_available
+    ):
+        forge = await fetch()
+        channels[0] = "bioconda"
+        bio = await fetch()
+        # Both catalogs were updated once
+        assert forge["version"] != bio["version"]
+
+        body = await fetch({"since": forge["version"]})
+
+    assert "since" not in body
+    assert body["version"] == bio["version"]
+    assert [p["name"] for p in body["packages"]] == ["samtools"]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"offset": "a"},
+        {"limit": "-1"},
+        {"sort": "version"},
+        {"order": "up"},
+        {"since": "a"},
+        {"since": "-1"},
+        {"since": "5eed:-1"},
+    ],
+)
+async def test_package_list_available_page_invalid(conda_fetch, params):
+    """Test GET /packages with invalid page arguments."""
+    with pytest.raises(tornado.httpclient.HTTPClientError) as exc_info:
+        await conda_fetch("packages", method="GET", params=params)
+
+    assert exc_info.value.code == 400
 
 
 # =============================================================================
@@ -1828,7 +2253,8 @@ async def test_package_list_available_caching(conda_fetch, wait_for_task):
 async def test_get_invalid_task(conda_fetch):
     """Test GET /tasks/<id> with invalid task ID."""
     with pytest.raises(tornado.httpclient.HTTPClientError) as exc_info:
-        await conda_fetch("tasks", str(random.randint(1, 1200)), method="GET")
+        # Results of the previous tests tasks are kept for a while
+        await conda_fetch("tasks", str(random.randint(10**9, 2 * 10**9)), method="GET")
     
     assert exc_info.value.code == 404
 
@@ -1903,3 +2329,126 @@ async def test_preview_mocked_dry_run(conda_fetch, wait_for_task):
     assert len(data["UNLINK"]) == 1
     assert data["LINK"][0]["name"] == "numpy"
     assert "has_side_effects" in data
+
+
+async def test_task_events(conda_fetch):
+    """Test GET /events streams the task state changes until the task is done."""
+    received = []
+    index = None
+
+    def on_chunk(chunk):
+        received.append(chunk.decode("utf-8"))
+        if index is not None and '"id": {}, "cancelled"'.format(index) in "".join(received):
+            raise RuntimeError("done event received")
+
+    stream = asyncio.ensure_future(
+        conda_fetch("events", method="GET", streaming_callback=on_chunk, request_timeout=10)
+    )
+    while not received:
+        await asyncio.sleep(0.05)
+
+    with mock.patch("mamba_gator.envmanager.EnvManager._execute", new_callable=AsyncMock) as f:
+        f.return_value = (0, json.dumps({"actions": {"LINK": [], "UNLINK": [], "FETCH": []}}))
+        body = {"action": "update", "packages": ["numpy"]}
+        response = await conda_fetch(
+            "environments", "base", "packages", "preview",
+            method="PATCH", body=json.dumps(body)
+        )
+        _, index = response.headers.get("Location").rsplit("/", maxsplit=1)
+        index = int(index)
+        with pytest.raises(Exception):
+            await stream
+
+    events = [
+        json.loads(block.split("data: ", 1)[1])
+        for block in "".join(received).split("\n\n")
+        if block.startswith("event: task")
+    ]
+    states = [e["state"] for e in events if e["id"] == index]
+    assert states[0] == "pending"
+    assert states[-1] == "done"
+    response = await conda_fetch("tasks", str(index), method="GET")
+    assert response.code == 200
+
+
+async def test_task_wait(conda_fetch):
+    """Test GET /tasks/<id>?wait=<seconds> answers once the task is done."""
+    started = asyncio.Event()
+
+    async def preview(*args):
+        started.set()
+        await asyncio.sleep(0.5)
+        return {"LINK": [], "UNLINK": [], "FETCH": []}
+
+    with mock.patch(
+        "mamba_gator.envmanager.EnvManager.dry_run_preview", side_effect=preview
+    ):
+        body = {"action": "update", "packages": ["numpy"]}
+        response = await conda_fetch(
+            "environments", "base", "packages", "preview",
+            method="PATCH", body=json.dumps(body)
+        )
+        _, index = response.headers.get("Location").rsplit("/", maxsplit=1)
+        await started.wait()
+
+        pending = await conda_fetch("tasks", index, params={"wait": 0.05}, method="GET")
+        assert pending.code == 202
+        assert json.loads(pending.body)["state"] == "pending"
+
+        response = await conda_fetch("tasks", index, params={"wait": 30}, method="GET")
+
+    assert response.code == 200
+    assert json.loads(response.body)["LINK"] == []
+
+
+async def test_task_wait_cancelled(conda_fetch):
+    """Test GET /tasks/<id>?wait=<seconds> answers once the task is cancelled."""
+
+    async def preview(*args):
+        await asyncio.sleep(30)
+
+    with mock.patch(
+        "mamba_gator.envmanager.EnvManager.dry_run_preview", side_effect=preview
+    ):
+        body = {"action": "update", "packages": ["numpy"]}
+        response = await conda_fetch(
+            "environments", "base", "packages", "preview",
+            method="PATCH", body=json.dumps(body)
+        )
+        _, index = response.headers.get("Location").rsplit("/", maxsplit=1)
+        waiting = asyncio.ensure_future(
+            conda_fetch("tasks", index, params={"wait": 30}, method="GET", raise_error=False)
+        )
+        await asyncio.sleep(0.1)
+        await conda_fetch("tasks", index, method="DELETE")
+        response = await asyncio.wait_for(waiting, 5)
+
+    assert response.code == 410
+
+
+@pytest.mark.parametrize("wait", ["soon", "-1", "nan", "inf"])
+async def test_task_wait_invalid(conda_fetch, wait):
+    """Test GET /tasks/<id>?wait=<seconds> with an invalid waiting time."""
+    with pytest.raises(tornado.httpclient.HTTPClientError) as exc_info:
+        await conda_fetch("tasks", "1", params={"wait": wait}, method="GET")
+
+    assert exc_info.value.code == 400
+
+
+async def test_task_result_read_twice(conda_fetch, wait_for_task):
+    """Test GET /tasks/<id> returns the result again, e.g. to a retried poll."""
+    with mock.patch("mamba_gator.envmanager.EnvManager._execute", new_callable=AsyncMock) as f:
+        f.return_value = (0, json.dumps({"actions": {"LINK": [], "UNLINK": [], "FETCH": []}}))
+        body = {"action": "update", "packages": ["numpy"]}
+        response = await conda_fetch(
+            "environments", "base", "packages", "preview",
+            method="PATCH", body=json.dumps(body)
+        )
+        location = response.headers.get("Location")
+        first = await wait_for_task(location)
+        _, index = location.rsplit("/", maxsplit=1)
+        second = await conda_fetch("tasks", index, method="GET")
+
+    assert first.code == second.code == 200
+    assert json.loads(second.body) == json.loads(first.body)
+    assert json.loads(second.body)["LINK"] == []
@@ -0,0 +1,195 @@
+import asyncio
+import json
+from unittest import mock
+from unittest.mock import AsyncMock
+
+import pytest
+
+from mamba_gator.backends import (
+    CachedQueryBackend,
+    CliQueryBackend,
+    CondaApiQueryBackend,
+    QueryBackend,
+)
+from mamba_gator.condaworker import CondaWorker, CondaWorkerError
+from mamba_gator.envmanager import EnvManager
+
+from .test_condaworker import conda_python, requires_conda
+
+
+def test_incomplete_backend():
+    class InfoBackend(QueryBackend):
+        async def info(self):
+            return {}
+
+    with pytest.raises(TypeError):
+        InfoBackend()
+
+
+async def test_cli_backend_info_error():
+    manager = EnvManager("", None)
+    backend = CliQueryBackend(manager)
+    with mock.patch.object(manager, "_execute", new_callable=AsyncMock) as f:
+        f.return_value = (1, json.dumps({"error": True, "message": "Fail"}))
+        assert await backend.info() == {"error": True, "message": "Fail"}
+
+
+async def test_api_backend_calls_api():
+    fallback = mock.Mock(spec=CliQueryBackend)
+    call = AsyncMock(return_value=[{"name": "python"}])
+    backend = CondaApiQueryBackend(call, fallback)
+
+    assert await backend.packages("base") == [{"name": "python"}]
+    call.assert_called_once_with("list", "base")
+
+
+async def test_api_backend_info_error():
+    call = AsyncMock(return_value={"error": "Boom", "message": "Boom message"})
+    backend = CondaApiQueryBackend(call, mock.Mock(spec=CliQueryBackend))
+
+    assert await backend.info() == {"error": True, "message": "Boom message"}
+
+
+@pytest.mark.parametrize("query,args", [("info", ()), ("config", ()), ("packages", ("base",))])
+async def test_api_backend_fallback(query, args):
+    fallback = mock.Mock(spec=CliQueryBackend)
+    setattr(fallback, query, AsyncMock(return_value={"from": "cli"}))
+    call = AsyncMock(side_effect=CondaWorkerError("crashed"))
+    backend = CondaApiQueryBackend(call, fallback)
+
+    assert await getattr(backend, query)(*args) == {"from": "cli"}
+    getattr(fallback, query).assert_called_once_with(*args)
+
+
+@pytest.fixture
+def watched_paths(tmp_path):
+    with mock.patch(
+        "mamba_gator.backends.CONDARC_SEARCH_PATH", (str(tmp_path / ".condarc"),)
+    ), mock.patch(
+        "mamba_gator.backends.ENVIRONMENTS_TXT", str(tmp_path / "environments.txt")
+    ):
+        yield tmp_path
+
+
+def make_cached_backend(info):
+    backend = mock.Mock(spec=CliQueryBackend)
+    backend.info = AsyncMock(return_value=info)
+    backend.config = AsyncMock(return_value={"channels": []})
+    return backend, CachedQueryBackend(backend)
+
+
+async def test_cached_backend_hits(watched_paths):
+    backend, cached = make_cached_backend({"envs_dirs": []})
+
+    for _ in range(3):
+        assert await cached.info() == {"envs_dirs": []}
+        assert await cached.config() == {"channels": []}
+
+    backend.info.assert_called_once()
+    backend.config.assert_called_once()
+    assert cached.stats == {
+        "info": {"hits": 2, "misses": 1},
+        "config": {"hits": 2, "misses": 1},
+    }
+
+
+@pytest.mark.parametrize("path", (".condarc", "environments.txt", "envs"))
+async def test_cached_backend_invalidation(watched_paths, path):
+    tmp_path = watched_paths
+    envs_dir = tmp_path / "envs"
+    envs_dir.mkdir()
+    backend, cached = make_cached_backend({"envs_dirs": [str(envs_dir)]})
+    await cached.info()
+    await cached.config()
+    await cached.info()
+    assert backend.info.call_count == 1
+
+    if path == "envs":
+        (envs_dir / "new_env").mkdir()
+    else:
+        (tmp_path / path).write_text("channels: []")
+
+    await cached.info()
+    await cached.config()
+    assert backend.info.call_count == 2
+    assert backend.config.call_count == 2
+
+
+async def test_cached_backend_concurrent_queries(watched_paths):
+    backend, cached = make_cached_backend({})
+
+    async def slow_info():
+        await asyncio.sleep(0.05)
+        return {"conda_version": "25.1.0"}
+
+    backend.info.side_effect = slow_info
+    results = await asyncio.gather(*(cached.info() for _ in range(4)))
+
+    assert results == [{"conda_version": "25.1.0"}] * 4
+    backend.info.assert_called_once()
+
+
+async def test_cached_backend_does_not_cache_errors(watched_paths):
+    backend, cached = make_cached_backend({"error": True, "message": "Fail"})
+
+    await cached.info()
+    await cached.info()
+
+    assert backend.info.call_count == 2
+
+
+async def test_envmanager_runs_conda_info_once():
+    manager = EnvManager("", None)
+    info = {
+        "conda_version": "25.1.0",
+        "default_prefix": "/opt/conda",
+        "envs": [],
+        "envs_dirs": [],
+        "root_prefix": "/opt/conda",
+    }
+    with mock.patch.object(manager, "_execute", new_callable=AsyncMock) as f:
+        f.return_value = (0, json.dumps(info))
+        await manager.list_envs()
+        await manager.list_envs()
+        await manager.info()
+
+    f.assert_called_once_with(manager.manager, "info", "--json")
+
+
+async def test_envmanager_uses_query_backend():
+    manager = EnvManager("", None)
+    manager._query_backend = CondaApiQueryBackend(
+        AsyncMock(return_value=[]), manager._cli_backend
+    )
+    with mock.patch.object(
+        manager, "_execute", new_callable=AsyncMock
+    ) as f, mock.patch("mamba_gator.envmanager.READ_CONDA_META", False):
+        assert await manager.env_packages("base") == {"packages": []}
+        f.assert_not_called()
+
+
+@requires_conda
+async def test_api_backend_matches_cli():
+    worker = CondaWorker(conda_python)
+    try:
+        backend = CondaApiQueryBackend(worker.call, None)
+        packages = await backend.packages("base")
+        _, output, _ = await worker.execute(["list", "--json", "-n", "base"])
+        assert packages == json.loads(output)
+
+        info = await backend.info()
+        _, output, _ = await worker.execute(["info", "--json"])
+        expected = json.loads(output)
+        for key in ("root_prefix", "default_prefix", "envs", "envs_dirs", "conda_version"):
+            assert info[key] == expected[key]
+
+        config = await backend.config()
+        _, output, _ = await worker.execute(["config", "--show", "--json"])
+        expected = json.loads(output)
+        for key in ("channels", "channel_alias", "custom_channels", "custom_multichannels"):
+            assert config[key] == expected[key]
+
+        packages = await backend.packages("_gator_missing_environment")
+        assert "error" in packages
+    finally:
+        await worker.shutdown()
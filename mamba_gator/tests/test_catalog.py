@@ -0,0 +1,112 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from mamba_gator.catalog import (
+    CatalogBuilder,
+    entry_digest,
+    format_packages,
+    format_packages_in_pool,
+    group_repoquery_output,
+    split_packages,
+)
+
+from .utils import make_payload
+
+
+def record(name, version, build_number, build=None, channel="conda-forge"):
+    return {
+        "build": build or "h{}_{}".format(version, build_number),
+        "build_number": build_number,
+        "channel": channel,
+        "name": name,
+        "subdir": "linux-64",
+        "version": version,
+    }
+
+
+def test_group_repoquery_output():
+    data = {
+        "result": {
+            "pkgs": [record("a", "1.0", 0), {"version": "1"}, record("b", "2.0", 0), record("a", "2.0", 0)]
+        }
+    }
+
+    grouped = group_repoquery_output(data)
+
+    assert list(grouped) == ["a", "b"]
+    assert [r["version"] for r in grouped["a"]] == ["1.0", "2.0"]
+
+
+def test_format_packages():
+    data = {
+        "numpy": [
+            record("numpy", "1.10.0", 0, channel="first"),
+            record("numpy", "1.9.0", 2, "py_2"),
+            record("numpy", "1.10", 3, "py_3"),
+            record("numpy", "1.9.0", 1),
+            record("numpy", "1.10.0", 1),
+            record("numpy", "not a version", 0, "bad_0"),
+        ],
+        "abc": [record("abc", "0.1", 0, "h_0")],
+    }
+
+    packages = format_packages(data)
+
+    assert [p["name"] for p in packages] == ["numpy", "abc"]
+    numpy = packages[0]
+    assert numpy["channel"] == "first"
+    # "1.10" and "1.10.0" are the same version; the first spelling is kept
+    assert numpy["version"] == ["1.10.0", "1.9.0", "0.0.0"]
+    assert numpy["build_number"] == [3, 2, 0]
+    assert numpy["build_string"] == ["py_3", "py_2", "bad_0"]
+    assert packages[1]["version"] == ["0.1"]
+
+
+def test_catalog_builder():
+    payload = make_payload(2000)
+    catalog = CatalogBuilder()
+
+    for record in payload["result"]["pkgs"]:
+        catalog.add(record)
+
+    assert len(catalog) == len({r["name"] for r in payload["result"]["pkgs"]})
+    assert catalog.packages() == format_packages(group_repoquery_output(payload))
+
+
+def test_catalog_builder_digests():
+    catalog = CatalogBuilder()
+    for entry in (record("a", "1.0", 0), record("a", "2.0", 1), record("b", "1.0", 0)):
+        catalog.add(entry)
+
+    digests = catalog.digests()
+    packages = catalog.packages(["b", "a", "c"])
+
+    assert [p["name"] for p in packages] == ["b", "a"]
+    assert {p["name"]: entry_digest(p) for p in packages} == digests
+
+    # Same builds, added in another order
+    other = CatalogBuilder()
+    for entry in (record("a", "2.0", 1), record("a", "1.0", 0), record("b", "1.0", 0)):
+        other.add(entry)
+    assert other.digests() == digests
+
+    catalog.add(record("a", "2.0", 2))
+    assert catalog.digests()["a"] != digests["a"]
+    assert catalog.digests()["b"] == digests["b"]
+
+
+def test_split_packages():
+    data = {name: [record(name, "1.0", 0)] * size for name, size in zip("dcbae", (1, 2, 3, 4, 6))}
+
+    chunks = split_packages(data, 3)
+
+    assert [list(chunk) for chunk in chunks] == [["a", "b"], ["c", "d", "e"]]
+    assert split_packages(data, 100) == [{name: data[name]} for name in sorted(data)]
+
+
+async def test_format_packages_in_pool():
+    data = group_repoquery_output(make_payload(2000))
+    expected = sorted(format_packages(data), key=lambda p: p["name"])
+
+    with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as executor:
+        assert await format_packages_in_pool(data, executor) == expected
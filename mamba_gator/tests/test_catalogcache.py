@@ -0,0 +1,127 @@
+import gzip
+import json
+import os
+import stat
+import sys
+import time
+from unittest import mock
+
+import pytest
+
+from mamba_gator import catalogcache
+from mamba_gator.catalogcache import CatalogCache, catalog_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return CatalogCache(str(tmp_path))
+
+
+def test_catalog_key():
+    channels = {"conda-forge": ["https://conda.anaconda.org/conda-forge"]}
+    key = catalog_key(channels, "linux-64", "mamba")
+
+    assert key == catalog_key(dict(channels), "linux-64", "mamba")
+    assert key != catalog_key(channels, "osx-arm64", "mamba")
+    assert key != catalog_key(channels, "linux-64", "conda")
+    assert key != catalog_key({"defaults": []}, "linux-64", "mamba")
+
+
+def test_cache_put_get(cache):
+    data = {"packages": [{"name": "a"}], "with_description": False}
+
+    assert cache.get("key") is None
+
+    entry = cache.put("key", data, manager="mamba")
+    cached = cache.get("key")
+
+    assert cached == entry
+    assert json.loads(cached.read()) == data
+    assert cached.size == len(cached.read())
+    assert cached.age < 60
+    assert cached.fresh and cached.usable
+    assert [name for name in os.listdir(cache.directory) if name.endswith(".tmp")] == []
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="POSIX permissions")
+def test_cache_is_private(cache):
+    entry = cache.put("key", {"packages": []})
+
+    assert stat.S_IMODE(os.stat(cache.directory).st_mode) & 0o077 == 0
+    assert stat.S_IMODE(os.stat(entry.path).st_mode) & 0o077 == 0
+
+
+def test_cache_replace_entry(cache):
+    first = cache.put("key", {"packages": [1]})
+    # Let the previous body exceed the grace delay
+    old = time.time() - 3600
+    os.utime(first.path, (old, old))
+
+    second = cache.put("key", {"packages": [2]})
+
+    assert cache.get("key") == second
+    assert first.digest != second.digest
+    assert not os.path.exists(first.path)
+
+
+def test_cache_keep_recent_bodies(cache):
+    first = cache.put("key", {"packages": [1]})
+    cache.put("key", {"packages": [2]})
+
+    # A concurrent reader may still be reading the previous body
+    assert os.path.exists(first.path)
+
+
+def test_cache_ignore_other_schema(cache):
+    cache.put("key", {"packages": []})
+    meta_path = os.path.join(cache.directory, "key.meta.json")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta["schema"] = 0
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+
+    assert cache.get("key") is None
+
+
+def test_cache_ignore_invalid_entry(cache):
+    cache.put("key", {"packages": []})
+    with open(os.path.join(cache.directory, "key.meta.json"), "w") as f:
+        f.write("{ invalid")
+
+    assert cache.get("key") is None
+
+
+def test_cache_entry_expiration(cache):
+    entry = cache.put("key", {"packages": []})
+
+    with mock.patch.object(catalogcache, "CATALOG_TTL", 10), mock.patch.object(
+        catalogcache, "CATALOG_MAX_STALE", 100
+    ):
+        assert entry._replace(created=time.time() - 5).fresh
+        stale = entry._replace(created=time.time() - 50)
+        assert not stale.fresh and stale.usable
+        assert not entry._replace(created=time.time() - 500).usable
+
+
+def test_cache_precompressed_variants(cache):
+    data = {"packages": [{"name": "a"}], "with_description": False}
+    entry = cache.put("key", data)
+
+    assert entry.etag == '"{}"'.format(entry.digest)
+    assert "gzip" in entry.encodings
+    assert cache.get("key").encodings == entry.encodings
+
+    path, encoding = entry.variant("gzip, deflate")
+    assert encoding == "gzip"
+    assert json.loads(gzip.decompress(entry.read(path))) == data
+
+
+@pytest.mark.parametrize(
+    "accept_encoding",
+    [None, "", "identity", "gzip;q=0", "deflate", "*;q=0"],
+)
+def test_cache_identity_variant(cache, accept_encoding):
+    entry = cache.put("key", {"packages": []})
+
+    assert entry.variant(accept_encoding) == (entry.path, None)
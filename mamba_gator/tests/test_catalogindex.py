@@ -0,0 +1,178 @@
+import json
+from unittest import mock
+
+import pytest
+
+from mamba_gator.catalogindex import CatalogIndex, channel_display_name, load_index
+from mamba_gator.versions import version_key
+
+
+def make_package(name, channel="conda-forge", versions=("1.0",)):
+    return {
+        "name": name,
+        "channel": channel,
+        "version": list(versions),
+        "build_number": [0] * len(versions),
+        "build_string": ["py_0"] * len(versions),
+        "summary": "",
+        "home": "",
+        "keywords": [],
+        "tags": [],
+    }
+
+
+@pytest.fixture
+def index():
+    return CatalogIndex(
+        {
+            "packages": [
+                make_package("numpy", "https://conda.anaconda.org/conda-forge/linux-64"),
+                make_package("numpydoc", "pkgs/main"),
+                make_package("pandas", "https://conda.anaconda.org/conda-forge/noarch"),
+                make_package("scipy", "pkgs/main"),
+                make_package("Sphinx", "https://conda.anaconda.org/conda-forge/noarch"),
+            ],
+            "with_description": True,
+        }
+    )
+
+
+def names(page):
+    return [p["name"] for p in page["packages"]]
+
+
+@pytest.mark.parametrize(
+    "channel,expected",
+    [
+        (None, ""),
+        ("conda-forge", "conda-forge"),
+        ("pkgs/main", "pkgs/main"),
+        ("https://conda.anaconda.org/conda-forge/linux-64", "conda.anaconda.org/.../conda-forge"),
+        ("https://repo.anaconda.com/pkgs/main/noarch", "repo.anaconda.com/.../main"),
+        ("file:///home/user/channel/noarch", "home/.../channel"),
+    ],
+)
+def test_channel_display_name(channel, expected):
+    assert channel_display_name(channel) == expected
+
+
+def test_query_all(index):
+    page = index.query()
+
+    assert names(page) == ["numpy", "numpydoc", "pandas", "scipy", "Sphinx"]
+    assert page["total"] == 5
+    assert page["offset"] == 0
+    assert page["with_description"] is True
+
+
+def test_query_pagination(index):
+    page = index.query(offset=1, limit=2)
+
+    assert names(page) == ["numpydoc", "pandas"]
+    assert page["total"] == 5
+    assert page["offset"] == 1
+
+    assert names(index.query(offset=4, limit=2)) == ["Sphinx"]
+    assert names(index.query(offset=10)) == []
+
+
+def test_query_sort(index):
+    assert names(index.query(descending=True)) == ["Sphinx", "scipy", "pandas", "numpydoc", "numpy"]
+    # Names stay in ascending order within a channel
+    assert names(index.query(sort="channel")) == ["numpy", "pandas", "Sphinx", "numpydoc", "scipy"]
+    assert names(index.query(sort="channel", descending=True)) == [
+        "numpydoc",
+        "scipy",
+        "numpy",
+        "pandas",
+        "Sphinx",
+    ]
+
+    with pytest.raises(ValueError):
+        index.query(sort="version")
+
+
+def test_query_channels(index):
+    assert names(index.query(channels=["pkgs/main"])) == ["numpydoc", "scipy"]
+    assert names(index.query(channels=["conda.anaconda.org/.../conda-forge"])) == [
+        "numpy",
+        "pandas",
+        "Sphinx",
+    ]
+    assert names(index.query(channels=["https://conda.anaconda.org/conda-forge/noarch"])) == [
+        "pandas",
+        "Sphinx",
+    ]
+
+
+def test_query_search(index):
+    # Packages starting with the term first
+    assert names(index.query(q="P")) == ["pandas", "numpy", "numpydoc", "scipy", "Sphinx"]
+    assert names(index.query(q="numpy", descending=True)) == ["numpydoc", "numpy"]
+    page = index.query(q="py", limit=1)
+    assert names(page) == ["numpy"]
+    assert page["total"] == 3
+
+
+def test_query_excluded(index):
+    page = index.query(excluded=["numpy", "scipy"], q="p")
+    assert names(page) == ["pandas", "numpydoc", "Sphinx"]
+    assert page["total"] == 3
+
+
+def test_query_installed(index):
+    installed = [
+        {
+            "name": "numpy",
+            "channel": "conda-forge",
+            "version": "0.9",
+            "build_number": 1,
+            "build_string": "py_1",
+        },
+        {
+            "name": "local",
+            "channel": "<develop>",
+            "version": "0.1",
+            "build_number": 0,
+            "build_string": "dev",
+        },
+    ]
+
+    page = index.query(installed=installed)
+
+    assert names(page) == ["local", "numpy"]
+    local, numpy = page["packages"]
+    assert local["version"] == ["0.1"]
+    assert local["version_installed"] == "0.1"
+    assert numpy["version"] == ["1.0", "0.9"]
+    assert numpy["version_installed"] == "0.9"
+    # The catalog is not modified
+    assert index.get("numpy")["version"] == ["1.0"]
+    assert "version_installed" not in index.get("numpy")
+
+
+def test_load_index(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text(json.dumps({"packages": [make_package("a")], "with_description": False}))
+
+    index = load_index(str(path))
+
+    assert len(index) == 1
+    assert load_index(str(path)) is index
+
+
+def test_load_index_version_keys(tmp_path):
+    path = tmp_path / "catalog.json"
+    catalog = {
+        "packages": [make_package("a", versions=("1.0",))],
+        "with_description": False,
+        "version_keys": {"1.0": list(version_key("1.0"))},
+    }
+    path.write_text(json.dumps(catalog))
+
+    try:
+        with mock.patch("mamba_gator.catalogindex.store_version_keys") as store:
+            load_index(str(path))
+        store.assert_called_once_with(catalog["version_keys"])
+    finally:
+        load_index.cache_clear()
@@ -0,0 +1,157 @@
+import json
+
+import pytest
+
+from mamba_gator.catalogtable import CatalogTable, TextColumn, json_default
+from mamba_gator.versions import version_key
+
+
+def make_package(name, versions=("1.0",), channel="conda-forge", **fields):
+    package = {
+        "build_number": list(range(len(versions))),
+        "build_string": ["py_{}".format(i) for i in range(len(versions))],
+        "channel": channel,
+        "name": name,
+        "platform": None,
+        "version": list(versions),
+        "summary": "",
+        "home": "",
+        "keywords": [],
+        "tags": [],
+    }
+    package.update(fields)
+    return package
+
+
+PACKAGES = [
+    make_package("numpy", ("2.0.0", "1.26.4"), summary="Arrays", keywords=["array"]),
+    make_package("pandas", ("2.2.2",), channel="pkgs/main", home="https://pandas.pydata.org"),
+    make_package("tqdm", ("4.66.1", "4.66.0"), summary="Progress bar ✓", tags=["cli"]),
+    make_package("zero", ()),
+]
+
+
+def test_catalog_table():
+    table = CatalogTable(PACKAGES)
+
+    assert len(table) == 4
+    assert list(table) == PACKAGES
+    assert table[1] == PACKAGES[1]
+    assert table[-1] == PACKAGES[-1]
+    with pytest.raises(IndexError):
+        table[4]
+    assert table.names == ["numpy", "pandas", "tqdm", "zero"]
+    assert table.position("tqdm") == 2
+    assert table.get("tqdm") == PACKAGES[2]
+    assert table.get("scipy") is None
+
+
+def test_catalog_table_interned_values():
+    table = CatalogTable(PACKAGES)
+
+    first, third = table[0], table[2]
+    assert first["channel"] is third["channel"]
+    assert first["version"][0] is table[0]["version"][0]
+    # The entries are formatted on access
+    first["version"].append("0.1")
+    assert table[0] == PACKAGES[0]
+
+
+def test_catalog_table_partial_entries():
+    packages = [
+        {"name": "a", "version": ["1.0"], "build_number": [0], "build_string": ["h_0"]},
+        {
+            "name": "b",
+            "version": ["1.0"],
+            "build_number": [0],
+            "build_string": ["h_0"],
+            "summary": "B",
+        },
+    ]
+
+    table = CatalogTable(packages)
+
+    assert list(table) == packages
+    assert table.column("summary") == [None, "B"]
+
+
+@pytest.mark.parametrize(
+    "entry",
+    [
+        # Unknown field
+        dict(make_package("a"), license="MIT"),
+        # Values of the installed packages
+        {"name": "a", "version": "1.0", "build_number": 0, "build_string": "h_0"},
+        {"name": "a", "version": ["1.0"], "build_number": [True], "build_string": ["h_0"]},
+        dict(make_package("a"), keywords=None),
+        dict(make_package("a"), build_string=["h\x00_0"]),
+    ],
+)
+def test_catalog_table_irregular_entries(entry):
+    table = CatalogTable([PACKAGES[0], entry, PACKAGES[1]])
+
+    assert list(table) == [PACKAGES[0], entry, PACKAGES[1]]
+    assert table.column("name") == ["numpy", "a", "pandas"]
+    assert table.column("keywords")[1] == entry.get("keywords")
+
+
+def test_catalog_table_columns():
+    table = CatalogTable(PACKAGES)
+
+    assert table.column("channel") == ["conda-forge", "pkgs/main", "conda-forge", "conda-forge"]
+    assert table.column("summary") == ["Arrays", "", "Progress bar ✓", ""]
+    assert table.column("keywords") == [["array"], [], [], []]
+    with pytest.raises(ValueError):
+        table.column("version")
+
+
+def test_catalog_table_version_keys():
+    table = CatalogTable(PACKAGES + [{"name": "odd", "version": ["0.1", "not a version"]}])
+
+    keys = table.version_keys()
+
+    assert list(keys) == ["0.1", "1.26.4", "2.0.0", "2.2.2", "4.66.0", "4.66.1"]
+    assert keys["2.0.0"] == list(version_key("2.0.0"))
+    assert json.loads(json.dumps(keys)) == keys
+
+
+def test_catalog_table_duplicate():
+    table = CatalogTable(PACKAGES)
+
+    with pytest.raises(ValueError):
+        table.append(make_package("numpy"))
+
+
+@pytest.mark.parametrize("shared", [True, False])
+def test_catalog_table_append_from(shared):
+    table = CatalogTable(PACKAGES)
+    copy = CatalogTable(pool=table.pool if shared else None)
+
+    for position in (2, 0, 3):
+        copy.append_from(table, position)
+    copy.append(make_package("black", ("24.1",)))
+
+    assert list(copy) == [PACKAGES[2], PACKAGES[0], PACKAGES[3], make_package("black", ("24.1",))]
+    assert (copy.pool is table.pool) == shared
+
+
+def test_text_column():
+    column = TextColumn()
+    for text in ("a", "", "été", "b\x00c"):
+        column.append(text)
+    copy = TextColumn()
+    copy.append("z")
+    copy.extend_from(column, 1, 4)
+
+    assert len(column) == 4
+    assert column[2] == "été"
+    assert column.slice(0, 4) == ["a", "", "été", "b\x00c"]
+    assert copy.slice(0, 4) == ["z", "", "été", "b\x00c"]
+
+
+def test_json_default():
+    catalog = {"packages": CatalogTable(PACKAGES), "with_description": True}
+
+    assert json.dumps(catalog, default=json_default) == json.dumps(dict(catalog, packages=PACKAGES))
+    with pytest.raises(TypeError):
+        json.dumps({"a": object()}, default=json_default)
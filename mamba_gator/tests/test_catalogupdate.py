@@ -0,0 +1,208 @@
+from unittest import mock
+
+from mamba_gator.catalog import CatalogBuilder, update_packages
+from mamba_gator.catalogupdate import CatalogUpdater, is_version
+from mamba_gator.versions import version_key
+
+CHANNEL = "https://conda.anaconda.org/conda-forge"
+TR_CHANNELS = {CHANNEL: "conda-forge"}
+
+
+def record(name, version, build_number=0):
+    return {
+        "build": "h{}_{}".format(version, build_number),
+        "build_number": build_number,
+        "channel": CHANNEL + "/linux-64",
+        "name": name,
+        "subdir": "linux-64",
+        "version": version,
+    }
+
+
+def builder(*records):
+    catalog = CatalogBuilder()
+    for entry in records:
+        catalog.add(entry)
+    return catalog
+
+
+def listed(catalog):
+    return dict(catalog, packages=list(catalog["packages"]))
+
+
+RECORDS = (record("numpy", "1.26.4"), record("numpy", "2.0.0"), record("scipy", "1.13.0"), record("tqdm", "4.66.1"))
+PKG_INFO = {"numpy": {"summary": "Arrays"}, "tqdm": {"summary": "Progress bar"}}
+
+
+def test_update_catalog():
+    updater = CatalogUpdater()
+    epoch, count = updater.version.split(":")
+
+    catalog, changes = updater.update(builder(*RECORDS), PKG_INFO, TR_CHANNELS)
+
+    assert count == "0"
+    assert updater.version == epoch + ":1"
+    assert listed(catalog) == {
+        "packages": update_packages(builder(*RECORDS).packages(), PKG_INFO, TR_CHANNELS),
+        "with_description": True,
+        "version": epoch + ":1",
+        "version_keys": {
+            "1.13.0": list(version_key("1.13.0")),
+            "1.26.4": list(version_key("1.26.4")),
+            "2.0.0": list(version_key("2.0.0")),
+            "4.66.1": list(version_key("4.66.1")),
+        },
+    }
+    assert changes == {
+        "version": epoch + ":1",
+        "since": epoch + ":0",
+        "added": ["numpy", "scipy", "tqdm"],
+        "updated": [],
+        "removed": [],
+    }
+    assert list(updater.history) == [changes]
+
+
+def test_update_catalog_unchanged():
+    updater = CatalogUpdater()
+    first, _ = updater.update(builder(*RECORDS), PKG_INFO, TR_CHANNELS)
+
+    with mock.patch.object(CatalogBuilder, "packages", autospec=True, return_value=[]) as packages:
+        catalog, changes = updater.update(builder(*reversed(RECORDS)), dict(PKG_INFO), TR_CHANNELS)
+
+    # Nothing is formatted again
+    packages.assert_called_once_with(mock.ANY, [])
+    assert listed(catalog) == listed(first)
+    # The tables share their interned values
+    assert catalog["packages"].pool is first["packages"].pool
+    assert changes == {
+        "version": first["version"],
+        "since": first["version"],
+        "added": [],
+        "updated": [],
+        "removed": [],
+    }
+    assert len(updater.history) == 1
+
+
+def test_update_catalog_changes():
+    updater = CatalogUpdater()
+    first, _ = updater.update(builder(*RECORDS), PKG_INFO, TR_CHANNELS)
+    records = RECORDS[:2] + (record("numpy", "2.1.0"), record("tqdm", "4.66.1"), record("black", "24.1"))
+    pkg_info = {"numpy": {"summary": "Arrays"}, "tqdm": {"summary": "Progress bars"}}
+
+    with mock.patch.object(CatalogBuilder, "packages", autospec=True, side_effect=CatalogBuilder.packages) as packages:
+        catalog, changes = updater.update(builder(*records), pkg_info, TR_CHANNELS)
+
+    assert sorted(packages.call_args[0][1]) == ["black", "numpy", "tqdm"]
+    assert changes == {
+        "version": updater.version,
+        "since": first["version"],
+        "added": ["black"],
+        "updated": ["numpy", "tqdm"],
+        "removed": ["scipy"],
+    }
+    assert listed(catalog) == {
+        "packages": update_packages(builder(*records).packages(), pkg_info, TR_CHANNELS),
+        "with_description": True,
+        "version": updater.version,
+        "version_keys": mock.ANY,
+    }
+    assert sorted(catalog["version_keys"]) == ["1.26.4", "2.0.0", "2.1.0", "24.1", "4.66.1"]
+    assert [c["version"] for c in updater.history] == [first["version"], updater.version]
+
+
+def test_update_catalog_channels_changed():
+    updater = CatalogUpdater()
+    updater.update(builder(*RECORDS), PKG_INFO, TR_CHANNELS)
+
+    catalog, changes = updater.update(builder(*RECORDS), PKG_INFO, {CHANNEL: "forge"})
+
+    assert changes["updated"] == ["numpy", "scipy", "tqdm"]
+    assert {p["channel"] for p in catalog["packages"]} == {"forge"}
+
+
+def test_update_catalog_formatted_packages():
+    updater = CatalogUpdater()
+    first, _ = updater.update(builder(*RECORDS), PKG_INFO, TR_CHANNELS)
+
+    # Packages formatted by a process pool
+    catalog, changes = updater.update(builder(*RECORDS).packages(), PKG_INFO, TR_CHANNELS)
+
+    assert listed(catalog) == listed(first)
+    assert changes["version"] == first["version"]
+
+
+def test_update_cached_catalog():
+    cached = update_packages(builder(*RECORDS).packages(), PKG_INFO, TR_CHANNELS)
+    updater = CatalogUpdater(cached, version="5eed:7")
+
+    catalog, changes = updater.update(builder(*RECORDS[:3]), PKG_INFO, TR_CHANNELS)
+
+    assert changes == {
+        "version": "5eed:8",
+        "since": "5eed:7",
+        "added": [],
+        "updated": [],
+        "removed": ["tqdm"],
+    }
+    assert list(catalog["packages"]) == cached[:2]
+
+
+def test_catalog_changes_since():
+    updater = CatalogUpdater()
+    versions = [updater.version]
+    updater.update(builder(*RECORDS), PKG_INFO, TR_CHANNELS)
+    versions.append(updater.version)
+    updater.update(builder(*RECORDS[:3]), PKG_INFO, TR_CHANNELS)
+    versions.append(updater.version)
+    updater.update(builder(*RECORDS[:3], record("black", "24.1")), PKG_INFO, TR_CHANNELS)
+    versions.append(updater.version)
+    v0, v1, v2, v3 = versions
+
+    assert updater.changes_since(v3, v3) == []
+    assert updater.changes_since(v2, v3) == ["black"]
+    assert updater.changes_since(v1, v3) == ["black", "tqdm"]
+    assert updater.changes_since(v1, v2) == ["tqdm"]
+    assert updater.changes_since(v0, v3) == ["black", "numpy", "scipy", "tqdm"]
+    # Unknown versions
+    assert updater.changes_since(v3, v2) is None
+    assert updater.changes_since(v1, v3 + "0") is None
+
+
+def test_catalog_changes_since_other_catalog():
+    updater = CatalogUpdater()
+    other = CatalogUpdater()
+    for catalog in (updater, other):
+        catalog.update(builder(*RECORDS), PKG_INFO, TR_CHANNELS)
+        catalog.update(builder(*RECORDS[:3]), PKG_INFO, TR_CHANNELS)
+
+    # Both catalogs had as many updates, their versions differ all the same
+    assert updater.version != other.version
+    assert updater.changes_since(other.history[0]["version"], updater.version) is None
+
+
+def test_catalog_changes_since_history():
+    updater = CatalogUpdater(version="5eed:7")
+
+    assert updater.changes_since("5eed:6", "5eed:7") is None
+
+    with mock.patch("mamba_gator.catalogupdate.CHANGES_HISTORY", 2):
+        updater = CatalogUpdater()
+    versions = [updater.version]
+    for count in range(1, 4):
+        updater.update(builder(*RECORDS[:count]), PKG_INFO, TR_CHANNELS)
+        versions.append(updater.version)
+
+    assert updater.changes_since(versions[1], versions[3]) == ["numpy", "scipy"]
+    # The oldest changes are dropped
+    assert updater.changes_since(versions[0], versions[3]) is None
+
+
+def test_catalog_version():
+    assert is_version(CatalogUpdater().version)
+    assert is_version("5eed:7")
+    # A catalog cached without a valid version starts a new one
+    assert CatalogUpdater(version="7").version.endswith(":0")
+    for value in (None, 7, "", "7", "5eed:", "5eed:-1", "a:b:1"):
+        assert not is_version(value)
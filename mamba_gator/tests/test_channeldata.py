@@ -0,0 +1,286 @@
+import asyncio
+import json
+import time
+from unittest import mock
+
+import pytest
+import tornado.httpserver
+import tornado.testing
+import tornado.web
+
+from mamba_gator.channeldata import (
+    ChannelDataCache,
+    CircuitBreaker,
+    compact_packages,
+    fetch_channeldata,
+)
+
+LAST_MODIFIED = "Wed, 21 Oct 2015 07:28:00 GMT"
+
+
+class ChannelDataHandler(tornado.web.RequestHandler):
+    """channeldata.json of a stand-in channel."""
+
+    def initialize(self, packages=None, delay=0.0, status=200):
+        self.packages = packages
+        self.delay = delay
+        self.status = status
+
+    async def get(self, channel):
+        self.settings["requests"].append(channel)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.set_status(self.status)
+        self.finish(json.dumps({"channeldata_version": 1, "packages": self.packages}))
+
+
+class DatedChannelDataHandler(ChannelDataHandler):
+    """channeldata.json validated by its modification date."""
+
+    def compute_etag(self):
+        return None
+
+    async def get(self, channel):
+        if self.request.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            self.settings["requests"].append(channel)
+            self.set_status(304)
+            self.finish()
+        else:
+            self.set_header("Last-Modified", LAST_MODIFIED)
+            await super().get(channel)
+
+
+@pytest.fixture
+def channels_server(jp_asyncio_loop):
+    """Stand-in channels server returning its base URL and the channels requested."""
+    requests = []
+    app = tornado.web.Application(
+        [
+            (
+                r"/(first)/channeldata.json",
+                ChannelDataHandler,
+                {"packages": {"a": {"summary": "first a"}, "b": {"summary": "first b"}}},
+            ),
+            (
+                r"/(second)/channeldata.json",
+                ChannelDataHandler,
+                {"packages": {"b": {"summary": "second b"}}},
+            ),
+            (
+                r"/(slow)/channeldata.json",
+                ChannelDataHandler,
+                {"packages": {"s": {"summary": "slow"}}, "delay": 0.5},
+            ),
+            (r"/(missing)/channeldata.json", ChannelDataHandler, {"status": 404}),
+            (
+                r"/(dated)/channeldata.json",
+                DatedChannelDataHandler,
+                {"packages": {"d": {"summary": "dated", "license": "MIT"}}},
+            ),
+        ],
+        requests=requests,
+    )
+    sock, port = tornado.testing.bind_unused_port()
+
+    async def start():
+        server = tornado.httpserver.HTTPServer(app)
+        server.add_socket(sock)
+        return server
+
+    server = jp_asyncio_loop.run_until_complete(start())
+    yield "http://127.0.0.1:{}".format(port), requests
+    server.stop()
+    sock.close()
+
+
+@pytest.fixture
+def dead_channel():
+    """URL of a channel refusing the connections."""
+    sock, port = tornado.testing.bind_unused_port()
+    sock.close()
+    return "http://127.0.0.1:{}/dead".format(port)
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(10, max_delay=30)
+    now = 1000.0
+    with mock.patch("mamba_gator.channeldata.time.monotonic", side_effect=lambda: now):
+        assert breaker.allowed("a")
+
+        breaker.failure("a")
+        assert not breaker.allowed("a")
+        assert breaker.allowed("b")
+        now += 10
+        assert breaker.allowed("a")
+
+        # The delay doubles at each consecutive failure
+        breaker.failure("a")
+        now += 10
+        assert not breaker.allowed("a")
+        now += 10
+        assert breaker.allowed("a")
+
+        # Up to the maximal delay
+        breaker.failure("a")
+        breaker.failure("a")
+        now += 30
+        assert breaker.allowed("a")
+
+        breaker.success("a")
+        breaker.failure("a")
+        now += 10
+        assert breaker.allowed("a")
+
+
+async def test_fetch_channeldata_order(channels_server):
+    base_url, requests = channels_server
+
+    pkg_info = await fetch_channeldata(
+        [base_url + "/first", base_url + "/second"], breaker=CircuitBreaker(60)
+    )
+
+    # The last channel wins
+    assert pkg_info == {"a": {"summary": "first a"}, "b": {"summary": "second b"}}
+    assert sorted(requests) == ["first", "second"]
+
+
+async def test_fetch_channeldata_local(tmp_path):
+    channel = tmp_path / "channel"
+    channel.mkdir()
+    (channel / "channeldata.json").write_text(json.dumps({"packages": {"a": {"summary": "local"}}}))
+
+    pkg_info = await fetch_channeldata([channel.as_uri()], breaker=CircuitBreaker(60))
+
+    assert pkg_info == {"a": {"summary": "local"}}
+
+
+async def test_fetch_channeldata_concurrently(channels_server):
+    base_url, requests = channels_server
+    channels = [base_url + "/slow"] * 4
+
+    start = time.monotonic()
+    pkg_info = await fetch_channeldata(channels, concurrency=4, breaker=CircuitBreaker(60))
+    elapsed = time.monotonic() - start
+
+    assert pkg_info == {"s": {"summary": "slow"}}
+    assert len(requests) == 4
+    # 4 x 0.5 s if fetched one after the other
+    assert elapsed < 1.5
+
+
+async def test_fetch_channeldata_bounded_concurrency(channels_server):
+    base_url, requests = channels_server
+    channels = [base_url + "/slow"] * 4
+
+    start = time.monotonic()
+    await fetch_channeldata(channels, concurrency=2, breaker=CircuitBreaker(60))
+    elapsed = time.monotonic() - start
+
+    assert len(requests) == 4
+    assert elapsed >= 1.0
+
+
+async def test_fetch_channeldata_skip_failures(channels_server, dead_channel):
+    base_url, requests = channels_server
+    breaker = CircuitBreaker(60)
+    channels = [
+        base_url + "/first",
+        dead_channel,
+        base_url + "/missing",
+        base_url + "/slow",
+    ]
+
+    start = time.monotonic()
+    pkg_info = await fetch_channeldata(channels, timeout=0.2, breaker=breaker)
+    elapsed = time.monotonic() - start
+
+    # The slow channel timed out
+    assert pkg_info == {"a": {"summary": "first a"}, "b": {"summary": "first b"}}
+    assert elapsed < 2
+    assert breaker.allowed(base_url + "/first")
+    assert not breaker.allowed(dead_channel)
+    assert not breaker.allowed(base_url + "/missing")
+    assert not breaker.allowed(base_url + "/slow")
+
+    # The failed channels are not requested again before the retry delay
+    del requests[:]
+    pkg_info = await fetch_channeldata(channels, timeout=0.2, breaker=breaker)
+
+    assert pkg_info == {"a": {"summary": "first a"}, "b": {"summary": "first b"}}
+    assert requests == ["first"]
+
+
+def test_compact_packages():
+    packages = {
+        "a": {
+            "summary": "A",
+            "home": "https://a.org",
+            "keywords": None,
+            "tags": [],
+            "license": "MIT",
+            "subdirs": ["noarch"],
+        },
+        "b": {"keywords": ["b"]},
+    }
+
+    assert compact_packages(packages) == {
+        "a": {"summary": "A", "home": "https://a.org"},
+        "b": {"keywords": ["b"]},
+    }
+
+
+def test_channeldata_cache(tmp_path):
+    cache = ChannelDataCache(str(tmp_path))
+    url = "https://conda.anaconda.org/conda-forge/linux-64"
+
+    assert cache.get(url) is None
+
+    cache.put(url, {"a": {"summary": "A"}}, etag='"1"')
+    entry = cache.get(url)
+
+    assert entry["packages"] == {"a": {"summary": "A"}}
+    assert entry["etag"] == '"1"'
+    assert entry["last_modified"] is None
+    assert cache.get(url + "/other") is None
+
+
+@pytest.mark.parametrize(
+    "channel,packages",
+    [
+        # Validated by ETag
+        ("first", {"a": {"summary": "first a"}, "b": {"summary": "first b"}}),
+        # Validated by Last-Modified
+        ("dated", {"d": {"summary": "dated"}}),
+    ],
+)
+async def test_fetch_channeldata_revalidate(channels_server, tmp_path, channel, packages):
+    base_url, requests = channels_server
+    cache = ChannelDataCache(str(tmp_path))
+    url = base_url + "/" + channel
+
+    assert await fetch_channeldata([url], breaker=CircuitBreaker(60), cache=cache) == packages
+    entry = cache.get(url)
+    assert entry["packages"] == packages
+    assert entry["etag"] or entry["last_modified"]
+
+    # Not modified - the cached data are returned
+    cache.put(url, {"c": {"summary": "cached"}}, entry["etag"], entry["last_modified"])
+    pkg_info = await fetch_channeldata([url], breaker=CircuitBreaker(60), cache=cache)
+
+    assert pkg_info == {"c": {"summary": "cached"}}
+    assert requests == [channel, channel]
+
+
+async def test_fetch_channeldata_cached_fallback(dead_channel, tmp_path):
+    cache = ChannelDataCache(str(tmp_path))
+    cache.put(dead_channel, {"a": {"summary": "cached"}})
+    breaker = CircuitBreaker(60)
+
+    assert await fetch_channeldata([dead_channel], breaker=breaker, cache=cache) == {
+        "a": {"summary": "cached"}
+    }
+    # Also when the channel is skipped
+    assert not breaker.allowed(dead_channel)
+    assert await fetch_channeldata([dead_channel], breaker=breaker, cache=cache) == {
+        "a": {"summary": "cached"}
+    }
@@ -0,0 +1,181 @@
+import json
+import shutil
+import subprocess
+import sys
+from unittest import mock
+from unittest.mock import AsyncMock
+
+import pytest
+
+from mamba_gator.condameta import read_prefix_packages
+from mamba_gator.envmanager import EnvManager
+
+SP_DIR = "Lib/site-packages" if sys.platform == "win32" else "lib/python3.12/site-packages"
+
+
+def add_conda_package(prefix, name, version, build, subdir="linux-64", channel="conda-forge", files=()):
+    meta = {
+        "build": build,
+        "build_number": 3,
+        "channel": "https://conda.anaconda.org/{}/{}".format(channel, "linux-64"),
+        "files": list(files),
+        "fn": "{}-{}-{}.conda".format(name, version, build),
+        "name": name,
+        "subdir": subdir,
+        "url": "https://conda.anaconda.org/{}/{}/{}-{}-{}.conda".format(
+            channel, subdir, name, version, build
+        ),
+        "version": version,
+    }
+    folder = prefix / "conda-meta"
+    folder.mkdir(exist_ok=True)
+    (folder / "{}-{}-{}.json".format(name, version, build)).write_text(json.dumps(meta))
+    for file in files:
+        path = prefix / file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+
+
+def add_pip_package(prefix, name, version, editable=False):
+    dist_info = prefix / SP_DIR / "{}-{}.dist-info".format(name, version)
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text(
+        "Metadata-Version: 2.1\nName: {}\nVersion: {}\n".format(name, version)
+    )
+    (dist_info / "RECORD").write_text("")
+    if editable:
+        (dist_info / "direct_url.json").write_text(
+            json.dumps({"url": "file:///src", "dir_info": {"editable": True}})
+        )
+
+
+@pytest.fixture
+def prefix(tmp_path):
+    add_conda_package(tmp_path, "python", "3.12.1", "h1_0_cpython")
+    add_conda_package(
+        tmp_path,
+        "requests",
+        "2.31.0",
+        "pyhd8ed1ab_0",
+        subdir="noarch",
+        files=("{}/requests-2.31.0.dist-info/RECORD".format(SP_DIR),),
+    )
+    add_pip_package(tmp_path, "Gator_Pkg.Name", "1.0")
+    add_pip_package(tmp_path, "gator-dev", "0.1", editable=True)
+    return tmp_path
+
+
+def test_read_prefix_packages(prefix):
+    assert read_prefix_packages(str(prefix)) == [
+        {
+            "base_url": "https://conda.anaconda.org/pypi",
+            "build_number": 0,
+            "build_string": "pypi_0",
+            "channel": "pypi",
+            "dist_name": "gator-dev-0.1-pypi_0",
+            "editable": True,
+            "name": "gator-dev",
+            "platform": "pypi",
+            "version": "0.1",
+        },
+        {
+            "base_url": "https://conda.anaconda.org/pypi",
+            "build_number": 0,
+            "build_string": "pypi_0",
+            "channel": "pypi",
+            "dist_name": "gator-pkg-name-1.0-pypi_0",
+            "editable": False,
+            "name": "gator-pkg-name",
+            "platform": "pypi",
+            "version": "1.0",
+        },
+        {
+            "base_url": "https://conda.anaconda.org/conda-forge",
+            "build_number": 3,
+            "build_string": "h1_0_cpython",
+            "channel": "conda-forge",
+            "dist_name": "python-3.12.1-h1_0_cpython",
+            "name": "python",
+            "platform": "linux-64",
+            "version": "3.12.1",
+        },
+        {
+            "base_url": "https://conda.anaconda.org/conda-forge",
+            "build_number": 3,
+            "build_string": "pyhd8ed1ab_0",
+            "channel": "conda-forge",
+            "dist_name": "requests-2.31.0-pyhd8ed1ab_0",
+            "name": "requests",
+            "platform": "noarch",
+            "version": "2.31.0",
+        },
+    ]
+
+
+def test_read_prefix_packages_unexpected_channel(prefix):
+    add_conda_package(prefix, "private", "1.0", "0")
+    meta_file = prefix / "conda-meta" / "private-1.0-0.json"
+    meta = json.loads(meta_file.read_text())
+    meta["url"] = "https://my.server.org/channel/linux-64/private-1.0-0.conda"
+    meta_file.write_text(json.dumps(meta))
+
+    assert read_prefix_packages(str(prefix)) is None
+
+
+def test_read_prefix_packages_egg_install(prefix):
+    (prefix / SP_DIR / "gator-egg.egg-link").write_text("/src\n.")
+
+    assert read_prefix_packages(str(prefix)) is None
+
+
+def test_read_prefix_packages_clobbered_package(prefix):
+    shutil.rmtree(prefix / SP_DIR / "requests-2.31.0.dist-info")
+
+    assert read_prefix_packages(str(prefix)) is None
+
+
+def test_read_prefix_packages_no_conda_meta(tmp_path):
+    assert read_prefix_packages(str(tmp_path)) is None
+
+
+async def test_env_packages_from_conda_meta(prefix):
+    manager = EnvManager("", None)
+    envs = {"environments": [{"name": "gator", "dir": str(prefix), "is_default": False}]}
+    with mock.patch.object(
+        manager, "list_envs", new_callable=AsyncMock, return_value=envs
+    ), mock.patch.object(manager, "_execute", new_callable=AsyncMock) as f:
+        packages = (await manager.env_packages("gator"))["packages"]
+
+    f.assert_not_called()
+    assert [(p["name"], p["channel"]) for p in packages] == [
+        ("gator-dev", "<develop>"),
+        ("gator-pkg-name", "pypi"),
+        ("python", "conda-forge"),
+        ("requests", "conda-forge"),
+    ]
+
+
+async def test_env_packages_fall_back_to_conda(tmp_path):
+    manager = EnvManager("", None)
+    envs = {"environments": [{"name": "gator", "dir": str(tmp_path), "is_default": False}]}
+    with mock.patch.object(
+        manager, "list_envs", new_callable=AsyncMock, return_value=envs
+    ), mock.patch.object(manager, "_execute", new_callable=AsyncMock) as f:
+        f.return_value = (0, "[]")
+        assert await manager.env_packages("gator") == {"packages": []}
+
+    f.assert_called_once_with(manager.manager, "list", "--json", "-n", "gator")
+
+
+@pytest.mark.skipif(shutil.which("conda") is None, reason="conda not found")
+def test_read_prefix_packages_matches_conda_list():
+    conda = shutil.which("conda")
+    info = json.loads(subprocess.check_output([conda, "info", "--json"]))
+    packages = read_prefix_packages(info["root_prefix"])
+    if packages is None:
+        pytest.skip("base environment layout not supported")
+    for package in packages:
+        package.pop("editable", None)
+
+    expected = json.loads(subprocess.check_output([conda, "list", "--json", "-n", "base"]))
+    assert packages == expected
@@ -0,0 +1,151 @@
+import json
+import os
+import shutil
+import sys
+from unittest import mock
+from unittest.mock import AsyncMock
+
+import pytest
+
+from mamba_gator.condaworker import CondaWorker, CondaWorkerError, find_conda_python
+from mamba_gator.envmanager import EnvManager
+
+
+def get_conda_python():
+    python = find_conda_python()
+    if python is None:
+        conda = shutil.which("conda")
+        if conda is not None:
+            with mock.patch.dict(os.environ, {"CONDA_EXE": os.path.realpath(conda)}):
+                os.environ.pop("CONDA_PYTHON_EXE", None)
+                python = find_conda_python()
+    return python
+
+
+conda_python = get_conda_python()
+requires_conda = pytest.mark.skipif(
+    conda_python is None, reason="conda interpreter not found"
+)
+
+
+@requires_conda
+async def test_worker_execute():
+    worker = CondaWorker(conda_python)
+    try:
+        rcode, output, _ = await worker.execute(["info", "--json"])
+        assert rcode == 0
+        assert "conda_version" in json.loads(output)
+        pid = worker.pid
+
+        rcode, output, _ = await worker.execute(["config", "--show", "--json"])
+        assert rcode == 0
+        assert "channels" in json.loads(output)
+        assert worker.pid == pid
+    finally:
+        await worker.shutdown()
+
+
+@requires_conda
+async def test_worker_command_failure():
+    worker = CondaWorker(conda_python)
+    try:
+        rcode, output, _ = await worker.execute(
+            ["list", "--json", "-n", "_gator_missing_environment"]
+        )
+        assert rcode != 0
+        assert json.loads(output)["exception_name"] == "EnvironmentLocationNotFound"
+        assert worker.pid is not None
+    finally:
+        await worker.shutdown()
+
+
+@requires_conda
+async def test_worker_restart_after_crash():
+    worker = CondaWorker(conda_python)
+    try:
+        await worker.execute(["info", "--json"])
+        pid = worker.pid
+        os.kill(pid, 9)
+
+        rcode, _, _ = await worker.execute(["info", "--json"])
+        assert rcode == 0
+        assert worker.pid not in (None, pid)
+    finally:
+        await worker.shutdown()
+
+
+@requires_conda
+async def test_worker_list_after_change(tmp_path):
+    prefix = tmp_path / "envs" / "gator_list"
+    meta = prefix / "conda-meta"
+    meta.mkdir(parents=True)
+    (meta / "history").write_text("")
+
+    def install(name, version):
+        record = {
+            "name": name,
+            "version": version,
+            "build": "h_0",
+            "build_number": 0,
+            "channel": "https://conda.anaconda.org/conda-forge/noarch",
+            "subdir": "noarch",
+            "fn": "{}-{}-h_0.conda".format(name, version),
+            "depends": [],
+        }
+        (meta / "{}-{}-h_0.json".format(name, version)).write_text(json.dumps(record))
+
+    install("numpy", "2.0.0")
+    with mock.patch.dict(os.environ, {"CONDA_ENVS_DIRS": str(tmp_path / "envs")}):
+        worker = CondaWorker(conda_python)
+        try:
+            first = await worker.call("list", "gator_list")
+            install("tqdm", "4.66.1")
+            second = await worker.call("list", "gator_list")
+        finally:
+            await worker.shutdown()
+
+    assert [p["name"] for p in first] == ["numpy"]
+    # The installed packages are read again on every call
+    assert [p["name"] for p in second] == ["numpy", "tqdm"]
+
+
+async def test_worker_unavailable_after_failures():
+    worker = CondaWorker(sys.executable)
+    with mock.patch("mamba_gator.condaworker.SERVER_SCRIPT", "-c"):
+        for _ in range(3):
+            with pytest.raises(CondaWorkerError):
+                await worker.execute(["info", "--json"])
+    assert not worker.available
+
+
+async def test_envmanager_uses_worker_for_read_commands():
+    manager = EnvManager("", None)
+    worker = CondaWorker(sys.executable)
+    manager._conda_worker = worker
+    with mock.patch.object(worker, "execute", new_callable=AsyncMock) as f:
+        f.return_value = (0, '{"channels": []}', "")
+
+        rcode, output = await manager._execute("conda", "config", "--show", "--json")
+        assert (rcode, output) == (0, '{"channels": []}')
+        f.assert_called_once_with(("config", "--show", "--json"))
+
+        f.reset_mock()
+        rcode, output = await manager._execute(sys.executable, "-c", "print('cli')")
+        assert (rcode, output.strip()) == (0, "cli")
+        f.assert_not_called()
+
+
+async def test_envmanager_worker_fallback_to_cli():
+    manager = EnvManager("", None)
+    worker = CondaWorker(sys.executable)
+    manager._conda_worker = worker
+    with mock.patch.object(worker, "execute", new_callable=AsyncMock) as f:
+        f.side_effect = CondaWorkerError("crashed")
+        with mock.patch.object(
+            manager, "_execute_process", new_callable=AsyncMock
+        ) as cli:
+            cli.return_value = (0, "{}", "")
+            rcode, output = await manager._execute("conda", "info", "--json")
+
+    assert (rcode, output) == (0, "{}")
+    cli.assert_called_once_with(["conda", "info", "--json"], None)
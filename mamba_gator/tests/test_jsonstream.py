@@ -0,0 +1,113 @@
+import json
+import random
+
+import pytest
+
+from mamba_gator.jsonstream import JsonRecordStream, extract_json
+
+from .utils import make_payload
+
+
+def parse(stream, data, chunk_sizes):
+    rng = random.Random(0)
+    records = []
+    position = 0
+    while position < len(data):
+        size = rng.choice(chunk_sizes)
+        records.extend(stream.feed(data[position : position + size]))
+        position += size
+    records.extend(stream.close())
+    return records
+
+
+@pytest.mark.parametrize("chunk_sizes", ((1, 2, 3), (7, 100, 5000), (1 << 16,)))
+def test_stream_records(chunk_sizes):
+    payload = make_payload(500)
+    payload["result"]["msg"] = "unicode: é ☃"
+    payload["result"]["extra"] = [True, -1.5e3, None]
+    data = json.dumps(payload, indent=1, ensure_ascii=False).encode("utf-8")
+
+    stream = JsonRecordStream(("result", "pkgs"))
+
+    assert parse(stream, data, chunk_sizes) == payload["result"]["pkgs"]
+    assert stream.done
+    assert stream.count == 500
+    assert stream.document == {
+        "query": payload["query"],
+        "result": {"msg": "unicode: é ☃", "extra": [True, -1.5e3, None]},
+    }
+
+
+def test_stream_records_any_key():
+    data = {"a": [{"name": "a"}], "b": [{"name": "b"}, {"name": "b", "version": "1"}]}
+
+    stream = JsonRecordStream((None,))
+
+    assert parse(stream, json.dumps(data), (5,)) == [
+        {"name": "a"},
+        {"name": "b"},
+        {"name": "b", "version": "1"},
+    ]
+    assert stream.document == {}
+
+
+def test_stream_keeps_error():
+    data = {"error": "PackagesNotFoundError", "exception_name": "PackagesNotFoundError"}
+
+    stream = JsonRecordStream((None,))
+
+    assert parse(stream, json.dumps(data), (3,)) == []
+    assert stream.document == data
+
+
+def test_stream_skips_surrounding_text():
+    data = 'Warning: {something} happened\n  {"a": [1, 2]}\nDone {}'
+
+    stream = JsonRecordStream((None,))
+
+    assert parse(stream, data, (4,)) == [1, 2]
+
+
+def test_stream_empty_output():
+    stream = JsonRecordStream((None,))
+
+    assert stream.feed(b"") == []
+    assert stream.close() == []
+    assert stream.document == {}
+
+
+@pytest.mark.parametrize(
+    "data",
+    (
+        '{"a": [1, 2',
+        '{"a": [1 2]}',
+        '{"a": [{"b": tru}]}',
+        '{"a" [1]}',
+        "not JSON",
+    ),
+)
+def test_stream_invalid(data):
+    stream = JsonRecordStream((None,))
+
+    with pytest.raises(ValueError):
+        parse(stream, data, (3, 50))
+
+
+@pytest.mark.parametrize(
+    "output",
+    (
+        '{"a": [null, -1, true]}',
+        '\n  {"a": [null, -1, true]}\n',
+        'Loading channels: done\nWARNING: {version} is outdated\n{\n  "a": [\n    null,\n    -1,\n    true\n  ]\n}\n',
+        '{"a": [null, -1, true]}\nRetrieving notices: ...working... done\n[done]\n',
+        '{"fetch": "a", "finished": false}\x00{"a": [null, -1, true]}',
+    ),
+)
+def test_extract_json(output):
+    assert extract_json(output) == {"a": [None, -1, True]}
+
+
+@pytest.mark.parametrize("output", ("", "Error: no JSON", '{"a": [1,\n  {"b": 2}]\nnoise'))
+def test_extract_json_invalid(output):
+    with pytest.raises(ValueError):
+        extract_json(output)
@@ -1,3 +1,6 @@
+import asyncio
+import sys
+import time
 from pathlib import Path
 
 import pytest
@@ -218,3 +221,113 @@ async def test_list_available_build_metadata_preserved():
 
             if versions and build_strings:
                 assert len(versions) == len(build_strings)
+
+
+async def test_package_search_formats_and_ranks():
+    """Test that the package manager search is merged in catalog entries and ranked."""
+    import json
+    from unittest import mock
+    from unittest.mock import AsyncMock
+
+    def record(name, version, build_number=0):
+        return {
+            "build": "py_{}".format(build_number),
+            "build_number": build_number,
+            "channel": "https://conda.anaconda.org/conda-forge/noarch",
+            "name": name,
+            "version": version,
+        }
+
+    search_output = json.dumps(
+        {
+            "astroid": [record("astroid", "2.15.8"), record("astroid", "3.0.1"), record("astroid", "3.0.1", 1)],
+            "pylint": [record("pylint", "3.0.2")],
+            "xastroid": [record("xastroid", "0.1")],
+        }
+    )
+
+    manager = EnvManager("", None)
+    with mock.patch.object(manager, "_execute", new_callable=AsyncMock) as exe:
+        exe.return_value = (0, search_output)
+        result = await manager.package_search("astroid")
+        limited = await manager.package_search("astroid", 1, True)
+
+    assert [p["name"] for p in result["packages"]] == ["astroid", "xastroid", "pylint"]
+    astroid = result["packages"][0]
+    assert astroid["version"] == ["3.0.1", "2.15.8"]
+    assert astroid["build_number"] == [1, 0]
+    assert astroid["build_string"] == ["py_1", "py_0"]
+    assert result["with_description"] is False
+    assert [p["name"] for p in limited["packages"]] == ["astroid"]
+
+
+async def test_execute_returns_output():
+    """Test that _execute returns the decoded output of the command."""
+    manager = EnvManager("", None)
+    rcode, output = await manager._execute(sys.executable, "-c", "print('hello')")
+    assert rcode == 0
+    assert output.strip() == "hello"
+
+
+async def test_execute_returns_error_on_failure():
+    """Test that _execute prepends stderr to the output when the command fails."""
+    manager = EnvManager("", None)
+    code = "import sys; print('out'); sys.stderr.write('err'); sys.exit(3)"
+    rcode, output = await manager._execute(sys.executable, "-c", code)
+    assert rcode == 3
+    assert output.startswith("err")
+    assert "out" in output
+
+
+async def test_execute_does_not_hold_executor_threads():
+    """Test that running commands do not block the default executor."""
+    manager = EnvManager("", None)
+    loop = asyncio.get_running_loop()
+    code = "import time; time.sleep(1.0)"
+    commands = [
+        asyncio.ensure_future(manager._execute(sys.executable, "-c", code))
+        for _ in range(64)
+    ]
+    try:
+        await asyncio.wait_for(loop.run_in_executor(None, sum, range(10)), 0.5)
+    finally:
+        await asyncio.gather(*commands)
+
+
+async def test_execute_cancel_terminates_process():
+    """Test that cancelling _execute terminates the subprocess."""
+    manager = EnvManager("", None)
+    code = "import time; time.sleep(100.0)"
+    task = asyncio.ensure_future(manager._execute(sys.executable, "-c", code))
+    await asyncio.sleep(0.2)
+    start = time.monotonic()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert time.monotonic() - start < 10.0
+
+
+async def test_execute_streams_output():
+    """Test that _execute passes the output chunks to the consumer."""
+    manager = EnvManager("", None)
+    chunks = []
+    code = "import sys; sys.stdout.write('x' * 200000); sys.stdout.flush()"
+    rcode, output = await manager._execute(sys.executable, "-c", code, on_output=chunks.append)
+    assert rcode == 0
+    assert output == ""
+    assert len(chunks) > 1
+    assert b"".join(chunks) == b"x" * 200000
+
+
+async def test_execute_output_consumer_failure_terminates_process():
+    """Test that the subprocess is terminated if the output consumer fails."""
+    manager = EnvManager("", None)
+    code = "import time; print('data', flush=True); time.sleep(100.0)"
+
+    def consume(chunk):
+        raise ValueError("invalid output")
+
+    start = time.monotonic()
+    with pytest.raises(ValueError):
+        await manager._execute(sys.executable, "-c", code, on_output=consume)
+    assert time.monotonic() - start < 10.0
@@ -0,0 +1,244 @@
+import json
+import os
+import time
+from unittest import mock
+from unittest.mock import AsyncMock
+
+import pytest
+
+from mamba_gator import repodata
+from mamba_gator.envmanager import EnvManager
+from mamba_gator.repodata import cache_name, find_repodata, read_catalog
+
+CHANNEL = "https://conda.anaconda.org/conda-forge"
+
+
+def record(name, version, build_number=0, subdir="linux-64"):
+    return {
+        "build": "h{}_{}".format(version.replace(".", ""), build_number),
+        "build_number": build_number,
+        "depends": [],
+        "name": name,
+        "subdir": subdir,
+        "version": version,
+    }
+
+
+# State written by libmamba next to a cached repodata
+MAMBA_STATE = {
+    "cache_control": "public, max-age=1200",
+    "etag": '"6fdd3f0bd9c5d1bb9fd8a3d4b6a0a9fe"',
+    "file_mtime": {"nanoseconds": 217547845, "seconds": 1700589231},
+    "file_size": 32498572,
+    "has_zst": {"last_checked": "2023-11-21T17:53:51Z", "value": True},
+    "mod": "Tue, 21 Nov 2023 17:40:33 GMT",
+    "url": "https://conda.anaconda.org/conda-forge/noarch/repodata.json",
+}
+
+
+def add_repodata(pkgs_dir, url, records, state=".info.json", refreshed=None, legacy=False):
+    cache = pkgs_dir / "cache"
+    cache.mkdir(parents=True, exist_ok=True)
+    data = {
+        "info": {"subdir": url.rsplit("/", 1)[-1]},
+        "packages": {},
+        "packages.conda": {"{name}-{version}-{build}.conda".format(**r): r for r in records},
+    }
+    if legacy:
+        data["_url"] = url
+    path = cache / cache_name(url)
+    path.write_text(json.dumps(data))
+    refresh_ns = int((time.time() if refreshed is None else refreshed) * 1e9)
+    if state == ".state.json":
+        # libmamba touches the cached file when it checks it against the channel
+        os.utime(path, ns=(refresh_ns, refresh_ns))
+        st = os.stat(path)
+        content = dict(
+            MAMBA_STATE,
+            url=url + "/repodata.json",
+            file_mtime={
+                "seconds": st.st_mtime_ns // 1_000_000_000,
+                "nanoseconds": st.st_mtime_ns % 1_000_000_000,
+            },
+            file_size=st.st_size,
+        )
+    elif state is not None:
+        st = os.stat(path)
+        content = {
+            "url": url + "/repodata.json",
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "refresh_ns": refresh_ns,
+        }
+    if state is not None:
+        (cache / (path.stem + state)).write_text(json.dumps(content))
+    return path
+
+
+@pytest.fixture
+def pkgs_dir(tmp_path):
+    repodata._build.cache_clear()
+    pkgs_dir = tmp_path / "pkgs"
+    add_repodata(
+        pkgs_dir,
+        CHANNEL + "/linux-64",
+        [record("numpy", "1.26.4"), record("numpy", "2.0.0"), record("numpy", "2.0.0", 1)],
+    )
+    add_repodata(
+        pkgs_dir,
+        CHANNEL + "/noarch",
+        [record("numpy", "1.0", subdir="noarch"), record("tqdm", "4.66.1", subdir="noarch")],
+        state=".state.json",
+    )
+    yield pkgs_dir
+    repodata._build.cache_clear()
+
+
+def test_cache_name():
+    # Name of a cache file written by conda
+    assert cache_name("https://repo.anaconda.com/pkgs/main/noarch") == "3e39a7aa.json"
+    assert cache_name("https://repo.anaconda.com/pkgs/main/noarch/") == "3e39a7aa.json"
+
+
+def test_read_catalog(pkgs_dir):
+    packages = read_catalog([str(pkgs_dir)], [CHANNEL], ("linux-64", "noarch")).packages()
+
+    assert packages == [
+        {
+            "build_number": [1, 0, 0],
+            "build_string": ["h200_1", "h1264_0", "h10_0"],
+            "channel": CHANNEL + "/linux-64",
+            "name": "numpy",
+            "platform": None,
+            "version": ["2.0.0", "1.26.4", "1.0"],
+            "summary": "",
+            "home": "",
+            "keywords": [],
+            "tags": [],
+        },
+        {
+            "build_number": [0],
+            "build_string": ["h4661_0"],
+            "channel": CHANNEL + "/noarch",
+            "name": "tqdm",
+            "platform": None,
+            "version": ["4.66.1"],
+            "summary": "",
+            "home": "",
+            "keywords": [],
+            "tags": [],
+        },
+    ]
+
+
+def test_read_catalog_search_pkgs_dirs(tmp_path, pkgs_dir):
+    catalog = read_catalog(
+        [str(tmp_path / "missing"), str(pkgs_dir)], [CHANNEL], ("linux-64", "noarch")
+    )
+
+    assert [p["name"] for p in catalog.packages()] == ["numpy", "tqdm"]
+
+
+def test_read_catalog_missing_subdir(pkgs_dir):
+    assert read_catalog([str(pkgs_dir)], [CHANNEL], ("osx-64", "noarch")) is None
+    channels = [CHANNEL, "https://repo.anaconda.com/pkgs/main"]
+    assert read_catalog([str(pkgs_dir)], channels, ("noarch",)) is None
+
+
+@pytest.mark.parametrize("state", (".info.json", ".state.json"))
+def test_read_catalog_outdated(pkgs_dir, state):
+    for suffix in (".info.json", ".state.json"):
+        (pkgs_dir / "cache" / cache_name(CHANNEL + "/noarch")).with_suffix(suffix).unlink(
+            missing_ok=True
+        )
+    add_repodata(pkgs_dir, CHANNEL + "/noarch", [], state=state, refreshed=time.time() - 7200)
+
+    assert read_catalog([str(pkgs_dir)], [CHANNEL], ("noarch",), max_age=3600) is None
+    assert len(read_catalog([str(pkgs_dir)], [CHANNEL], ("noarch",), max_age=10000)) == 0
+    assert read_catalog([str(pkgs_dir)], [CHANNEL], ("linux-64",), max_age=0) is None
+
+
+def test_read_catalog_state_mismatch(pkgs_dir):
+    url = CHANNEL + "/noarch"
+    path = pkgs_dir / "cache" / cache_name(url)
+    # repodata replaced without updating its state
+    path.write_text(json.dumps({"packages": {}}) + " " * 10)
+
+    assert find_repodata([str(pkgs_dir)], url) is None
+    assert read_catalog([str(pkgs_dir)], [CHANNEL], ("noarch",)) is None
+
+
+def test_read_catalog_legacy_cache(tmp_path):
+    url = CHANNEL + "/noarch"
+    add_repodata(tmp_path, url, [record("tqdm", "4.66.1", subdir="noarch")], state=None, legacy=True)
+
+    catalog = read_catalog([str(tmp_path)], [CHANNEL], ("noarch",))
+    assert [p["name"] for p in catalog.packages()] == ["tqdm"]
+    # Another channel with the same cache name
+    with mock.patch("mamba_gator.repodata.cache_name", return_value=cache_name(url)):
+        assert read_catalog([str(tmp_path)], ["https://other.org"], ("noarch",)) is None
+
+
+def test_read_catalog_built_once(pkgs_dir):
+    channels = [CHANNEL]
+    subdirs = ("linux-64", "noarch")
+    with mock.patch("mamba_gator.repodata.loads", wraps=repodata.loads) as loads:
+        first = read_catalog([str(pkgs_dir)], channels, subdirs)
+        read_files = loads.call_count
+        second = read_catalog([str(pkgs_dir)], channels, subdirs)
+
+        # Only the states are read again
+        assert second is first
+        assert loads.call_count == read_files + 2
+
+        add_repodata(pkgs_dir, CHANNEL + "/noarch", [record("tqdm", "4.67.0", subdir="noarch")])
+        third = read_catalog([str(pkgs_dir)], channels, subdirs)
+
+    assert third is not first
+    assert third.packages()[1]["version"] == ["4.67.0"]
+
+
+async def test_list_available_from_repodata_cache(pkgs_dir):
+    manager = EnvManager("", None)
+    configuration = {"pkgs_dirs": [str(pkgs_dir)], "subdirs": ["linux-64", "noarch"]}
+    channels = {"channels": {"conda-forge": [CHANNEL]}}
+    pkg_info = {"tqdm": {"summary": "Progress bar"}}
+    with mock.patch.object(
+        manager, "conda_config", new_callable=AsyncMock, return_value=configuration
+    ), mock.patch.object(
+        manager, "env_channels", new_callable=AsyncMock, return_value=channels
+    ), mock.patch(
+        "mamba_gator.envmanager.fetch_channeldata", new_callable=AsyncMock, return_value=pkg_info
+    ), mock.patch.object(
+        manager, "_execute", new_callable=AsyncMock
+    ) as execute:
+        result = await manager.list_available()
+
+    execute.assert_not_called()
+    assert result["with_description"]
+    assert [(p["name"], p["channel"], p["summary"]) for p in result["packages"]] == [
+        ("numpy", "conda-forge", ""),
+        ("tqdm", "conda-forge", "Progress bar"),
+    ]
+
+
+async def test_list_available_outdated_repodata_cache(pkgs_dir):
+    manager = EnvManager("", None)
+    configuration = {"pkgs_dirs": [str(pkgs_dir)], "subdirs": ["osx-arm64", "noarch"]}
+    channels = {"channels": {"conda-forge": [CHANNEL]}}
+    output = json.dumps({"tqdm": [dict(record("tqdm", "4.66.1"), channel=CHANNEL + "/noarch")]})
+    with mock.patch.object(
+        manager, "conda_config", new_callable=AsyncMock, return_value=configuration
+    ), mock.patch.object(
+        manager, "env_channels", new_callable=AsyncMock, return_value=channels
+    ), mock.patch(
+        "mamba_gator.envmanager.fetch_channeldata", new_callable=AsyncMock, return_value={}
+    ), mock.patch.object(
+        manager, "is_mamba", return_value=False
+    ), mock.patch.object(
+        manager, "_execute", new_callable=AsyncMock, return_value=(0, output)
+    ) as execute:
+        result = await manager.list_available()
+
+    execute.assert_called_once()
+    assert [(p["name"], p["channel"]) for p in result["packages"]] == [("tqdm", "conda-forge")]
@@ -0,0 +1,174 @@
+import asyncio
+import sys
+from unittest import mock
+
+import pytest
+
+from mamba_gator.envmanager import EnvManager
+from mamba_gator.handlers import ActionsStack
+from mamba_gator.scheduler import Priority, Scheduler, TaskStats, current_task
+
+
+async def run_command(scheduler, name, events, priority=Priority.INTERACTIVE):
+    current_task.set(TaskStats(priority))
+    async with scheduler.process_slot():
+        events.append(("start", name))
+        await asyncio.sleep(0.02)
+        events.append(("end", name))
+
+
+async def test_scheduler_limits_processes():
+    scheduler = Scheduler(2, reserved=0)
+    max_running = 0
+
+    async def command(name):
+        nonlocal max_running
+        async with scheduler.process_slot():
+            max_running = max(max_running, scheduler.running)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(command(i) for i in range(6)))
+
+    assert max_running == 2
+    assert scheduler.running == 0
+    assert scheduler.queued == 0
+
+
+async def test_scheduler_interactive_before_background():
+    scheduler = Scheduler(1)
+    events = []
+    first = asyncio.ensure_future(run_command(scheduler, "first", events))
+    await asyncio.sleep(0)
+    background = asyncio.ensure_future(
+        run_command(scheduler, "background", events, Priority.BACKGROUND)
+    )
+    await asyncio.sleep(0)
+    interactive = asyncio.ensure_future(run_command(scheduler, "interactive", events))
+
+    await asyncio.gather(first, background, interactive)
+
+    starts = [name for event, name in events if event == "start"]
+    assert starts == ["first", "interactive", "background"]
+
+
+async def test_scheduler_cancel_queued_command():
+    scheduler = Scheduler(1)
+    events = []
+    first = asyncio.ensure_future(run_command(scheduler, "first", events))
+    await asyncio.sleep(0)
+    queued = asyncio.ensure_future(run_command(scheduler, "queued", events))
+    await asyncio.sleep(0)
+    assert scheduler.queued == 1
+
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    await first
+
+    assert scheduler.queued == 0
+    assert scheduler.running == 0
+    assert ("start", "queued") not in events
+
+
+async def test_scheduler_reserved_slot():
+    scheduler = Scheduler(3, reserved=1)
+    events = []
+    release = asyncio.Event()
+
+    async def command(name, quick):
+        async with scheduler.process_slot(quick):
+            events.append(("start", name))
+            if not quick:
+                await release.wait()
+
+    installs = [asyncio.ensure_future(command("install{}".format(i), False)) for i in range(3)]
+    await asyncio.sleep(0.01)
+    # The last slot is kept for the quick commands
+    assert scheduler.running == 2
+    assert scheduler.queued == 1
+
+    await asyncio.wait_for(command("list", True), 1)
+    assert ("start", "list") in events
+    assert ("start", "install2") not in events
+
+    release.set()
+    await asyncio.gather(*installs)
+    assert scheduler.running == 0
+    assert scheduler.queued == 0
+
+
+async def test_execute_quick_commands():
+    manager = EnvManager("", None)
+    scheduler = Scheduler(2)
+    calls = []
+    process_slot = scheduler.process_slot
+
+    def record(quick=False):
+        calls.append(quick)
+        return process_slot(quick)
+
+    with mock.patch("mamba_gator.scheduler._scheduler", scheduler), mock.patch.object(
+        scheduler, "process_slot", side_effect=record
+    ), mock.patch.object(
+        manager, "_execute_process", new_callable=mock.AsyncMock, return_value=(0, "{}", "")
+    ):
+        await manager._execute("conda", "info", "--json")
+        await manager._execute("python", "-m", "pip", "list", "--format=json")
+        await manager._execute("conda", "install", "-y", "-n", "a", "numpy")
+        await manager._execute("conda", "search", "--json")
+
+    assert calls == [True, True, False, False]
+
+
+@pytest.mark.parametrize("envs, serialized", ((("a", "a"), True), (("a", "b"), False)))
+async def test_scheduler_env_lock(envs, serialized):
+    scheduler = Scheduler(4)
+    events = []
+
+    async def write(name, env):
+        async with scheduler.env_lock(env):
+            events.append(("start", name))
+            await asyncio.sleep(0.02)
+            events.append(("end", name))
+
+    await asyncio.gather(*(write(i, env) for i, env in enumerate(envs)))
+
+    if serialized:
+        assert events == [("start", 0), ("end", 0), ("start", 1), ("end", 1)]
+    else:
+        assert events[:2] == [("start", 0), ("start", 1)]
+
+
+async def test_actionsstack_task_stats():
+    scheduler = Scheduler(1)
+    a = ActionsStack()
+    manager = EnvManager("", None)
+    command = (sys.executable, "-c", "import time; time.sleep(0.2)")
+
+    with mock.patch("mamba_gator.scheduler._scheduler", scheduler):
+        first = a.put(manager._execute, *command, env="a")
+        second = a.put(manager._execute, *command, env="a")
+        other = a.put(manager._execute, *command, env="b")
+        await asyncio.sleep(0.1)
+
+        assert a.stats(first)["state"] == "running"
+        assert a.stats(second)["state"] == "locked"
+        stats = a.stats(other)
+        assert stats["state"] == "queued"
+        assert stats["queue_depth"] == 0
+
+        results = {}
+        while len(results) < 3:
+            await asyncio.sleep(0.05)
+            for idx in (first, second, other):
+                if idx not in results:
+                    wait_time = a.stats(idx)["wait_time"]
+                    r = a.get(idx)
+                    if r is not None:
+                        results[idx] = wait_time
+
+    assert results[first] == 0.0
+    assert results[second] > 0.1
+    assert results[other] > 0.1
+    # The statistics are kept with the result
+    assert a.stats(first)["state"] == "done"
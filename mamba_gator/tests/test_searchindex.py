@@ -0,0 +1,67 @@
+import pytest
+
+from mamba_gator.searchindex import SearchIndex
+
+
+@pytest.fixture
+def index():
+    return SearchIndex(
+        [
+            {"name": "numpy", "summary": "Array processing for numbers", "keywords": []},
+            {"name": "numpydoc", "summary": "Sphinx extension for docstrings", "keywords": None},
+            {"name": "numba", "summary": "Compiling Python code using LLVM", "tags": ["jit"]},
+            {"name": "pandas", "summary": "Powerful data structures", "keywords": ["numpy"]},
+            {"name": "scipy", "summary": "Scientific library built on numpy"},
+            {"name": "Sphinx", "summary": "Python documentation generator", "keywords": "docs"},
+            {"name": "cupy-numpy", "summary": ""},
+        ]
+    )
+
+
+def names(packages):
+    return [p["name"] for p in packages]
+
+
+def test_search_ranking(index):
+    assert names(index.search("numpy")) == [
+        # Exact name, name prefix, name substring, keywords, summary
+        "numpy",
+        "numpydoc",
+        "cupy-numpy",
+        "pandas",
+        "scipy",
+    ]
+
+
+def test_search_case_insensitive(index):
+    assert names(index.search("SPHINX")) == ["Sphinx", "numpydoc"]
+
+
+def test_search_limit(index):
+    assert names(index.search("numpy", limit=2)) == ["numpy", "numpydoc"]
+    assert names(index.search("num", limit=1)) == ["numba"]
+    assert index.search("numpy", limit=0) == []
+
+
+def test_search_short_terms(index):
+    assert names(index.search("nu")) == ["numba", "numpy", "numpydoc", "cupy-numpy", "pandas", "scipy"]
+    assert names(index.search("py", names_only=True)) == ["numpy", "scipy", "numpydoc", "cupy-numpy"]
+
+
+def test_search_words(index):
+    # All the words must be found
+    assert names(index.search("python code")) == ["numba"]
+    assert names(index.search("jit numba")) == ["numba"]
+    assert names(index.search("python docs")) == ["Sphinx"]
+    assert index.search("numpy llvm") == []
+
+
+def test_search_names_only(index):
+    assert names(index.search("numpy", names_only=True)) == ["numpy", "numpydoc", "cupy-numpy"]
+    assert index.search("docstrings", names_only=True) == []
+
+
+def test_search_no_match(index):
+    assert index.search("") == []
+    assert index.search("   ") == []
+    assert index.search("tensorflow") == []
@@ -0,0 +1,86 @@
+import sys
+from unittest import mock
+
+import pytest
+
+from mamba_gator.catalogtable import CatalogTable
+from mamba_gator.taskresults import TaskResults, estimate_size
+
+
+def test_task_results_get():
+    results = TaskResults(ttl=60.0, max_entries=4)
+    value = {"packages": [{"name": "numpy"}]}
+
+    results.put(1, value)
+
+    assert 1 in results
+    assert results.get(1) is value
+    assert results.get(1) is value
+    with pytest.raises(KeyError):
+        results.get(2)
+
+
+def test_task_results_expire():
+    results = TaskResults(ttl=10.0)
+    with mock.patch("mamba_gator.taskresults.time.monotonic", return_value=100.0):
+        results.put(1, "a")
+    with mock.patch("mamba_gator.taskresults.time.monotonic", return_value=105.0):
+        results.put(2, "b")
+
+    with mock.patch("mamba_gator.taskresults.time.monotonic", return_value=110.0):
+        assert 1 not in results
+        assert results.get(2) == "b"
+        assert results.usage()["expired"] == 1
+    with mock.patch("mamba_gator.taskresults.time.monotonic", return_value=115.0):
+        assert len(results) == 0
+        assert results.nbytes == 0
+
+
+def test_task_results_lru_eviction():
+    results = TaskResults(ttl=60.0, max_entries=2)
+    results.put(1, "a")
+    results.put(2, "b")
+    # 1 is read, 2 becomes the least recently used
+    results.get(1)
+
+    results.put(3, "c")
+
+    assert 1 in results
+    assert 2 not in results
+    assert 3 in results
+    assert results.usage()["evicted"] == 1
+
+
+def test_task_results_usage():
+    results = TaskResults(ttl=60.0, max_entries=8)
+    results.put(1, "a" * 1000)
+    results.put(2, ["b" * 1000] * 10)
+
+    usage = results.usage()
+    assert usage["entries"] == 2
+    assert usage["max_entries"] == 8
+    assert usage["ttl"] == 60.0
+    assert 1000 < usage["bytes"] < 5000
+
+    results.put(2, None)
+    assert results.nbytes == sys.getsizeof("a" * 1000) + sys.getsizeof(None)
+    results.discard(1)
+    results.discard(1)
+    assert results.nbytes == sys.getsizeof(None)
+
+
+def test_estimate_size():
+    small = [{"name": str(i)} for i in range(10)]
+    large = [{"name": str(i)} for i in range(10000)]
+    table = CatalogTable(
+        {"name": str(i), "version": ["1.0"], "build_number": [0], "build_string": ["h_0"]}
+        for i in range(100)
+    )
+
+    # The shared key is counted once
+    assert estimate_size(small) == sys.getsizeof(small) + sys.getsizeof("name") + sum(
+        sys.getsizeof(p) + sys.getsizeof(p["name"]) for p in small
+    )
+    # Extrapolated from the first items
+    assert 0.5 < estimate_size(large) / (sys.getsizeof(large) + 10000 * 150) < 2
+    assert estimate_size({"packages": table}) > table.nbytes > 0
@@ -0,0 +1,130 @@
+import itertools
+import json
+import random
+
+from unittest import mock
+
+import pytest
+from packaging.version import Version
+
+from mamba_gator.versions import (
+    key_from_version,
+    normalize_version,
+    parse_version,
+    store_version_keys,
+    version_key,
+)
+
+VERSIONS = [
+    "0",
+    "0.0.0",
+    "1",
+    "1.0",
+    "1.0.0",
+    "1.0.0.0.1",
+    "1.0.dev0",
+    "1.0.dev1",
+    "1.0a1",
+    "1.0a2.dev3",
+    "1.0b1",
+    "1.0rc1",
+    "1.0rc1.post1",
+    "1.0.post1",
+    "1.0.post1.dev2",
+    "1.0+local",
+    "1.0+local.1",
+    "1.0+local.a",
+    "1.0+1",
+    "1.0+1.local",
+    "1.0+abc",
+    "1.0+ab",
+    "1.0+ab.1",
+    "1.0+007",
+    "1.1",
+    "1.10",
+    "1.2.3",
+    "2023.4",
+    "1!0.1",
+    "1!1.0a1",
+]
+
+
+@pytest.mark.parametrize("a, b", list(itertools.product(VERSIONS, repeat=2)))
+def test_version_key_order(a, b):
+    va, vb = Version(a), Version(b)
+    ka, kb = key_from_version(va), key_from_version(vb)
+
+    assert (ka < kb) == (va < vb)
+    assert (ka == kb) == (va == vb)
+
+
+def test_version_key_random_order():
+    rng = random.Random(42)
+
+    def random_version():
+        version = ".".join(str(rng.randint(0, 3)) for _ in range(rng.randint(1, 4)))
+        if rng.random() < 0.3:
+            version += rng.choice(("a", "b", "rc")) + str(rng.randint(0, 2))
+        if rng.random() < 0.3:
+            version += ".post" + str(rng.randint(0, 2))
+        if rng.random() < 0.3:
+            version += ".dev" + str(rng.randint(0, 2))
+        if rng.random() < 0.2:
+            version += "+" + rng.choice(("1", "a", "a.1", "1.b", "ubuntu.2"))
+        return version
+
+    versions = [random_version() for _ in range(2000)]
+    by_version = sorted(versions, key=Version)
+    by_key = sorted(versions, key=version_key)
+
+    assert [Version(v) for v in by_key] == [Version(v) for v in by_version]
+
+
+def test_version_key_is_json_compatible():
+    key = version_key("1!2.0rc1.post2.dev3+local.7")
+
+    assert tuple(json.loads(json.dumps(key))) == key
+
+
+@pytest.mark.parametrize(
+    "version, expected",
+    (
+        ("1.8_4", "1.8.4"),
+        ("2023d", "2023.4"),
+        ("1.1.1j", "1.1.1.post10"),
+        ("9d", "9.post4"),
+        ("custom", "0.0.0"),
+        ("invalid.version.format!", None),
+    ),
+)
+def test_normalize_version(version, expected):
+    assert normalize_version(version) == expected
+    assert (version_key(version) is None) == (expected is None)
+
+
+def test_parse_version_is_memoized():
+    parse_version.cache_clear()
+    for _ in range(3):
+        assert parse_version("1.21.0") == Version("1.21.0")
+
+    info = parse_version.cache_info()
+    assert (info.hits, info.misses) == (2, 1)
+
+
+def test_stored_version_keys():
+    keys = {"1.21.0": list(version_key("1.21.0")), "2.0": [0, 3, 0, 4, 0, 0, 0, 1, 0, 0]}
+    version_key.cache_clear()
+    normalize_version.cache_clear()
+    try:
+        assert store_version_keys(dict(keys, invalid=[-1], other="1.0")) == 2
+
+        with mock.patch("mamba_gator.versions.parse_version") as parse:
+            assert version_key("1.21.0") == tuple(keys["1.21.0"])
+            assert version_key("2.0") == (0, 3, 0, 4, 0, 0, 0, 1, 0, 0)
+            assert normalize_version("2.0") == "2.0"
+        # The stored versions are not parsed
+        parse.assert_not_called()
+    finally:
+        store_version_keys({})
+        version_key.cache_clear()
+        normalize_version.cache_clear()
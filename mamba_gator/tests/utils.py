@@ -5,6 +5,7 @@ This module provides helper functions and constants for testing.
 
 import json
 import os
+import random
 import sys
 from subprocess import CalledProcessError, check_call
 
@@ -40,6 +41,60 @@ def assert_http_error(error, expected_code, expected_message=None):
             assert expected_message in message, f"Expected '{expected_message}' not in '{message}'"
 
 
+# Subdirs of the synthetic package records
+SUBDIRS = ("linux-64", "linux-aarch64", "osx-64", "osx-arm64", "win-64", "noarch")
+
+
+def make_versions(rng, count):
+    values = set()
+    while len(values) < count:
+        values.add(
+            "{}.{}.{}".format(rng.randint(0, 3), rng.randint(0, 30), rng.randint(0, 12))
+        )
+    values = sorted(values)
+    # Some spellings found in real channels
+    extra = ["1.0", "1.0.0", "2023c", "1.1.1w", "9e", "3.6_2", "custom", "1.0.0rc1"]
+    return values + extra[: max(0, count // 50)]
+
+
+def make_payload(n_records=500_000, seed=0):
+    """Generate a repoquery output with `n_records` package records."""
+    rng = random.Random(seed)
+    records = []
+    package = 0
+    while len(records) < n_records:
+        # Heavy-tailed number of builds per package
+        n_builds = min(int(rng.paretovariate(0.9)) * 3, 8000, n_records - len(records))
+        name = "package-{}".format(package)
+        package += 1
+        versions = make_versions(rng, max(1, min(n_builds // 8, 400)))
+        for _ in range(n_builds):
+            version = rng.choice(versions)
+            subdir = rng.choice(SUBDIRS)
+            build_number = rng.randint(0, 5)
+            build = "py{}h{:x}_{}".format(rng.randint(36, 313), rng.getrandbits(28), build_number)
+            channel = "https://conda.anaconda.org/conda-forge/{}".format(subdir)
+            records.append(
+                {
+                    "build": build,
+                    "build_number": build_number,
+                    "channel": channel,
+                    "depends": ["python >=3.8"],
+                    "fn": "{}-{}-{}.conda".format(name, version, build),
+                    "license": "BSD-3-Clause",
+                    "md5": "0" * 32,
+                    "name": name,
+                    "size": rng.randint(1000, 10**8),
+                    "subdir": subdir,
+                    "timestamp": 1700000000000,
+                    "url": "{}/{}-{}-{}.conda".format(channel, name, version, build),
+                    "version": version,
+                }
+            )
+    rng.shuffle(records)
+    return {"query": {"query": "*", "type": "search"}, "result": {"msg": "", "pkgs": records}}
+
+
 # Disable Windows file association dialogs during testing
 if sys.platform == "win32":
     os.environ["PATHEXT"] = ""
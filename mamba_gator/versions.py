@@ -0,0 +1,185 @@
+# Copyright (c) Jupyter Development Team.
+# Distributed under the terms of the Modified BSD License.
+"""Parse and sort the package versions.
+
+The same version strings appear hundreds of thousands of times in a catalog,
+so parsing is memoized in bounded caches shared by all callers.
+
+`version_key` maps a version to a tuple of non-negative integers ordered
+like `packaging.version.Version`. The key is JSON-compatible (as a list): the
+keys of the catalog versions are stored with the cached catalog and loaded
+with `store_version_keys`, so that its versions are not parsed again by the
+next processes. Changing the key layout requires a new
+`catalogcache.SCHEMA_VERSION`.
+"""
+import functools
+import itertools
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from packaging.version import InvalidVersion, Version
+
+# Maximal number of version strings kept in each memo cache
+VERSION_CACHE_SIZE = 1 << 16  # type: int
+
+# Year-based versions like "2023d"
+_YEAR_RE = re.compile(r"^(\d{4})([a-z])$")
+# OpenSSL style versions like "1.1.1j" and legacy short form versions like "9d"
+_LETTER_SUFFIX_RE = re.compile(r"^(\d+\.\d+\.\d+|\d+)([a-z])$")
+
+_PRE_RANKS = {"a": 1, "b": 2, "rc": 3}
+
+VersionKey = Tuple[int, ...]
+
+# Keys stored with a cached catalog, per normalized version
+_stored_keys: Dict[str, VersionKey] = {}
+
+
+@functools.lru_cache(maxsize=VERSION_CACHE_SIZE)
+def parse_version(version: str) -> Optional[Version]:
+    """Handle R-style and year-based versions"""
+    # Convert R package versions like "1.8_4" to "1.8.4"
+    version = version.replace("_", ".")
+
+    # Handle year-based versions like "2023d" -> "2023.4"
+    match = _YEAR_RE.match(version)
+    if match is not None:
+        year, letter = match.groups()
+        version = f"{year}.{ord(letter) - ord('a') + 1}"
+
+    # Handle custom versions like "custom" -> "0.0.0"
+    if version == "custom":
+        return Version("0.0.0")
+
+    # Handle OpenSSL style versions like "1.1.1j" -> "1.1.1.post10"
+    # and legacy short form versions like "9d" -> "9.post4"
+    # Letter suffix implies patch level
+    match = _LETTER_SUFFIX_RE.match(version)
+    if match is not None:
+        base, letter = match.groups()
+        version = f"{base}.post{ord(letter) - ord('a') + 1}"
+
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return None
+
+
+def key_from_version(version: Version) -> VersionKey:
+    """Sortable key of a parsed version.
+
+    Keys compare like the versions: equal versions (e.g. "1.0" and "1.0.0")
+    have equal keys.
+
+    Args:
+        version (Version): Parsed version
+
+    Returns:
+        Tuple[int]: The version key
+    """
+    key = [version.epoch]
+
+    # Release without trailing zeros; components are shifted by one to
+    # terminate the variable length release with 0.
+    release = list(version.release)
+    while release and release[-1] == 0:
+        release.pop()
+    key.extend(part + 1 for part in release)
+    key.append(0)
+
+    pre, post, dev = version.pre, version.post, version.dev
+    # Pre-release - dev-only releases sort before the pre-releases
+    if pre is None and post is None and dev is not None:
+        key.extend((0, 0))
+    elif pre is None:
+        key.extend((4, 0))
+    else:
+        key.extend((_PRE_RANKS[pre[0]], pre[1]))
+    # Post-release
+    key.extend((0, 0) if post is None else (1, post))
+    # Development release
+    key.extend((1, 0) if dev is None else (0, dev))
+    # Local version - numeric segments sort after alphanumeric ones
+    if version.local is None:
+        key.append(0)
+    else:
+        key.append(1)
+        for segment in version.local.split("."):
+            if segment.isdigit():
+                key.extend((2, int(segment)))
+            else:
+                key.append(1)
+                key.extend(ord(c) + 1 for c in segment)
+                key.append(0)
+        key.append(0)
+
+    return tuple(key)
+
+
+@functools.lru_cache(maxsize=VERSION_CACHE_SIZE)
+def version_key(version: str) -> Optional[VersionKey]:
+    """Sortable key of a version string.
+
+    Args:
+        version (str): Version string
+
+    Returns:
+        Tuple[int] or None: The version key or None if the version cannot be parsed
+    """
+    key = _stored_keys.get(version)
+    if key is not None:
+        return key
+    parsed = parse_version(version)
+    return None if parsed is None else key_from_version(parsed)
+
+
+@functools.lru_cache(maxsize=VERSION_CACHE_SIZE)
+def normalize_version(version: str) -> Optional[str]:
+    """Normalized version string (e.g. "1.8_4" -> "1.8.4").
+
+    Args:
+        version (str): Version string
+
+    Returns:
+        str or None: The normalized version or None if the version cannot be parsed
+    """
+    # The stored versions are normalized already
+    if version in _stored_keys:
+        return version
+    parsed = parse_version(version)
+    return None if parsed is None else str(parsed)
+
+
+def store_version_keys(keys: Dict[str, Any]) -> int:
+    """Use the version keys stored with a catalog.
+
+    They replace the previously stored keys; at most `VERSION_CACHE_SIZE`
+    keys are kept and the invalid ones are ignored.
+
+    Args:
+        keys (Dict[str, List[int]]): Key per normalized version
+
+    Returns:
+        int: Number of keys stored
+    """
+    global _stored_keys
+    stored = {}
+    for version, key in itertools.islice(keys.items(), VERSION_CACHE_SIZE):
+        if (
+            isinstance(version, str)
+            and type(key) is list
+            and all(type(part) is int and part >= 0 for part in key)
+        ):
+            stored[version] = tuple(key)
+    _stored_keys = stored
+    return len(stored)
+
+
+def cache_info() -> dict:
+    """Memo caches statistics."""
+    info: Dict[str, Any] = {
+        f.__name__: f.cache_info()._asdict()
+        for f in (parse_version, version_key, normalize_version)
+    }
+    info["stored_keys"] = len(_stored_keys)
+    return info
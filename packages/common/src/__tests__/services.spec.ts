@@ -156,6 +156,51 @@ describe('@mamba-org/gator-lab/services', () => {
         );
       }
     );
+
+    it('should poll a task once its completion is pushed', async () => {
+      // Given
+      const listeners: { [type: string]: Array<(event: any) => void> } = {};
+      class FakeEventSource {
+        static CLOSED = 2;
+        readyState = 1;
+        constructor(public url: string) {}
+        addEventListener(type: string, listener: (event: any) => void): void {
+          (listeners[type] = listeners[type] || []).push(listener);
+        }
+      }
+      (global as any).EventSource = FakeEventSource;
+      const redirectURL = URLExt.join('conda', 'tasks', '31');
+
+      (ServerConnection.makeRequest as jest.Mock)
+        .mockResolvedValue(new Response('{}', { status: 200 }))
+        .mockResolvedValueOnce(
+          new Response('', { headers: { Location: redirectURL }, status: 202 })
+        );
+
+      // When
+      try {
+        const envManager = new CondaEnvironments();
+        const removed = envManager.remove('dummy');
+        await new Promise(resolve => setTimeout(resolve, 10));
+        expect(ServerConnection.makeRequest).toHaveBeenCalledTimes(1);
+
+        const data = JSON.stringify({ id: 31, state: 'done' });
+        listeners['task'].forEach(listener => listener({ data }));
+        await removed;
+      } finally {
+        delete (global as any).EventSource;
+      }
+
+      // Then
+      expect(ServerConnection.makeRequest).toHaveBeenCalledTimes(2);
+      expect(ServerConnection.makeRequest).toHaveBeenLastCalledWith(
+        URLExt.join(settings.baseUrl, redirectURL),
+        {
+          method: 'GET'
+        },
+        settings
+      );
+    });
   });
 
   describe('CondaEnvironments', () => {
@@ -926,7 +971,169 @@ describe('@mamba-org/gator-lab/services', () => {
       });
     });
 
-    // TOD describe("refreshAvailablePackages()", () => {})
+    describe('getAvailablePackagesPage()', () => {
+      it('should request a page of the available packages', async () => {
+        const page = {
+          packages: [] as Array<any>,
+          total: 0,
+          offset: 20,
+          with_description: false
+        };
+        (ServerConnection.makeRequest as jest.Mock).mockResolvedValue(
+          new Response(JSON.stringify(page), { status: 200 })
+        );
+
+        const pkgManager = new CondaPackage('dummy');
+
+        const answer = await pkgManager.getAvailablePackagesPage({
+          offset: 20,
+          limit: 10,
+          channels: ['conda-forge', 'pkgs/main'],
+          environment: 'dummy',
+          sortBy: 'channel',
+          sortDirection: 'desc',
+          searchTerm: 'num'
+        });
+
+        expect(answer).toStrictEqual(page);
+        expect(ServerConnection.makeRequest).toBeCalledWith(
+          URLExt.join(settings.baseUrl, 'conda', 'packages') +
+            '?offset=20&limit=10&channel=conda-forge&channel=pkgs%2Fmain' +
+            '&installed_in=dummy&sort=channel&order=desc&q=num',
+          { method: 'GET' },
+          settings
+        );
+      });
+
+      it('should normalize the packages of the page', async () => {
+        const page = {
+          packages: [
+            {
+              name: 'numpy',
+              version: ['1.0'],
+              build_number: [0],
+              build_string: ['py_0'],
+              channel: 'https://conda.anaconda.org/conda-forge/linux-64',
+              platform: 'linux-64',
+              summary: 'Arrays',
+              home: '',
+              keywords: ['Array'],
+              tags: []
+            }
+          ],
+          total: 1,
+          offset: 0,
+          with_description: true
+        };
+        (ServerConnection.makeRequest as jest.Mock).mockResolvedValue(
+          new Response(JSON.stringify(page), { status: 200 })
+        );
+
+        const pkgManager = new CondaPackage('dummy');
+
+        const answer = await pkgManager.getAvailablePackagesPage(
+          { limit: 50, excludedEnvironment: 'dummy' },
+          false
+        );
+
+        expect(answer.packages).toStrictEqual([
+          {
+            ...page.packages[0],
+            channel: 'conda.anaconda.org/.../conda-forge',
+            keywords: 'array',
+            tags: '',
+            version_installed: '',
+            version_selected: 'none',
+            updatable: false
+          }
+        ]);
+        expect(pkgManager.hasDescription()).toBe(true);
+        expect(ServerConnection.makeRequest).toBeCalledWith(
+          URLExt.join(settings.baseUrl, 'conda', 'packages') +
+            '?offset=0&limit=50&not_installed_in=dummy',
+          { method: 'GET' },
+          settings
+        );
+      });
+    });
+
+    describe('searchAvailablePackages()', () => {
+      it('should request the best matches of a query', async () => {
+        const packages = [{ name: 'numpy' }];
+        (ServerConnection.makeRequest as jest.Mock).mockResolvedValue(
+          new Response(JSON.stringify({ packages }), { status: 200 })
+        );
+
+        const pkgManager = new CondaPackage('dummy');
+
+        const answer = await pkgManager.searchAvailablePackages('num', 5, true);
+
+        expect(answer).toStrictEqual(packages);
+        expect(ServerConnection.makeRequest).toBeCalledWith(
+          URLExt.join(settings.baseUrl, 'conda', 'packages') +
+            '?query=num&limit=5&autocomplete=1',
+          { method: 'GET' },
+          settings
+        );
+      });
+    });
+
+    describe('refreshAvailablePackages()', () => {
+      it('should patch the available packages with the catalog changes', async () => {
+        const catalog = {
+          packages: [
+            { name: 'numpy', version: ['1.26.4'] },
+            { name: 'scipy', version: ['1.13.0'] },
+            { name: 'tqdm', version: ['4.66.1'] }
+          ],
+          with_description: false,
+          version: '1f2e3d4c:3'
+        };
+        const delta = {
+          packages: [
+            { name: 'numpy', version: ['2.0.0', '1.26.4'] },
+            { name: 'pandas', version: ['2.2.2'] }
+          ],
+          removed: ['scipy'],
+          version: '1f2e3d4c:5',
+          since: '1f2e3d4c:3',
+          with_description: true
+        };
+        (ServerConnection.makeRequest as jest.Mock)
+          .mockResolvedValueOnce(
+            new Response(JSON.stringify(catalog), {
+              status: 200,
+              headers: { ETag: '"v3"' }
+            })
+          )
+          .mockResolvedValueOnce(
+            new Response(JSON.stringify(delta), {
+              status: 200,
+              headers: { ETag: '"v5"' }
+            })
+          );
+
+        const pkgManager = new CondaPackage('dummy');
+
+        await pkgManager.refreshAvailablePackages();
+        const packages = (CondaPackage as any)._availablePackages;
+        await pkgManager.refreshAvailablePackages();
+
+        expect(ServerConnection.makeRequest).toHaveBeenLastCalledWith(
+          URLExt.join(settings.baseUrl, 'conda', 'packages') + '?since=1f2e3d4c%3A3',
+          { method: 'GET', headers: { 'If-None-Match': '"v3"' } },
+          settings
+        );
+        // The list is patched in place
+        expect((CondaPackage as any)._availablePackages).toBe(packages);
+        expect(packages).toStrictEqual([
+          { name: 'numpy', version: ['2.0.0', '1.26.4'] },
+          { name: 'pandas', version: ['2.2.2'] },
+          { name: 'tqdm', version: ['4.66.1'] }
+        ]);
+        expect(pkgManager.hasDescription()).toBe(true);
+      });
+    });
 
     // TODO describe("hasDescription()", () => {})
   });
@@ -5,6 +5,10 @@ import { Conda } from '../tokens';
 import { CondaPkgList } from './CondaPkgList';
 import { PACKAGE_TOOLBAR_HEIGHT } from './CondaPkgToolBar';
 import { applyPackageChanges } from '../packageActions';
+import { IPackageSortState } from '../packageSorting';
+
+// Number of packages fetched per request
+const PAGE_SIZE = 100;
 
 export interface ICondaPkgDrawerProps {
   /**
@@ -12,9 +16,9 @@ export interface ICondaPkgDrawerProps {
    */
   pkgModel: Conda.IPackageManager;
   /**
-   * All packages (for filtering uninstalled packages)
+   * Channels of the packages to list; default to all
    */
-  packages: Conda.IPackage[];
+  channels: string[];
   /**
    * Environment name
    */
@@ -49,31 +53,108 @@ export interface ICondaPkgDrawerProps {
   onPackagesInstalled?: () => void;
 }
 
+/**
+ * Drawer to select packages to install in an environment.
+ *
+ * The packages not installed in the environment are fetched by pages from
+ * the server, which filters and sorts them; only the rendered rows are fetched.
+ */
 export const CondaPkgDrawer: React.FunctionComponent<ICondaPkgDrawerProps> = (
   props: ICondaPkgDrawerProps
 ) => {
   const [searchTerm, setSearchTerm] = React.useState('');
+  const [sort, setSort] = React.useState<IPackageSortState>({
+    sortBy: 'name',
+    sortDirection: 'asc'
+  });
   const [isApplyingChanges, setIsApplyingChanges] = React.useState(false);
   const [selectedPackages, setSelectedPackages] = React.useState<
     Conda.IPackage[]
   >([]);
-  const [packages, setPackages] = React.useState<Conda.IPackage[]>(
-    props.packages
+  // Packages fetched, by row; undefined if not fetched yet
+  const [rows, setRows] = React.useState<Array<Conda.IPackage | undefined>>(
+    []
+  );
+  const [total, setTotal] = React.useState(0);
+  const [isFetching, setIsFetching] = React.useState(true);
+  // Current query number - the pages of the previous queries are dropped
+  const query = React.useRef(0);
+  // Pages requested for the current query
+  const requested = React.useRef(new Set<number>());
+
+  const fetchPage = React.useCallback(
+    async (page: number): Promise<void> => {
+      const current = query.current;
+      requested.current.add(page);
+      try {
+        const answer = await props.pkgModel.getAvailablePackagesPage(
+          {
+            offset: page * PAGE_SIZE,
+            limit: PAGE_SIZE,
+            channels: props.channels,
+            excludedEnvironment: props.envName,
+            sortBy: sort.sortBy,
+            sortDirection: sort.sortDirection,
+            searchTerm
+          },
+          false
+        );
+        if (current !== query.current) {
+          return;
+        }
+        setTotal(answer.total);
+        setRows(prev => {
+          const next = prev.slice(0, answer.total);
+          next.length = answer.total;
+          answer.packages.forEach((pkg, idx) => {
+            next[answer.offset + idx] = pkg;
+          });
+          return next;
+        });
+      } catch (error) {
+        if (current === query.current) {
+          // The page will be requested again when rendered
+          requested.current.delete(page);
+        }
+        if ((error as any).message !== 'cancelled') {
+          console.error('Failed to load available packages:', error);
+        }
+      }
+    },
+    [props.pkgModel, props.channels, props.envName, sort, searchTerm]
   );
 
-  // Sync local packages when props.packages changes
+  // Start again from the first page when the query changes
   React.useEffect(() => {
-    setPackages(props.packages);
-  }, [props.packages]);
+    query.current += 1;
+    const current = query.current;
+    requested.current = new Set<number>();
+    setRows([]);
+    setTotal(0);
+    setIsFetching(true);
+    fetchPage(0).finally(() => {
+      if (current === query.current) {
+        setIsFetching(false);
+      }
+    });
+  }, [fetchPage]);
+
+  const handleRowsRendered = (start: number, stop: number): void => {
+    const last = Math.floor(stop / PAGE_SIZE);
+    for (let page = Math.floor(start / PAGE_SIZE); page <= last; page++) {
+      if (!requested.current.has(page)) {
+        fetchPage(page);
+      }
+    }
+  };
+
+  // The rows with the selected versions
+  const packages = React.useMemo(() => {
+    const selected = new Map(selectedPackages.map(pkg => [pkg.name, pkg]));
+    return rows.map(pkg => (pkg ? selected.get(pkg.name) || pkg : pkg));
+  }, [rows, selectedPackages]);
 
   const handleClose = () => {
-    setPackages(prev =>
-      prev.map(pkg =>
-        selectedPackages.some(sp => sp.name === pkg.name)
-          ? { ...pkg, version_selected: 'none' }
-          : pkg
-      )
-    );
     setSelectedPackages([]);
     props.onClose();
   };
@@ -93,17 +174,11 @@ export const CondaPkgDrawer: React.FunctionComponent<ICondaPkgDrawerProps> = (
     }
 
     const updatedPkg = { ...pkg, version_selected: version };
-    setPackages(prev => prev.map(p => (p.name === pkg.name ? updatedPkg : p)));
-
-    if (version !== 'none') {
-      setSelectedPackages(prev => {
-        // Remove old reference if exists, add new one
-        const filtered = prev.filter(p => p.name !== pkg.name);
-        return [...filtered, updatedPkg];
-      });
-    } else {
-      setSelectedPackages(prev => prev.filter(p => p.name !== pkg.name));
-    }
+    // Remove old reference if exists, add new one
+    setSelectedPackages(prev => {
+      const filtered = prev.filter(p => p.name !== pkg.name);
+      return version !== 'none' ? [...filtered, updatedPkg] : filtered;
+    });
   };
 
   const handlePackageSelection = (pkg: Conda.IPackage) => {
@@ -114,19 +189,10 @@ export const CondaPkgDrawer: React.FunctionComponent<ICondaPkgDrawerProps> = (
     // For uninstalled packages, toggle version_selected between 'none' and ''
     if (pkg.version_selected !== 'none') {
       // It's currently selected, so deselect
-      const updatedPkg = { ...pkg, version_selected: 'none' };
-
-      setPackages(prev =>
-        prev.map(p => (p.name === pkg.name ? updatedPkg : p))
-      );
       setSelectedPackages(prev => prev.filter(p => p.name !== pkg.name));
     } else {
       // It's currently not selected, so select with empty string (represents "unpinned" version)
       const updatedPkg = { ...pkg, version_selected: '' };
-
-      setPackages(prev =>
-        prev.map(p => (p.name === pkg.name ? updatedPkg : p))
-      );
       setSelectedPackages(prev => [...prev, updatedPkg]);
     }
   };
@@ -136,12 +202,6 @@ export const CondaPkgDrawer: React.FunctionComponent<ICondaPkgDrawerProps> = (
       return;
     }
 
-    // Reset version_selected to 'none' when removing from selection
-    setPackages(prev =>
-      prev.map(p =>
-        p.name === pkg.name ? { ...p, version_selected: 'none' } : p
-      )
-    );
     setSelectedPackages(prev => prev.filter(p => p.name !== pkg.name));
   };
 
@@ -162,16 +222,6 @@ export const CondaPkgDrawer: React.FunctionComponent<ICondaPkgDrawerProps> = (
         );
 
         if (wasApplied) {
-          // Reset version_selected for all selected packages
-          const selectedNames = new Set(selectedPackages.map(p => p.name));
-          setPackages(prev =>
-            prev.map(pkg =>
-              selectedNames.has(pkg.name)
-                ? { ...pkg, version_selected: 'none' }
-                : pkg
-            )
-          );
-
           setSelectedPackages([]);
 
           if (props.onPackagesInstalled) {
@@ -193,40 +243,9 @@ export const CondaPkgDrawer: React.FunctionComponent<ICondaPkgDrawerProps> = (
       return;
     }
 
-    const selectedNames = new Set(selectedPackages.map(p => p.name));
-    setPackages(prev =>
-      prev.map(pkg =>
-        selectedNames.has(pkg.name) ? { ...pkg, version_selected: 'none' } : pkg
-      )
-    );
     setSelectedPackages([]);
   };
 
-  // Filter packages based on search term
-  const searchPackages = React.useMemo(() => {
-    if (!searchTerm) {
-      return packages;
-    }
-    const lowerSearch = searchTerm.toLowerCase();
-
-    return packages
-      .filter(pkg => {
-        const lowerName = pkg.name.toLowerCase();
-        return lowerName.indexOf(lowerSearch) >= 0;
-      })
-      .sort((a, b) => {
-        const aStartsWith = a.name.toLowerCase().startsWith(lowerSearch);
-        const bStartsWith = b.name.toLowerCase().startsWith(lowerSearch);
-        if (aStartsWith && !bStartsWith) {
-          return -1;
-        }
-        if (!aStartsWith && bStartsWith) {
-          return 1;
-        }
-        return a.name.localeCompare(b.name);
-      });
-  }, [packages, searchTerm]);
-
   const renderPkgsSelected = (): JSX.Element => {
     if (selectedPackages.length === 0) {
       return (
@@ -297,11 +316,14 @@ export const CondaPkgDrawer: React.FunctionComponent<ICondaPkgDrawerProps> = (
               <CondaPkgList
                 height={props.height - PACKAGE_TOOLBAR_HEIGHT}
                 hasDescription={props.hasDescription}
-                packages={searchPackages}
-                isLoading={props.isLoading || isApplyingChanges}
+                packages={packages}
+                total={total}
+                isLoading={props.isLoading || isApplyingChanges || isFetching}
                 onPkgClick={handlePackageSelection}
                 onPkgChange={handleVersionSelection}
                 onPkgGraph={props.onPkgGraph}
+                onRowsRendered={handleRowsRendered}
+                onSortChanged={setSort}
                 isDrawerMode={true}
               />
             </div>
@@ -5,7 +5,11 @@ import { CommandRegistry } from '@lumino/commands';
 import { ellipsisVerticalIcon } from '../icon';
 import * as React from 'react';
 import AutoSizer from 'react-virtualized-auto-sizer';
-import { FixedSizeList, ListChildComponentProps } from 'react-window';
+import {
+  FixedSizeList,
+  ListChildComponentProps,
+  ListOnItemsRenderedProps
+} from 'react-window';
 import { classes, style } from 'typestyle';
 import { NestedCSSProperties } from 'typestyle/lib/types';
 import {
@@ -36,9 +40,22 @@ export interface IPkgListProps {
    */
   height: number;
   /**
-   * Conda package list
+   * Conda package list; when it is fetched by pages, the packages not
+   * fetched yet are undefined
+   */
+  packages: Array<Conda.IPackage | undefined>;
+  /**
+   * Number of packages when they are fetched by pages
+   */
+  total?: number;
+  /**
+   * Handler of the range of rendered rows, to fetch the missing packages
+   */
+  onRowsRendered?: (start: number, stop: number) => void;
+  /**
+   * Sort change handler; if set, the packages are sorted by the caller
    */
-  packages: Conda.IPackage[];
+  onSortChanged?: (sort: IPackageSortState) => void;
   /**
    * Is the package list loading?
    */
@@ -354,7 +371,31 @@ export class CondaPkgList extends React.Component<
 
   protected rowRenderer = (props: ListChildComponentProps): JSX.Element => {
     const { data, index, style } = props;
-    const pkg = data[index] as Conda.IPackage;
+    const pkg = data[index] as Conda.IPackage | undefined;
+
+    if (!pkg) {
+      // Package not fetched yet
+      return (
+        <div
+          className={
+            index % 2 === 0 ? Style.RowEven(false) : Style.RowOdd(false)
+          }
+          style={style}
+          role="row"
+        >
+          <div
+            className={classes(Style.Cell, Style.StatusSize)}
+            role="gridcell"
+          ></div>
+          <div
+            className={classes(Style.Cell, Style.NameSize, Style.Placeholder)}
+            role="gridcell"
+          >
+            Loading...
+          </div>
+        </div>
+      );
+    }
 
     const handleMenuClick = (event: React.MouseEvent<HTMLDivElement>) => {
       event.preventDefault();
@@ -477,16 +518,32 @@ export class CondaPkgList extends React.Component<
     );
   };
 
-  private getSortedPackages(): Conda.IPackage[] {
+  private getSortedPackages(): Array<Conda.IPackage | undefined> {
+    if (this.props.onSortChanged) {
+      return this.props.packages;
+    }
     return sortPackagesWithSearch(
-      this.props.packages,
+      this.props.packages as Conda.IPackage[],
       this.state,
       this.props.searchTerm
     );
   }
 
   private toggleSort = (column: PackageSortKey) => {
-    this.setState((prev: IPackageSortState) => nextSortState(prev, column));
+    const sort = nextSortState(this.state, column);
+    this.setState(sort);
+    if (this.props.onSortChanged) {
+      this.props.onSortChanged(sort);
+    }
+  };
+
+  private handleItemsRendered = ({
+    overscanStartIndex,
+    overscanStopIndex
+  }: ListOnItemsRenderedProps): void => {
+    if (this.props.onRowsRendered) {
+      this.props.onRowsRendered(overscanStartIndex, overscanStopIndex);
+    }
   };
 
   render(): JSX.Element {
@@ -562,11 +619,15 @@ export class CondaPkgList extends React.Component<
                 <FixedSizeList
                   height={Math.max(0, height - HEADER_HEIGHT)}
                   overscanCount={3}
-                  itemCount={sortedPackages.length}
+                  itemCount={this.props.total ?? sortedPackages.length}
                   itemData={sortedPackages}
-                  itemKey={(index, data): React.Key => data[index].name}
+                  // Package names never contain '#'
+                  itemKey={(index, data): React.Key =>
+                    data[index]?.name ?? `#${index}`
+                  }
                   itemSize={40}
                   width={width}
+                  onItemsRendered={this.handleItemsRendered}
                 >
                   {this.rowRenderer}
                 </FixedSizeList>
@@ -627,6 +688,11 @@ namespace Style {
         : 'var(--jp-layout-color2)'
     });
 
+  export const Placeholder = style({
+    color: 'var(--jp-ui-font-color2)',
+    fontStyle: 'italic'
+  });
+
   export const Summary = style({
     fontSize: '0.85em',
     color: 'var(--jp-ui-font-color1)',
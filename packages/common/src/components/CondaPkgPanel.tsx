@@ -77,7 +77,7 @@ export interface IPkgPanelState {
    */
   hasUpdate: boolean;
   /**
-   * Packages list
+   * Installed packages list
    */
   packages: Conda.IPackage[];
   /**
@@ -201,7 +201,12 @@ export class CondaPkgPanel extends React.Component<
         packages: packages
       });
 
-      const available = await this._model.refresh(true, environmentLoading);
+      // Only the installed packages are fetched with their available versions;
+      // the drawer fetches the other packages by pages
+      const page = await this._model.getAvailablePackagesPage({
+        environment: environmentLoading
+      });
+      const available = page.packages;
 
       let hasUpdate = false;
       available.forEach((pkg: Conda.IPackage, index: number) => {
@@ -620,16 +625,6 @@ export class CondaPkgPanel extends React.Component<
             pkg => pkg.channel && this.state.channelFilter.includes(pkg.channel)
           );
 
-    const uninstalledPkgs: Conda.IPackage[] = this.state.packages.filter(
-      (pkg: Conda.IPackage) => !pkg.version_installed
-    );
-    const uninstalledByChannels =
-      this.state.channelFilter.length === 0
-        ? uninstalledPkgs
-        : uninstalledPkgs.filter(
-            pkg => pkg.channel && this.state.channelFilter.includes(pkg.channel)
-          );
-
     const installedPkgs = this.state.packages.filter(
       pkg => pkg.version_installed
     );
@@ -697,7 +692,7 @@ export class CondaPkgPanel extends React.Component<
                 this.state.hasDescription &&
                 this.props.width > PANEL_SMALL_WIDTH
               }
-              packages={uninstalledByChannels}
+              channels={this.state.channelFilter}
               isLoading={this.state.isLoading}
               onPkgClick={this.handleClick}
               onPkgGraph={this.handleDependenciesGraph}
@@ -15,6 +15,10 @@ export interface ICreateEnvDrawerProps {
    * Environment manager
    */
   model: IEnvironmentManager;
+  /**
+   * Package manager searching the available packages
+   */
+  packageManager: Conda.IPackageManager;
   /**
    * Commands
    */
@@ -35,6 +39,15 @@ export interface ICreateEnvDrawerProps {
   hasDescription: boolean;
 }
 
+/**
+ * Delay (in ms) after the last keystroke before searching on the server
+ */
+const SEARCH_DELAY = 300;
+/**
+ * Maximal number of packages returned by the server search
+ */
+const SEARCH_LIMIT = 500;
+
 export const CreateEnvDrawer = (props: ICreateEnvDrawerProps): JSX.Element => {
   const [envName, setEnvName] = React.useState('');
   const [envNameTouched, setEnvNameTouched] = React.useState(false);
@@ -50,6 +63,9 @@ export const CreateEnvDrawer = (props: ICreateEnvDrawerProps): JSX.Element => {
     Map<string, string>
   >(new Map());
   const [searchTerm, setSearchTerm] = React.useState('');
+  const [searchResults, setSearchResults] = React.useState<
+    Conda.IPackage[] | null
+  >(null);
   const isLoading = props.packages.length === 0;
   const [errorMessage, setErrorMessage] = React.useState('');
 
@@ -190,10 +206,48 @@ export const CreateEnvDrawer = (props: ICreateEnvDrawerProps): JSX.Element => {
     setSearchTerm(value);
   };
 
+  // Search the names on the server, best matches first; the local filter
+  // below is shown while typing and if the search fails
+  React.useEffect(() => {
+    setSearchResults(null);
+    if (!searchTerm) {
+      return;
+    }
+
+    let active = true;
+    const timer = setTimeout(async () => {
+      try {
+        const found = await props.packageManager.searchAvailablePackages(
+          searchTerm,
+          SEARCH_LIMIT,
+          true
+        );
+        if (!active) {
+          return;
+        }
+        // Display the loaded packages to keep their versions list
+        const loaded = new Map(props.packages.map(pkg => [pkg.name, pkg]));
+        setSearchResults(found.map(pkg => loaded.get(pkg.name) || pkg));
+      } catch (error) {
+        if (error !== 'cancelled') {
+          console.error('Failed to search packages:', error);
+        }
+      }
+    }, SEARCH_DELAY);
+
+    return () => {
+      active = false;
+      clearTimeout(timer);
+    };
+  }, [searchTerm, props.packages, props.packageManager]);
+
   const filteredPackages = React.useMemo(() => {
     if (!searchTerm) {
       return props.packages;
     }
+    if (searchResults !== null) {
+      return searchResults;
+    }
     const lowerSearch = searchTerm.toLowerCase();
     return props.packages
       .filter(pkg => pkg.name.toLowerCase().includes(lowerSearch))
@@ -208,7 +262,7 @@ export const CreateEnvDrawer = (props: ICreateEnvDrawerProps): JSX.Element => {
         }
         return a.name.localeCompare(b.name);
       });
-  }, [props.packages, searchTerm]);
+  }, [props.packages, searchTerm, searchResults]);
 
   const handleCreate = async () => {
     if (!envName.trim()) {
@@ -361,6 +361,9 @@ export class NbConda extends React.Component<ICondaEnvProps, ICondaEnvState> {
         {this.state.showCreateEnvDrawer && (
           <CreateEnvDrawer
             model={this.props.model}
+            packageManager={this.props.model.getPackageManager(
+              this.state.currentEnvironment
+            )}
             commands={this.props.commands}
             environmentTypes={this.props.model.environmentTypes}
             onClose={this.handleCloseCreateDrawer}
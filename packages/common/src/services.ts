@@ -621,30 +621,7 @@ export class CondaPackage implements Conda.IPackageManager {
         }
 
         // Simplify the package channel name
-        const splitUrl = pkg.channel.split('/');
-        if (splitUrl.length > 2) {
-          let firstNotEmpty = 0;
-          if (
-            ['http:', 'https:', 'file:'].indexOf(splitUrl[firstNotEmpty]) >= 0
-          ) {
-            firstNotEmpty = 1; // Skip the scheme http, https or file
-          }
-          while (splitUrl[firstNotEmpty].length === 0) {
-            firstNotEmpty += 1;
-          }
-          pkg.channel = splitUrl[firstNotEmpty];
-          let pos = splitUrl.length - 1;
-          while (
-            Conda.PkgSubDirs.indexOf(splitUrl[pos]) > -1 &&
-            pos > firstNotEmpty
-          ) {
-            pos -= 1;
-          }
-          if (pos > firstNotEmpty) {
-            pkg.channel += '/...';
-          }
-          pkg.channel += '/' + splitUrl[pos];
-        }
+        pkg.channel = Private.channelDisplayName(pkg.channel);
 
         finalList.push(pkg);
         availableIdx += 1;
@@ -928,6 +905,128 @@ export class CondaPackage implements Conda.IPackageManager {
     await this._getAvailablePackages(true, cancellable);
   }
 
+  /**
+   * Get a page of the available packages filtered and sorted by the server.
+   *
+   * The packages are normalized like the ones returned by `refresh`.
+   *
+   * @param query Page query
+   * @param cancellable Can this asynchronous action be cancelled? A
+   * cancellable request cancels the previous cancellable one.
+   *
+   * @returns The page of packages
+   */
+  async getAvailablePackagesPage(
+    query: Conda.IPackagePageQuery = {},
+    cancellable = true
+  ): Promise<Conda.IPackagePage> {
+    if (cancellable) {
+      this._cancelTasks('availablePackagesPage');
+    }
+
+    // The offset is always set to request a page rather than the whole catalog
+    const params = new URLSearchParams({ offset: String(query.offset || 0) });
+    if (query.limit !== undefined) {
+      params.set('limit', String(query.limit));
+    }
+    (query.channels || []).forEach(channel =>
+      params.append('channel', channel)
+    );
+    if (query.environment) {
+      params.set('installed_in', query.environment);
+    }
+    if (query.excludedEnvironment) {
+      params.set('not_installed_in', query.excludedEnvironment);
+    }
+    if (query.sortBy) {
+      params.set('sort', query.sortBy);
+    }
+    if (query.sortDirection) {
+      params.set('order', query.sortDirection);
+    }
+    if (query.searchTerm) {
+      params.set('q', query.searchTerm);
+    }
+
+    const request: RequestInit = {
+      method: 'GET'
+    };
+
+    const { promise, cancel } = Private.requestServer(
+      URLExt.join('conda', 'packages') + '?' + params.toString(),
+      request
+    );
+    let idx: number | undefined;
+    if (cancellable) {
+      idx =
+        this._cancellableStack.push({
+          type: 'availablePackagesPage',
+          cancel
+        }) - 1;
+    }
+    const response = await promise;
+    if (idx !== undefined) {
+      this._cancellableStack.splice(idx, 1);
+    }
+    const data = (await response.json()) as Conda.IPackagePage;
+    data.packages.forEach(pkg => {
+      pkg.summary = pkg.summary || '';
+      // Stringify keywords and tags
+      pkg.keywords = (pkg.keywords || '').toString().toLowerCase();
+      pkg.tags = (pkg.tags || '').toString().toLowerCase();
+      pkg.version_installed = pkg.version_installed || '';
+      pkg.version_selected = pkg.version_installed || 'none';
+      pkg.updatable = false;
+      pkg.channel = Private.channelDisplayName(pkg.channel);
+    });
+    CondaPackage._hasDescription = data.with_description || false;
+    return data;
+  }
+
+  /**
+   * Search the available packages, best matches first.
+   *
+   * The server searches its cached catalog and only calls the package
+   * manager if there is none.
+   *
+   * @param query Searched words
+   * @param limit Maximal number of packages
+   * @param autocomplete Only search the package names
+   *
+   * @returns The packages found
+   */
+  async searchAvailablePackages(
+    query: string,
+    limit?: number,
+    autocomplete = false
+  ): Promise<Array<Conda.IPackage>> {
+    this._cancelTasks('searchAvailablePackages');
+
+    const params = new URLSearchParams({ query });
+    if (limit !== undefined) {
+      params.set('limit', String(limit));
+    }
+    if (autocomplete) {
+      params.set('autocomplete', '1');
+    }
+
+    const { promise, cancel } = Private.requestServer(
+      URLExt.join('conda', 'packages') + '?' + params.toString(),
+      { method: 'GET' }
+    );
+    const idx =
+      this._cancellableStack.push({
+        type: 'searchAvailablePackages',
+        cancel
+      }) - 1;
+    const response = await promise;
+    this._cancellableStack.splice(idx, 1);
+    const data = (await response.json()) as {
+      packages: Array<Conda.IPackage>;
+    };
+    return data.packages;
+  }
+
   /**
    * Does the available packages have description?
    *
@@ -959,11 +1058,28 @@ export class CondaPackage implements Conda.IPackageManager {
     const request: RequestInit = {
       method: 'GET'
     };
+    // Let the server answer 304 if the catalog did not change
+    if (
+      CondaPackage._availablePackages !== null &&
+      CondaPackage._availablePackagesETag !== null
+    ) {
+      request.headers = {
+        'If-None-Match': CondaPackage._availablePackagesETag
+      };
+    }
 
-    const { promise, cancel } = Private.requestServer(
-      URLExt.join('conda', 'packages'),
-      request
-    );
+    // Only ask the changes since the catalog version held
+    let url = URLExt.join('conda', 'packages');
+    if (
+      CondaPackage._availablePackages !== null &&
+      CondaPackage._availablePackagesVersion !== null
+    ) {
+      url += URLExt.objectToQueryString({
+        since: CondaPackage._availablePackagesVersion
+      });
+    }
+
+    const { promise, cancel } = Private.requestServer(url, request);
     let idx: number | undefined;
     if (cancellable) {
       idx =
@@ -973,12 +1089,23 @@ export class CondaPackage implements Conda.IPackageManager {
     if (idx !== undefined) {
       this._cancellableStack.splice(idx, 1);
     }
-    const data = (await response.json()) as {
-      packages: Array<Conda.IPackage>;
-      with_description: boolean;
-    };
-    CondaPackage._availablePackages = data.packages;
+    if (response.status === 304) {
+      return Promise.resolve(CondaPackage._availablePackages);
+    }
+    // The whole catalog is returned without since version
+    const data = (await response.json()) as Conda.IPackageDelta;
+    if (data.since !== undefined && CondaPackage._availablePackages !== null) {
+      Private.patchPackages(
+        CondaPackage._availablePackages,
+        data.packages,
+        data.removed
+      );
+    } else {
+      CondaPackage._availablePackages = data.packages;
+    }
     CondaPackage._hasDescription = data.with_description || false;
+    CondaPackage._availablePackagesETag = response.headers.get('ETag');
+    CondaPackage._availablePackagesVersion = data.version ?? null;
 
     return Promise.resolve(CondaPackage._availablePackages);
   }
@@ -1009,6 +1136,8 @@ export class CondaPackage implements Conda.IPackageManager {
   private _cancellableStack: Array<ICancellableAction> = [];
   private static _availablePackages: Array<Conda.IPackage> = null;
   private static _hasDescription = false;
+  private static _availablePackagesETag: string | null = null;
+  private static _availablePackagesVersion: string | null = null;
 }
 
 namespace Private {
@@ -1017,6 +1146,186 @@ namespace Private {
    */
   const POLLING_INTERVAL = 1000;
 
+  /**
+   * Short channel name displayed in the package lists
+   *
+   * For example `https://conda.anaconda.org/conda-forge/linux-64` is
+   * displayed `conda.anaconda.org/.../conda-forge`.
+   *
+   * @param channel Package channel
+   * @returns The display name
+   */
+  export function channelDisplayName(channel: string): string {
+    const splitUrl = (channel || '').split('/');
+    if (splitUrl.length <= 2) {
+      return channel;
+    }
+    let firstNotEmpty = 0;
+    if (['http:', 'https:', 'file:'].indexOf(splitUrl[firstNotEmpty]) >= 0) {
+      firstNotEmpty = 1; // Skip the scheme http, https or file
+    }
+    while (splitUrl[firstNotEmpty].length === 0) {
+      firstNotEmpty += 1;
+    }
+    let name = splitUrl[firstNotEmpty];
+    let pos = splitUrl.length - 1;
+    while (Conda.PkgSubDirs.indexOf(splitUrl[pos]) > -1 && pos > firstNotEmpty) {
+      pos -= 1;
+    }
+    if (pos > firstNotEmpty) {
+      name += '/...';
+    }
+    return name + '/' + splitUrl[pos];
+  }
+
+  /**
+   * Polling interval for accepted tasks whose completion is pushed by the
+   * server; it only covers the lost events.
+   */
+  const EVENTS_POLLING_INTERVAL = 10000;
+
+  /**
+   * Number of done tasks remembered, for the requests receiving their task
+   * index after the task completion.
+   */
+  const DONE_TASKS_SIZE = 256;
+
+  /**
+   * Task state change pushed by the server
+   */
+  interface ITaskEvent {
+    /**
+     * Task index
+     */
+    id: number;
+    /**
+     * Task state
+     */
+    state: string;
+    /**
+     * Whether the task was cancelled; only set when it is done
+     */
+    cancelled?: boolean;
+  }
+
+  /**
+   * Listener of the task events streamed by the server on `conda/events`.
+   */
+  export class TaskEvents {
+    constructor() {
+      const settings = ServerConnection.makeSettings();
+      let url = URLExt.join(settings.baseUrl, 'conda', 'events');
+      if (settings.token) {
+        // EventSource cannot set the authorization header
+        url += URLExt.objectToQueryString({ token: settings.token });
+      }
+      this._source = new EventSource(url);
+      this._source.addEventListener('task', this._onTask);
+      this._source.addEventListener('open', this._onOpen);
+      this._source.addEventListener('error', this._onError);
+    }
+
+    /**
+     * Whether the task events are received
+     */
+    get isAvailable(): boolean {
+      return this._source.readyState !== EventSource.CLOSED;
+    }
+
+    /**
+     * Call a function once a task is done.
+     *
+     * The function is also called if some events may have been lost.
+     *
+     * @param id Task index
+     * @param callback Function to call
+     * @returns Function removing the callback
+     */
+    onDone(id: number, callback: () => void): () => void {
+      if (this._done.has(id)) {
+        callback();
+        return (): void => undefined;
+      }
+      const callbacks = this._waiters.get(id) ?? new Set<() => void>();
+      callbacks.add(callback);
+      this._waiters.set(id, callbacks);
+      return (): void => {
+        callbacks.delete(callback);
+        if (callbacks.size === 0 && this._waiters.get(id) === callbacks) {
+          this._waiters.delete(id);
+        }
+      };
+    }
+
+    private _notify(id?: number): void {
+      const waiters =
+        id === undefined
+          ? Array.from(this._waiters.values())
+          : [this._waiters.get(id) ?? new Set<() => void>()];
+      if (id === undefined) {
+        this._waiters.clear();
+      } else {
+        this._waiters.delete(id);
+      }
+      waiters.forEach(callbacks => callbacks.forEach(callback => callback()));
+    }
+
+    private _onTask = (event: MessageEvent): void => {
+      let data: ITaskEvent;
+      try {
+        data = JSON.parse(event.data);
+      } catch (reason) {
+        console.debug('Invalid task event', event.data, reason);
+        return;
+      }
+      if (data.state !== 'done') {
+        return;
+      }
+      this._done.add(data.id);
+      if (this._done.size > DONE_TASKS_SIZE) {
+        this._done.delete(this._done.values().next().value);
+      }
+      this._notify(data.id);
+    };
+
+    private _onOpen = (): void => {
+      if (this._opened) {
+        // Events may have been lost while reconnecting
+        this._notify();
+      }
+      this._opened = true;
+    };
+
+    private _onError = (): void => {
+      if (!this.isAvailable) {
+        console.debug('Task events unavailable, polling the tasks.');
+        this._notify();
+      }
+    };
+
+    private _source: EventSource;
+    private _opened = false;
+    private _done = new Set<number>();
+    private _waiters = new Map<number, Set<() => void>>();
+  }
+
+  let taskEvents: TaskEvents | null = null;
+
+  /**
+   * Get the task events listener.
+   *
+   * @returns The listener or null if the events are not available
+   */
+  export function getTaskEvents(): TaskEvents | null {
+    if (typeof EventSource === 'undefined') {
+      return null;
+    }
+    if (taskEvents === null) {
+      taskEvents = new TaskEvents();
+    }
+    return taskEvents.isAvailable ? taskEvents : null;
+  }
+
   /**
    * Turn a failed HTTP response body into a message for the UI.
    * Multi-field JSON (task exceptions, solver metadata) is pretty-printed in full.
@@ -1051,6 +1360,51 @@ namespace Private {
     }
   }
 
+  /**
+   * Apply the changes of the available packages in place.
+   *
+   * @param packages Available packages sorted by name
+   * @param changed Packages added or updated
+   * @param removed Names of the packages removed
+   */
+  export function patchPackages(
+    packages: Array<Conda.IPackage>,
+    changed: Array<Conda.IPackage>,
+    removed: Array<string>
+  ): void {
+    const positions = new Map<string, number>();
+    packages.forEach((pkg, position) => positions.set(pkg.name, position));
+
+    let added = false;
+    changed.forEach(pkg => {
+      const position = positions.get(pkg.name);
+      if (position === undefined) {
+        packages.push(pkg);
+        added = true;
+      } else {
+        packages[position] = pkg;
+      }
+    });
+
+    if (removed.length > 0) {
+      const names = new Set(removed);
+      let kept = 0;
+      packages.forEach(pkg => {
+        if (!names.has(pkg.name)) {
+          packages[kept++] = pkg;
+        }
+      });
+      packages.length = kept;
+    }
+
+    if (added) {
+      // Keep the packages sorted by name like the server catalog
+      const byName = (a: Conda.IPackage, b: Conda.IPackage): number =>
+        a.name < b.name ? -1 : a.name > b.name ? 1 : 0;
+      packages.sort(byName);
+    }
+  }
+
   export interface ICancellablePromise<T> {
     promise: Promise<T>;
     cancel: () => void;
@@ -1071,12 +1425,13 @@ namespace Private {
 
     let answer: ICancellablePromise<Response>;
     let cancelled = false;
+    let pending: (() => void) | null = null;
 
     const promise = new PromiseDelegate<Response>();
 
     ServerConnection.makeRequest(fullUrl, request, settings)
       .then(response => {
-        if (!response.ok) {
+        if (!response.ok && response.status !== 304) {
           response
             .text()
             .then(text => {
@@ -1100,23 +1455,38 @@ namespace Private {
             });
         } else if (response.status === 202) {
           const redirectUrl = response.headers.get('Location') || url;
+          const task = redirectUrl.match(/\/tasks\/(\d+)$/);
+          const events = task ? getTaskEvents() : null;
 
-          setTimeout(
-            (url: string, settings: RequestInit) => {
-              if (cancelled) {
-                // If cancelled, tell the backend to delete the task.
-                console.debug(`Request cancelled ${url}.`);
-                settings = { ...settings, method: 'DELETE' };
-              }
-              answer = requestServer(url, settings);
-              answer.promise
-                .then(response => promise.resolve(response))
-                .catch(reason => promise.reject(reason));
-            },
-            POLLING_INTERVAL,
-            redirectUrl,
-            { method: 'GET' }
+          let dispose = (): void => undefined;
+          const poll = (): void => {
+            if (pending !== poll) {
+              return;
+            }
+            pending = null;
+            clearTimeout(timer);
+            dispose();
+            let settings: RequestInit = { method: 'GET' };
+            if (cancelled) {
+              // If cancelled, tell the backend to delete the task.
+              console.debug(`Request cancelled ${redirectUrl}.`);
+              settings = { ...settings, method: 'DELETE' };
+            }
+            answer = requestServer(redirectUrl, settings);
+            answer.promise
+              .then(response => promise.resolve(response))
+              .catch(reason => promise.reject(reason));
+          };
+
+          pending = poll;
+          // Poll once the task is done or, without events, periodically
+          const timer = setTimeout(
+            poll,
+            events ? EVENTS_POLLING_INTERVAL : POLLING_INTERVAL
           );
+          if (events) {
+            dispose = events.onDone(Number.parseInt(task[1]), poll);
+          }
         } else {
           promise.resolve(response);
         }
@@ -1131,6 +1501,9 @@ namespace Private {
         cancelled = true;
         if (answer) {
           answer.cancel();
+        } else if (pending) {
+          // Delete the task without waiting for its completion
+          pending();
         }
         promise.reject('cancelled');
       }
@@ -217,6 +217,32 @@ export namespace Conda {
      * @param cancellable Whether allowing this request to be cancelled or not?
      */
     refreshAvailablePackages(cancellable?: boolean): Promise<void>;
+    /**
+     * Get a page of the available packages filtered and sorted by the server
+     *
+     * @param query Page query
+     * @param cancellable Whether allowing this request to be cancelled or not?
+     *
+     * @returns The page of packages
+     */
+    getAvailablePackagesPage(
+      query?: IPackagePageQuery,
+      cancellable?: boolean
+    ): Promise<IPackagePage>;
+    /**
+     * Search the available packages, best matches first
+     *
+     * @param query Searched words
+     * @param limit Maximal number of packages
+     * @param autocomplete Only search the package names
+     *
+     * @returns The packages found
+     */
+    searchAvailablePackages(
+      query: string,
+      limit?: number,
+      autocomplete?: boolean
+    ): Promise<Array<IPackage>>;
     /**
      * Does the packages have description?
      */
@@ -329,6 +355,89 @@ export namespace Conda {
     version_selected?: string;
     updatable?: boolean;
   }
+  /**
+   * Query of a page of the available packages
+   */
+  export interface IPackagePageQuery {
+    /**
+     * Number of packages to skip
+     */
+    offset?: number;
+    /**
+     * Maximal number of packages
+     */
+    limit?: number;
+    /**
+     * Channels of the packages
+     */
+    channels?: Array<string>;
+    /**
+     * Environment in which the packages are installed
+     */
+    environment?: string;
+    /**
+     * Environment in which the packages are not installed
+     */
+    excludedEnvironment?: string;
+    /**
+     * Sort key
+     */
+    sortBy?: 'name' | 'channel';
+    /**
+     * Sort direction
+     */
+    sortDirection?: 'asc' | 'desc';
+    /**
+     * Term contained in the package names
+     */
+    searchTerm?: string;
+  }
+  /**
+   * Page of the available packages
+   */
+  export interface IPackagePage {
+    /**
+     * Packages of the page
+     */
+    packages: Array<IPackage>;
+    /**
+     * Number of packages matching the query
+     */
+    total: number;
+    /**
+     * Index of the first package of the page
+     */
+    offset: number;
+    /**
+     * Does the packages have description?
+     */
+    with_description: boolean;
+  }
+  /**
+   * Changes of the available packages since a catalog version
+   */
+  export interface IPackageDelta {
+    /**
+     * Packages added or updated
+     */
+    packages: Array<IPackage>;
+    /**
+     * Names of the packages removed
+     */
+    removed: Array<string>;
+    /**
+     * Current catalog version; an opaque token
+     */
+    version: string;
+    /**
+     * Catalog version the changes apply to
+     */
+    since: string;
+    /**
+     * Does the packages have description?
+     */
+    with_description: boolean;
+  }
   /**
    * Packages dependencies
    */